@@ -220,6 +220,8 @@ class OmniverseConnector (Workbench):
         elif last_project_link!=None:
             omniConnectorGui.SaveLastProjectLinkAsTextFile(last_project_link)
 
+        omniConnectorGui.WarmUpOmniClientWorker()
+
         Log ('Loading Omniverse Connector module... done\n')
 
     def GetClassName(self):
@@ -64,6 +64,10 @@ if exist "..\session_local" (
 	rd ..\session_local /s /q
 )
 
+if exist "..\session_cache" (
+	rd ..\session_cache /s /q
+)
+
 
 echo === CLEANING COMPLETE ===
 REM End script
@@ -5,8 +5,352 @@ import FreeCAD
 import subprocess
 import Import
 import Mesh
+import Part
+import MeshPart
+import math
+import numpy as np
+import concurrent.futures
+import json
+import hashlib
+import queue
+import socket
+import atexit
+import threading
+import traceback
+from session_state import GetSessionState, STATE_FILENAME
 __dir__ = os.path.dirname(__file__)
 
+# Route Nucleus operations through one long-lived connectSampleLib process instead of one process per call
+USE_OMNI_CLIENT_WORKER = True
+# Seconds to wait for the worker to import its modules and open its socket
+OMNI_CLIENT_WORKER_STARTUP_TIMEOUT = 120
+# Seconds the worker stays alive without requests before it exits on its own
+OMNI_CLIENT_WORKER_IDLE_TIMEOUT = 900
+# Seconds to wait for any output of a running request before the worker is considered hung and restarted
+OMNI_CLIENT_WORKER_REQUEST_TIMEOUT = 1800
+# Tessellation used when pushing to USD: maximum distance (mm) and angle (degrees) between a shape and its mesh
+DEFAULT_LINEAR_DEFLECTION = 0.1
+DEFAULT_ANGULAR_DEFLECTION = 28.5
+# Levels of detail authored as a USD variant set. 1 writes a single mesh without variants.
+DEFAULT_LOD_COUNT = 1
+MAX_LOD_COUNT = 4
+# Each level of detail allows this many times the deflection of the previous one
+LOD_COARSENING_FACTOR = 4.0
+# Size limit of the cache of downloaded STEP files in session_cache. 0 disables the cache.
+DOWNLOAD_CACHE_MAX_MB = 2048
+# Size limit of the shapes cached for imported STEP data in session_cache. 0 disables the cache.
+# Off by default: a cached shape is inserted as one Part feature, without the part structure and
+# colours a STEP import gives, so it stays off until a cache hit inserts the same objects as a miss.
+BREP_CACHE_MAX_MB = 0
+# Threads tessellating the objects of a multi-object push, and uploads the worker runs at once
+BATCH_EXPORT_MAX_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+BATCH_MAX_UPLOADS = 4
+# Operations whose progress records count files rather than bytes
+BATCH_PROGRESS_OPS = ('push_batch', 'pull_batch')
+# File format of new assets and assemblies: 'usda' (text) or 'usdc' (binary crate, smaller and faster to open)
+USD_FORMATS = ('usda', 'usdc')
+DEFAULT_USD_FORMAT = 'usda'
+
+
+class OmniClientWorkerUnavailable(OSError):
+    # The request never reached the worker, so it is safe to run it another way
+    pass
+
+class OmniClientWorkerError(OSError):
+    # The worker failed after receiving the request, which may have been carried out in part
+    pass
+
+class OmniClientWorker:
+    """
+    Client for connectSampleLib.py running in --serve mode.
+
+    The worker keeps omni.client initialised and pxr/numpy imported, so each
+    request only pays for the Nucleus round trip. Requests are serialised with a lock,
+    and a request that sends neither progress nor a response for OMNI_CLIENT_WORKER_REQUEST_TIMEOUT seconds fails.
+    """
+    def __init__(self):
+        self.process = None
+        self.sock = None
+        self.reader = None
+        self.lock = threading.Lock()
+        self.request_id = 0
+
+    def start(self):
+        batch_path = os.path.join(GetFetcherScriptsDirectory().replace(" ", "` "), GetBatchFileName())
+        cmd = f'{batch_path} --serve --idle_timeout {OMNI_CLIENT_WORKER_IDLE_TIMEOUT}'
+        print(f'[CMD] {cmd}')
+        self.process = subprocess.Popen(
+            ['powershell', cmd],
+            shell=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+        # Keep draining stdout after the handshake so the worker can never block on a full pipe
+        lines = queue.Queue()
+        def drain_stdout():
+            for raw_line in self.process.stdout:
+                lines.put(raw_line.decode('utf-8', errors='replace').strip())
+            lines.put(None)
+        threading.Thread(target=drain_stdout, daemon=True).start()
+
+        while True:
+            line = lines.get(timeout=OMNI_CLIENT_WORKER_STARTUP_TIMEOUT)
+            if line is None:
+                raise OSError('Omniverse client worker exited before it was ready')
+            ready = [record for record in ParseResultRecords(line) if record.get('type') == 'ready']
+            if ready:
+                port = int(ready[0]['payload']['port'])
+                break
+
+        self.sock = socket.create_connection(('127.0.0.1', port))
+        self.sock.settimeout(OMNI_CLIENT_WORKER_REQUEST_TIMEOUT)
+        self.reader = self.sock.makefile('r', encoding='utf-8')
+        print(f'[INFO] Omniverse client worker ready on port {port}')
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None and self.sock is not None
+
+    def request(self, argv, on_progress=None):
+        """
+        Sends one operation to the worker.
+
+        Args:
+            argv (list): Command line arguments for connectSampleLib.py.
+            on_progress (callable, optional): Called with each progress record as the worker emits it.
+
+        Returns:
+            tuple: (stdout_output, stderr_output, exit_code)
+
+        Raises:
+            OmniClientWorkerUnavailable: The request could not be sent.
+            OmniClientWorkerError: The worker did not answer in time, closed the connection or sent a malformed response.
+        """
+        with self.lock:
+            self.request_id += 1
+            message = json.dumps({'id': self.request_id, 'argv': [str(arg) for arg in argv]})
+            try:
+                self.sock.sendall((message + '\n').encode('utf-8'))
+            except OSError as e:
+                raise OmniClientWorkerUnavailable(f'Cannot send request to the Omniverse client worker: {e}') from e
+            while True:
+                response = self._read_message()
+                if 'progress' not in response:
+                    break
+                if on_progress is not None:
+                    try:
+                        on_progress(response['progress'])
+                    except Exception:
+                        # The rest of the request still has to be read, or the next one would get its messages
+                        traceback.print_exc()
+        try:
+            return response['stdout'], response['stderr'], response['exit_code']
+        except KeyError as e:
+            raise OmniClientWorkerError(f'Malformed response from the Omniverse client worker: {e}') from e
+
+    def _read_message(self):
+        # One line from the worker: a progress message or the response that ends the request
+        try:
+            line = self.reader.readline()
+        except socket.timeout as e:
+            raise OmniClientWorkerError(f'No response from the Omniverse client worker for {OMNI_CLIENT_WORKER_REQUEST_TIMEOUT} seconds') from e
+        except OSError as e:
+            raise OmniClientWorkerError(f'Lost the connection to the Omniverse client worker: {e}') from e
+        if not line:
+            raise OmniClientWorkerError('Omniverse client worker closed the connection')
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            raise OmniClientWorkerError(f'Malformed response from the Omniverse client worker: {e}') from e
+        if not isinstance(message, dict):
+            raise OmniClientWorkerError('Malformed response from the Omniverse client worker')
+        return message
+
+    def stop(self):
+        try:
+            if self.sock is not None:
+                self.sock.sendall(b'{"shutdown": true}\n')
+                self.sock.close()
+        except OSError:
+            pass
+        self.sock = self.reader = None
+        if self.process is not None and self.process.poll() is None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+_omni_client_worker = None
+_omni_client_worker_lock = threading.Lock()
+
+def GetOmniClientWorker():
+    """
+    Returns the running worker, starting it on first use. Returns None if the worker is disabled or cannot start.
+    """
+    global _omni_client_worker
+    if not USE_OMNI_CLIENT_WORKER:
+        return None
+    with _omni_client_worker_lock:
+        if _omni_client_worker is not None and _omni_client_worker.is_running():
+            return _omni_client_worker
+        if _omni_client_worker is not None:
+            _omni_client_worker.stop()
+        worker = OmniClientWorker()
+        try:
+            worker.start()
+        except (OSError, ValueError, queue.Empty) as e:
+            print(f'[WARN] Could not start Omniverse client worker: {e}')
+            worker.stop()
+            worker = None
+        _omni_client_worker = worker
+        return worker
+
+def StopOmniClientWorker():
+    global _omni_client_worker
+    with _omni_client_worker_lock:
+        if _omni_client_worker is not None:
+            _omni_client_worker.stop()
+            _omni_client_worker = None
+
+def WarmUpOmniClientWorker():
+    # Start the worker in the background so the first click does not pay the startup cost
+    if USE_OMNI_CLIENT_WORKER:
+        threading.Thread(target=GetOmniClientWorker, daemon=True).start()
+
+atexit.register(StopOmniClientWorker)
+
+
+def _QuotePowershellArg(arg):
+    arg = str(arg)
+    if arg and not any(c in arg for c in ' \'"`$;&|(){}'):
+        return arg
+    return "'" + arg.replace("'", "''") + "'"
+
+def _RunOmniClientProcess(argv):
+    # One-shot fallback: launch connectSampleLib through the batch file for a single operation
+    batch_path = os.path.join(GetFetcherScriptsDirectory().replace(" ", "` "), GetBatchFileName())
+    cmd = ' '.join([batch_path] + [_QuotePowershellArg(arg) for arg in argv])
+    p = subprocess.Popen(['powershell', cmd], shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = p.communicate()
+    return stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace')
+
+def RunOmniClientCommand(argv, on_progress=None):
+    """
+    Runs one connectSampleLib operation, preferring the persistent worker process.
+
+    Args:
+        argv (list): Command line arguments for connectSampleLib.py, e.g. ['--nucleus_url', url, '--auth'].
+        on_progress (callable, optional): Called with each progress record while the worker runs the operation.
+            The one-shot fallback process reports no progress until it has finished.
+
+    Returns:
+        tuple: (stdout_output, stderr_output) with '\n' line endings.
+    """
+    print(f'[CMD] {" ".join(str(arg) for arg in argv)}')
+    worker = GetOmniClientWorker()
+    if worker is not None:
+        try:
+            stdout, stderr, _ = worker.request(argv, on_progress)
+            return stdout, stderr
+        except OmniClientWorkerUnavailable as e:
+            print(f'[WARN] {e}, falling back to a one-shot process.')
+            StopOmniClientWorker()
+        except OmniClientWorkerError as e:
+            # The operation may have run in part (e.g. a push), so it is not run again; the next call starts a new worker
+            StopOmniClientWorker()
+            return json.dumps(MakeErrorRecord('worker', 'WORKER_FAILED', str(e))) + '\n', ''
+    stdout, stderr = _RunOmniClientProcess(argv)
+    return stdout.replace('\r\n', '\n'), stderr.replace('\r\n', '\n')
+
+def ParseResultRecords(stdout):
+    """
+    Parses the JSON-lines output of connectSampleLib.py into records.
+
+    Args:
+        stdout (str): stdout of a connectSampleLib operation.
+
+    Returns:
+        list: Record dictionaries with at least 'type' and 'op' keys. Lines that are not records
+        (e.g. output of the batch file itself) are skipped.
+    """
+    records = []
+    for line in stdout.splitlines():
+        line = line.strip()
+        if not line.startswith('{'):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and 'type' in record:
+            records.append(record)
+    return records
+
+def GetResultPayload(records, op=None):
+    """
+    Returns the payload of the last result record (optionally for a given operation), or None if the operation did not succeed.
+    """
+    for record in reversed(records):
+        if record.get('type') == 'result' and (op is None or record.get('op') == op):
+            return record.get('payload', {})
+    return None
+
+def GetErrorRecords(records):
+    return [record for record in records if record.get('type') == 'error']
+
+def FormatErrorRecord(record):
+    return f"[ERROR] {record.get('code')}: {record.get('message')}"
+
+def MakeErrorRecord(op, code, message):
+    # Errors detected on the FreeCAD side are reported in the same shape as the ones from connectSampleLib
+    return {'type': 'error', 'op': op, 'code': code, 'message': message}
+
+def PrintResultRecords(records, stderr_output=''):
+    for record in records:
+        if record.get('type') == 'error':
+            print(FormatErrorRecord(record))
+        else:
+            print('[OmniClient]', json.dumps(record))
+    for line in stderr_output.splitlines():
+        if line.strip():
+            print('[OmniClient]', line)
+
+def FormatProgressRecord(record):
+    """
+    Describes a progress record in a few words for the job queue, e.g. 'part.stp: 40% of 8.2 MB' or '3/5 part usd: ok'.
+    """
+    done, total = record.get('done'), record.get('total')
+    message = str(record.get('message') or record.get('op', ''))
+    if record.get('op') in BATCH_PROGRESS_OPS:
+        return f'{done}/{total} {message}'
+    # Transfers report bytes and are labelled with the Nucleus URL
+    name = message.rstrip('/').split('/')[-1]
+    if not total:
+        return f'{name}: {(done or 0) / 1e6:.1f} MB'
+    return f'{name}: {100 * (done or 0) // total}% of {total / 1e6:.1f} MB'
+
+def RunOmniClientOperation(argv, on_progress=None):
+    """
+    Runs one connectSampleLib operation and parses its result records.
+
+    Args:
+        argv (list): Command line arguments for connectSampleLib.py.
+        on_progress (callable, optional): Called with FormatProgressRecord text for each progress record
+            while the operation runs, on the calling thread.
+
+    Returns:
+        tuple: (records, stderr_output)
+    """
+    stdout, stderr = RunOmniClientCommand(argv, None if on_progress is None else lambda record: on_progress(FormatProgressRecord(record)))
+    records = ParseResultRecords(stdout)
+    for record in GetErrorRecords(records):
+        print(FormatErrorRecord(record))
+    return records, stderr
+
+
 
 def CreateNewProjectOnNucleus(host_name, project_name, make_public=False):
     """
@@ -18,267 +362,655 @@ def CreateNewProjectOnNucleus(host_name, project_name, make_public=False):
         make_public (bool): Whether the project should be public.
 
     Returns:
-        tuple: (ok, stdout_lines, stderr_lines)
+        tuple: (ok, records, stderr_lines)
     """
-    batch_path = os.path.join(GetFetcherScriptsDirectory().replace(" ", "` "), GetBatchFileName())
-    cmd = (
-        f'{batch_path} --create_new_project --project_name {project_name} '
-        f'--host_name {host_name} {"--make_public" if make_public else ""}'
-    )
+    argv = ['--create_new_project', '--project_name', project_name, '--host_name', host_name]
+    if make_public:
+        argv.append('--make_public')
 
-    print(f'[CMD] {cmd}')
-    p = subprocess.Popen(['powershell', cmd], shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = p.communicate()
-    stdout_decoded, stderr_decoded = stdout.decode(), stderr.decode()
+    records, stderr = RunOmniClientOperation(argv)
 
-    ok = "error" not in stdout_decoded.lower()
-    return ok, stdout_decoded.split('\n'), stderr_decoded.split('\n')
+    ok = GetResultPayload(records, 'create_new_project') is not None
+    return ok, records, stderr.split('\n')
 
 def CreateNewAssetOnNucleus(asset_name, use_url=True, projectURL=None, host_name=None, project_name=None, token=None):
     """
     Creates a new asset on Nucleus and returns associated links and any error.
 
     Returns:
-        tuple: (stdout_lines, stderr_lines, stplink, usdlink, error)
+        tuple: (records, stderr_lines, stplink, usdlink, error)
     """
-    batch_path = os.path.join(GetFetcherScriptsDirectory().replace(" ", "` "), GetBatchFileName())
-
     if use_url:
-        cmd = f'{batch_path} --create_new_asset --nucleus_url {projectURL} --asset_name {asset_name}'
+        argv = ['--create_new_asset', '--nucleus_url', projectURL, '--asset_name', asset_name]
     else:
-        cmd = f'{batch_path} --create_new_asset --project_name {project_name} --host_name {host_name} --asset_name {asset_name}'
+        argv = ['--create_new_asset', '--project_name', project_name, '--host_name', host_name, '--asset_name', asset_name]
+    argv += ['--usd_format', GetUSDFormat()]
     if token:
-        cmd += f' --token {token}'
-    print(f'[CMD] {cmd}')
-    p = subprocess.Popen(['powershell', cmd], shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = p.communicate()
-    stdout_lines = stdout.decode().split('\n')
-    stderr_lines = stderr.decode().split('\n')
+        argv += ['--token', token]
+    records, stderr = RunOmniClientOperation(argv)
+    stderr_lines = stderr.split('\n')
 
     stplink = usdlink = error = None
-    for line in map(str.strip, stdout_lines):
-        if '.usd' in line:
-            usdlink = line
-            print(usdlink)
-        elif '.stp' in line:
-            stplink = line
-            print(stplink)
-        elif 'ERROR' in line:
-            error = line
-            usdlink = stplink = None
-    return stdout_lines, stderr_lines, stplink, usdlink, error
+    payload = GetResultPayload(records, 'create_new_asset')
+    errors = GetErrorRecords(records)
+    if errors:
+        error = FormatErrorRecord(errors[0])
+    elif payload is None:
+        error = '[ERROR] NO_RESULT: Nucleus did not report the new asset.'
+    else:
+        stplink, usdlink = payload['stp_url'], payload['usd_url']
+        print(usdlink)
+        print(stplink)
+    return records, stderr_lines, stplink, usdlink, error
 
-def UploadUSDToNucleus(usdlink, selected_object, token, secondary=False, overwrite_history=False):
+def GetUploadPermissionError(link, filetype='usd', secondary=False):
     """
-    Uploads a mesh (converted to STL) to a Nucleus USD location using a batch script.
+    Checks the stored permission for a Nucleus file before anything is exported or sent.
 
     Args:
-        usdlink (str): Nucleus USD URL (primary or secondary depending on 'secondary').
-        selected_object (FreeCAD object): The object to export and upload.
-        token (str): Unique identifier for the upload session.
-        secondary (bool): Whether this is a secondary (fallback) USD location.
-        overwrite_history (bool): If True, creates a fresh USd with zero version history
+        link (str): Nucleus URL of the file.
+        filetype (str): 'usd' or 'stp'.
+        secondary (bool): Kept for API compatibility, permissions are cached per URL.
 
     Returns:
-        tuple: (stdout_output, stderr_output)
+        dict: An error record if the file cannot be pushed to, otherwise None.
     """
-    # Get permissions for primary or secondary USD
-    permission = GetCurrentUSDPermissions(secondary=secondary)
+    permission = GetPermissionForURL(link)
+    if filetype == 'usd':
+        op, label, missing_hint = 'push', 'USD', 'You have not entered a valid USD link.'
+    else:
+        op, label, missing_hint = 'push_non_usd', 'STP', 'You have not entered a valid Nucleus link.'
 
     if permission == 'NO_ACCESS':
-        print(f'[ERROR] NO_PERMISSION: Cannot access USD file: {usdlink}')
+        print(f'[ERROR] NO_PERMISSION: Cannot access {label} file: {link}')
         print('[ERROR] You do not have permissions to access this file! Contact your Nucleus administrator.')
-        return 'FAIL', 'NO_PERMISSION'
+        return MakeErrorRecord(op, 'NO_PERMISSION', f'Cannot access {label} file: {link}')
 
     if permission is None:
-        print(f'[ERROR] PERMISSION_NOT_FOUND: Cannot access USD file: {usdlink}')
-        print('[ERROR] You have not entered a valid USD link.')
-        return 'FAIL', 'PERMISSION_NOT_FOUND'
+        print(f'[ERROR] PERMISSION_NOT_FOUND: Cannot access {label} file: {link}')
+        print(f'[ERROR] {missing_hint}')
+        return MakeErrorRecord(op, 'PERMISSION_NOT_FOUND', f'Cannot access {label} file: {link}')
 
-    if permission == 'OK_ACCESS':
-        script_dir = GetFetcherScriptsDirectory().replace(" ", "` ")
-        batch_file = GetBatchFileName()
-        batch_path = os.path.join(script_dir, batch_file)
+    if permission != 'OK_ACCESS':
+        return MakeErrorRecord(op, 'UNKNOWN_PERMISSION_STATUS', f'Cannot access {label} file: {link}')
+    return None
 
-        local_dir = GetLocalDirectoryName()
-        stl_filename = f'{token}upload.stl'
-        stl_path = os.path.join(local_dir, stl_filename)
+def ExportSTLForUpload(selected_object, token):
+    """
+    Exports an object to the STL file that --push and --create_new_usd read. Must run on the main thread.
 
-        print(f'[INFO] Exporting mesh to: {stl_path}')
-        print(f'[INFO] Upload token: {token}')
+    Returns:
+        str: Path of the exported STL file.
+    """
+    stl_path = os.path.join(GetLocalDirectoryName(), f'{token}upload.stl')
 
-        # Export to STL file
-        Mesh.export([selected_object], stl_path)
+    print(f'[INFO] Exporting mesh to: {stl_path}')
+    print(f'[INFO] Upload token: {token}')
 
-        # Select push or overwrite mode
-        action_flag = '--create_new_usd' if overwrite_history else '--push'
+    Mesh.export([selected_object], stl_path)
+    return stl_path
 
-        # Build command
-        cmd = f'{batch_path} --nucleus_url {usdlink} --local_directory {local_dir.replace(" ", "` ")} {action_flag} --token {token}'
-        print(f'[CMD] {cmd}')
+def GetMeshSettings():
+    """
+    Returns the tessellation settings chosen in the advanced options, see DEFAULT_LINEAR_DEFLECTION.
 
-        process = subprocess.Popen(
-            ['powershell', cmd],
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        stdout, stderr = process.communicate()
-        return stdout.decode('utf-8'), stderr.decode('utf-8')
+    Returns:
+        tuple: (linear_deflection, angular_deflection, lod_count)
+    """
+    return (getattr(FreeCAD, 'OV_linear_deflection', DEFAULT_LINEAR_DEFLECTION),
+            getattr(FreeCAD, 'OV_angular_deflection', DEFAULT_ANGULAR_DEFLECTION),
+            getattr(FreeCAD, 'OV_lod_count', DEFAULT_LOD_COUNT))
 
-    return 'FAIL', 'UNKNOWN_PERMISSION_STATUS'
+def SaveMeshSettings(linear_deflection, angular_deflection, lod_count):
+    FreeCAD.OV_linear_deflection = float(linear_deflection)
+    FreeCAD.OV_angular_deflection = float(angular_deflection)
+    FreeCAD.OV_lod_count = max(1, min(int(lod_count), MAX_LOD_COUNT))
 
+def GetUSDFormat():
+    return getattr(FreeCAD, 'OV_usd_format', DEFAULT_USD_FORMAT)
 
-def UploadSTPToNucleus(stplink, selected_object, token, custom_checkpoint=None, secondary=False):
+def SaveUSDFormat(usd_format):
+    if usd_format not in USD_FORMATS:
+        raise ValueError(f'Unknown USD format: {usd_format}')
+    FreeCAD.OV_usd_format = usd_format
+
+def ConvertProjectAssetsToUSDC(projectURL, token=None):
     """
-    Uploads a STEP file to Nucleus using the batch uploader.
+    Converts the .usda assets of a project to binary .usdc and points its assemblies at the new files.
+
+    Returns:
+        tuple: (records, stderr_output, converted) where converted maps old to new USD URLs
+    """
+    argv = ['--nucleus_url', projectURL, '--convert_to_usdc']
+    if token:
+        argv += ['--token', token]
+    records, stderr = RunOmniClientOperation(argv)
+    payload = GetResultPayload(records, 'convert_to_usdc')
+    if payload and payload.get('kept_originals'):
+        print(f"[WARN] Kept the .usda assets, these assemblies or folders could not be updated: {', '.join(payload['failed'])}")
+    return records, stderr, payload['converted'] if payload else {}
+
+def ApplyUSDLinkMigration(converted):
+    """
+    Updates the session links and the Nucleus_link_usd of objects in every open document after a conversion. Must run on the main thread.
+    """
+    if not converted:
+        return
+    GetState().replace_urls(converted)
+    for attribute in ('secondary_usdlink', 'assembly_usd_link'):
+        url = getattr(FreeCAD, attribute, None)
+        if url in converted:
+            setattr(FreeCAD, attribute, converted[url])
+    for document in FreeCAD.listDocuments().values():
+        for obj in document.Objects:
+            if getattr(obj, 'Nucleus_link_usd', None) in converted:
+                obj.Nucleus_link_usd = converted[obj.Nucleus_link_usd]
+    print(f'[INFO] Converted {len(converted)} assets to .usdc')
+
+def TessellateShape(shape, linear_deflection, angular_deflection):
+    """
+    Meshes a shape with the given deflections.
+
+    Returns:
+        tuple: (points, triangles) as float32 (N, 3) and int32 (M, 3) arrays, or (None, None) if nothing was meshed
+    """
+    mesh = MeshPart.meshFromShape(Shape=shape, LinearDeflection=linear_deflection,
+                                  AngularDeflection=math.radians(angular_deflection), Relative=False)
+    points, facets = mesh.Topology
+    if not facets:
+        return None, None
+    points = np.array([(p.x, p.y, p.z) for p in points], dtype=np.float32)
+    triangles = np.array(facets, dtype=np.int32).reshape(-1, 3)
+    return points, triangles
+
+def GetMeshSource(selected_object):
+    """
+    Returns what GetMeshBuffers tessellates: a copy of the mesh of a Mesh::Feature, or a copy of the
+    shape of any other object, or None if the object has no geometry. Must run on the main thread;
+    the result is detached from the document and may be meshed in another thread.
+    """
+    if selected_object.isDerivedFrom('Mesh::Feature'):
+        return selected_object.Mesh.copy()
+    shape = Part.getShape(selected_object)
+    # Part.getShape shares its faces with obj.Shape, and meshing stores triangulations on them,
+    # so a pool thread must not mesh them while the main thread exports the same object
+    return None if shape.isNull() else shape.copy()
+
+def GetMeshBuffers(mesh_source, linear_deflection=DEFAULT_LINEAR_DEFLECTION, angular_deflection=DEFAULT_ANGULAR_DEFLECTION, lod_count=1):
+    """
+    Tessellates a mesh source from GetMeshSource into vertex and triangle index arrays, once per level of detail.
+
+    Level 0 uses the given deflections and every further level is LOD_COARSENING_FACTOR times coarser.
+    The levels are meshed concurrently, each on its own copy of the shape.
+
+    Returns:
+        list: (points, triangles) per level of detail, finest first. Empty if the object has no geometry.
+    """
+    if mesh_source is None:
+        return []
+    if not isinstance(mesh_source, Part.Shape):
+        # Already a mesh: there is nothing to tessellate, so it is pushed as a single level
+        points, facets = mesh_source.Topology
+        if not facets:
+            return []
+        return [(np.array([(p.x, p.y, p.z) for p in points], dtype=np.float32),
+                 np.array(facets, dtype=np.int32).reshape(-1, 3))]
+
+    factors = [LOD_COARSENING_FACTOR ** level for level in range(lod_count)]
+    if lod_count == 1:
+        levels = [TessellateShape(mesh_source, linear_deflection, angular_deflection)]
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=lod_count) as executor:
+            futures = [executor.submit(TessellateShape, mesh_source.copy(), linear_deflection * factor,
+                                       min(angular_deflection * factor, 90.0))
+                       for factor in factors]
+            levels = [future.result() for future in futures]
+    if any(points is None for points, _ in levels):
+        return []
+    return levels
+
+def SaveMeshBuffers(levels, mesh_path):
+    # One .npy file per array, so the worker can memory-map them (layout documented in mesh_utils.py)
+    for level, (points, triangles) in enumerate(levels):
+        level_path = mesh_path if len(levels) == 1 else os.path.join(mesh_path, f'lod{level}')
+        print(f'[INFO] Exporting {len(triangles)} triangles to: {level_path}')
+        os.makedirs(level_path, exist_ok=True)
+        np.save(os.path.join(level_path, 'points.npy'), points)
+        np.save(os.path.join(level_path, 'triangles.npy'), triangles)
+    return mesh_path
+
+def ExportMeshForUpload(selected_object, token):
+    """
+    Saves the tessellation of an object as a mesh bundle that --push and --create_new_usd map straight into USD.
+    With more than one level of detail, each level goes into its own lod<N> bundle inside the directory.
+    Objects that cannot be tessellated fall back to an STL export. Must run on the main thread.
+
+    Returns:
+        str: Path of the exported mesh file.
+    """
+    linear_deflection, angular_deflection, lod_count = GetMeshSettings()
+    levels = GetMeshBuffers(GetMeshSource(selected_object), linear_deflection, angular_deflection, lod_count)
+    if not levels:
+        print('[WARN] Could not tessellate the selected object, exporting STL instead')
+        return ExportSTLForUpload(selected_object, token)
+
+    print(f'[INFO] Upload token: {token}')
+    return SaveMeshBuffers(levels, os.path.join(GetLocalDirectoryName(), f'{token}upload_mesh'))
+
+def ExportObjectsForUpload(objects, token):
+    """
+    Exports the mesh bundle and STEP file of several objects for one --push_batch. Must run on the main thread.
+
+    The objects are tessellated concurrently in a thread pool while their STEP files are exported
+    here, one after the other, since Import.export has to run on the main thread.
+
+    Returns:
+        dict: Object name to (mesh_path, stp_path). mesh_path is None if the object could not be tessellated.
+    """
+    linear_deflection, angular_deflection, lod_count = GetMeshSettings()
+    local_directory = GetLocalDirectoryName()
+    exports = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=BATCH_EXPORT_MAX_WORKERS) as executor:
+        futures = {obj.Name: executor.submit(GetMeshBuffers, GetMeshSource(obj), linear_deflection, angular_deflection, lod_count)
+                   for obj in objects}
+        stp_paths = {}
+        for obj in objects:
+            stp_paths[obj.Name] = os.path.join(local_directory, f'{token}_{obj.Name}upload.stp')
+            Import.export([obj], stp_paths[obj.Name])
+        for obj in objects:
+            levels = futures[obj.Name].result()
+            if not levels:
+                print(f'[WARN] Could not tessellate {obj.Label}, its USD is not updated')
+                exports[obj.Name] = (None, stp_paths[obj.Name])
+                continue
+            mesh_path = SaveMeshBuffers(levels, os.path.join(local_directory, f'{token}_{obj.Name}upload_mesh'))
+            exports[obj.Name] = (mesh_path, stp_paths[obj.Name])
+    return exports
+
+def SendUSDToNucleus(usdlink, token, overwrite_history=False, mesh_path=None):
+    """
+    Writes the mesh exported by ExportMeshForUpload into the USD on Nucleus. Network only, safe to run in a background job.
+
+    Returns:
+        tuple: (records, stderr_output)
+    """
+    # Select push or overwrite mode
+    action_flag = '--create_new_usd' if overwrite_history else '--push'
+
+    argv = ['--nucleus_url', usdlink, '--local_directory', GetLocalDirectoryName(), action_flag, '--token', token]
+    if mesh_path:
+        argv += ['--mesh_file', mesh_path]
+    return RunOmniClientOperation(argv)
+
+def SendBatchToNucleus(items, token, access_targets=None, on_progress=None):
+    """
+    Pushes several exported objects in one worker call, see --push_batch. Network only, safe to run in a background job.
 
     Args:
-        stplink (str): The Nucleus STP destination URL.
+        items (list): Dicts with 'name', 'stp_url', 'stp_file', 'usd_url' and 'mesh_file'.
+        access_targets (list, optional): (link, filetype, secondary) tuples whose permission is stale.
+            If given, the worker checks access to every destination before uploading, in the same call,
+            and the permissions it finds are stored like those of GetAuthCheckBatch.
+        on_progress (callable, optional): Called with a short text each time a file of the batch is done.
+
+    Returns:
+        tuple: (records, stderr_output, payload or None)
+    """
+    batch_file = os.path.join(GetLocalDirectoryName(), f'{token}push_batch.json')
+    with open(batch_file, 'w') as f:
+        json.dump({'items': items}, f)
+    argv = ['--push_batch', '--batch_file', batch_file, '--token', token, '--max_uploads', str(BATCH_MAX_UPLOADS)]
+    if access_targets:
+        argv.append('--check_access')
+    records, stderr = RunOmniClientOperation(argv, on_progress)
+    payload = GetResultPayload(records, 'push_batch')
+
+    if payload and access_targets:
+        access = {entry['url']: entry['permission'] for entry in payload.get('access', [])}
+        for link, filetype, secondary in access_targets:
+            if link in access:
+                SavePermission(access[link], link, filetype=filetype, secondary=secondary)
+    return records, stderr, payload
+
+def GetStaleUploadTargets(targets):
+    """
+    Splits push destinations by their cached permission, without a Nucleus round trip.
+
+    Args:
+        targets (list): (link, filetype, secondary) tuples. Empty links are skipped.
+
+    Returns:
+        tuple: (allowed, stale) where allowed lists the links that may be pushed to, including the
+        stale ones, and stale lists the targets the worker has to check before uploading
+    """
+    allowed, stale = [], []
+    for link, filetype, secondary in targets:
+        if not link:
+            continue
+        if IsPermissionStale(link):
+            stale.append((link, filetype, secondary))
+            allowed.append(link)
+        elif GetUploadPermissionError(link, filetype=filetype, secondary=secondary) is None:
+            allowed.append(link)
+    return allowed, stale
+
+def UploadUSDToNucleus(usdlink, selected_object, token, secondary=False, overwrite_history=False):
+    """
+    Uploads the tessellation of an object to a Nucleus USD location.
+
+    Args:
+        usdlink (str): Nucleus USD URL (primary or secondary depending on 'secondary').
         selected_object (FreeCAD object): The object to export and upload.
         token (str): Unique identifier for the upload session.
-        custom_checkpoint (str, optional): A string to tag this upload with a custom label.
-        secondary (bool): Use secondary permission rules if True.
+        secondary (bool): Whether this is a secondary (fallback) USD location.
+        overwrite_history (bool): If True, creates a fresh USd with zero version history
 
     Returns:
-        tuple: (stdout_output, stderr_output)
+        tuple: (records, stderr_output)
     """
+    # Get permissions for primary or secondary USD
+    permission_error = GetUploadPermissionError(usdlink, filetype='usd', secondary=secondary)
+    if permission_error:
+        return [permission_error], ''
 
-    permission = GetCurrentSTPPermissions(secondary=secondary)
+    mesh_path = ExportMeshForUpload(selected_object, token)
+    return SendUSDToNucleus(usdlink, token, overwrite_history=overwrite_history, mesh_path=mesh_path)
 
-    if permission == 'NO_ACCESS':
-        print(f'[ERROR] NO_PERMISSION: Cannot access STP file: {stplink}')
-        print('[ERROR] You do not have permissions to access this file! Contact your Nucleus administrator.')
-        return 'FAIL', 'NO_PERMISSION'
-
-    if permission is None:
-        print(f'[ERROR] PERMISSION_NOT_FOUND: Cannot access STP file: {stplink}')
-        print('[ERROR] You have not entered a valid Nucleus link.')
-        return 'FAIL', 'PERMISSION_NOT_FOUND'
 
-    if permission != 'OK_ACCESS':
-        return 'FAIL', 'UNKNOWN_PERMISSION_STATUS'
+def ExportSTPForUpload(selected_object, token):
+    """
+    Exports an object to a local STEP file for upload. Must run on the main thread.
 
-    # Setup paths
-    script_dir = GetFetcherScriptsDirectory().replace(" ", "` ")
-    batch_file = GetBatchFileName()
-    batch_path = os.path.join(script_dir, batch_file)
-    local_dir = GetLocalDirectoryName()
-    stp_filename = f'{token}upload.stp'
-    stp_path = os.path.join(local_dir, stp_filename)
+    Returns:
+        str: Path of the exported STEP file.
+    """
+    stp_path = os.path.join(GetLocalDirectoryName(), f'{token}upload.stp')
 
     print('Unique version identifier:', token)
     print('local_STP_filepath:', stp_path)
 
-    # Export to .stp
     Import.export([selected_object], stp_path)
+    return stp_path
 
-    # Build command
-    cmd = (
-        f'{batch_path} --nucleus_url {stplink} '
-        f'--local_non_usd_filename {stp_path.replace(" ", "` ")} '
-        f'--push_non_usd --token {token}'
-    )
+def SendSTPToNucleus(stplink, stp_path, token, custom_checkpoint=None):
+    """
+    Writes a local STEP file to Nucleus. Network only, safe to run in a background job.
 
+    Returns:
+        tuple: (records, stderr_output)
+    """
+    argv = ['--nucleus_url', stplink, '--local_non_usd_filename', stp_path, '--push_non_usd', '--token', token]
     if custom_checkpoint:
-        checkpoint_escaped = f'"{custom_checkpoint}"'
-        cmd += f' --custom_checkpoint {checkpoint_escaped}'
+        argv += ['--custom_checkpoint', custom_checkpoint]
+
+    return RunOmniClientOperation(argv)
+
+def UploadSTPToNucleus(stplink, selected_object, token, custom_checkpoint=None, secondary=False):
+    """
+    Uploads a STEP file to Nucleus using the batch uploader.
 
-    print(f'[CMD] {cmd}')
+    Args:
+        stplink (str): The Nucleus STP destination URL.
+        selected_object (FreeCAD object): The object to export and upload.
+        token (str): Unique identifier for the upload session.
+        custom_checkpoint (str, optional): A string to tag this upload with a custom label.
+        secondary (bool): Use secondary permission rules if True.
 
-    process = subprocess.Popen(
-        ['powershell', cmd],
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    stdout, stderr = process.communicate()
-    return stdout.decode('utf-8'), stderr.decode('utf-8')
+    Returns:
+        tuple: (records, stderr_output)
+    """
+    permission_error = GetUploadPermissionError(stplink, filetype='stp', secondary=secondary)
+    if permission_error:
+        return [permission_error], ''
+
+    stp_path = ExportSTPForUpload(selected_object, token)
+    return SendSTPToNucleus(stplink, stp_path, token, custom_checkpoint=custom_checkpoint)
 
 
 def GetAuthCheck(usdlink, filetype='usd', secondary=False):
     """
     Calls a nucleus instance and checks if the user has valid permissions.
+
+    Returns:
+        tuple: (records, stderr_output, permission)
     """
-    error_codes = {'NO_PERMISSION', 'NOT_FOUND', 'NO_AUTH'}
     print(f'Validating connection with {usdlink}')
 
-    batchfilepath = os.path.join(
-        GetFetcherScriptsDirectory().replace(" ", "` "),
-        GetBatchFileName()
-    )
     auth_flag = '--auth_project' if filetype == 'project' else '--auth'
-    cmd = f'{batchfilepath} --nucleus_url {usdlink} {auth_flag}'
+    records, stderr_output = RunOmniClientOperation(['--nucleus_url', usdlink, auth_flag])
 
-    process = subprocess.Popen(
-        ['powershell', cmd],
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    stdout, stderr = process.communicate()
-    stdout_lines = stdout.decode('utf-8').split('\r\n')
-    stderr_output = stderr.decode('utf-8')
+    payload = GetResultPayload(records)
+    no_access = GetErrorRecords(records) or payload is None
+    permission = 'NO_ACCESS' if no_access else payload.get('permission', 'OK_ACCESS')
 
-    no_access = sum(1 for line in stdout_lines if any(code in line for code in error_codes))
-    permission = 'OK_ACCESS' if no_access == 0 else 'NO_ACCESS'
+    SavePermission(permission, usdlink, filetype=filetype, secondary=secondary)
 
-    save_functions = {
-        ('usd', False): SaveUSDPermissionsAsTextFile,
-        ('stp', False): SaveSTPPermissionsAsTextFile,
-        ('project', False): SaveProjectPermissionsAsTextFile,
-        ('usd', True): SaveSecondaryUSDPermissionsAsTextFile,
-        ('stp', True): SaveSecondarySTPPermissionsAsTextFile
-    }
+    print('[ERRORS]', stderr_output)
+    return records, stderr_output, permission
 
-    save_func = save_functions.get((filetype, secondary))
-    if save_func:
-        save_func(permission)
+def GetAuthCheckBatch(targets):
+    """
+    Checks permissions for several Nucleus links in a single round trip.
 
-    print('[ERRORS]', stderr_output)
-    return stdout_lines, stderr_output, permission
+    Args:
+        targets (list): (link, filetype, secondary) tuples, e.g. the STP and USD link of an asset.
 
-def DownloadSTPFromNucleus(stplink, token, custom_checkpoint=None):
+    Returns:
+        tuple: (records, stderr_output, permissions) where permissions maps each link to 'OK_ACCESS' or 'NO_ACCESS'
     """
-    Downloads a STEP (.stp) file from Nucleus and inserts it into the active FreeCAD document.
+    targets = [(link, filetype, secondary) for link, filetype, secondary in targets if link]
+    if not targets:
+        return [], '', {}
+    links = [link for link, _, _ in targets]
+    print(f'Validating connection with {", ".join(links)}')
+
+    records, stderr_output = RunOmniClientOperation(['--auth_batch', '--auth_urls'] + links)
+
+    payload = GetResultPayload(records, 'auth_batch')
+    results = {entry['url']: entry for entry in payload['results']} if payload else {}
+    permissions = {}
+    for link, filetype, secondary in targets:
+        entry = results.get(link)
+        permission = entry['permission'] if entry else 'NO_ACCESS'
+        if entry and entry['code'] != 'OK':
+            print(f"[ERROR] {entry['code']}: {entry['message']}")
+        SavePermission(permission, link, filetype=filetype, secondary=secondary)
+        permissions[link] = permission
+
+    return records, stderr_output, permissions
+
+def FetchSTPFromNucleus(stplink, token, custom_checkpoint=None, on_progress=None):
+    """
+    Downloads a STEP (.stp) file from Nucleus into the session directory. Network only, safe to run in a background job.
+    on_progress, if given, is called with a short text as the download goes on.
+
+    Returns:
+        tuple: (records, stderr_output, local STEP path or None)
     """
-    imported_object, fc_err = None, None
-    permission = GetCurrentSTPPermissions()
+    permission = EnsureFreshPermission(stplink, filetype='stp')
     print(f'File permission: {permission}')
 
     if permission != 'OK_ACCESS':
         err_map = {
-            'NO_ACCESS': '[ERROR] NO_PERMISSION',
-            None: '[ERROR] PERMISSION_NOT_FOUND'
+            'NO_ACCESS': 'NO_PERMISSION',
+            None: 'PERMISSION_NOT_FOUND'
         }
-        fc_err = f"{err_map.get(permission, '[ERROR] UNKNOWN')} : Cannot access STP file: {stplink}"
-        print(fc_err)
-        return False, None, 'FAIL', err_map.get(permission, 'UNKNOWN'), fc_err
+        error_record = MakeErrorRecord('pull_non_usd', err_map.get(permission, 'UNKNOWN'), f'Cannot access STP file: {stplink}')
+        print(FormatErrorRecord(error_record))
+        return [error_record], '', None
 
-    batch_path = os.path.join(GetFetcherScriptsDirectory().replace(" ", "` "), GetBatchFileName())
     local_dir = GetLocalDirectoryName()
     stp_path = os.path.join(local_dir, f'{token}download.stp')
 
-    cmd = (
-        f'{batch_path} --nucleus_url {stplink} --pull_non_usd '
-        f'--local_non_usd_filename {stp_path.replace(" ", "` ")} --token {token}'
-    )
+    argv = ['--nucleus_url', stplink, '--pull_non_usd', '--local_non_usd_filename', stp_path, '--token', token]
+    if DOWNLOAD_CACHE_MAX_MB > 0:
+        argv += ['--cache_dir', os.path.join(GetCacheDirectoryName(), 'stp'), '--cache_max_mb', str(DOWNLOAD_CACHE_MAX_MB)]
     if custom_checkpoint:
-        cmd += f' --custom_checkpoint "{custom_checkpoint}"'
-    print(f'[CMD] {cmd}')
+        argv += ['--custom_checkpoint', custom_checkpoint]
 
-    p = subprocess.Popen(['powershell', cmd], shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = p.communicate()
-    stdout, stderr = stdout.decode(), stderr.decode()
+    records, stderr = RunOmniClientOperation(argv, on_progress)
+    payload = GetResultPayload(records, 'pull_non_usd')
+    if payload and payload.get('cached'):
+        print(f'[INFO] {stplink} is unchanged on Nucleus, using the cached copy')
+    return records, stderr, stp_path
 
-    if os.path.exists(stp_path) and not check_file_isempty(stp_path):
+def FetchSTPBatchFromNucleus(stplinks, token, custom_checkpoint=None, on_progress=None):
+    """
+    Downloads several STEP files from Nucleus concurrently in one worker call, see --pull_batch.
+    Network only, safe to run in a background job. on_progress, if given, is called with a short text each time a file is done.
+
+    Returns:
+        dict: Each link mapped to (records, stderr_output, local STEP path or None), as FetchSTPFromNucleus returns for one link
+    """
+    local_dir = GetLocalDirectoryName()
+    fetched = {}
+    items, stale = [], []
+    for index, stplink in enumerate(dict.fromkeys(link for link in stplinks if link)):
+        # Links whose permission has expired are checked by the worker in the same call
+        if IsPermissionStale(stplink):
+            stale.append(stplink)
+        elif GetPermissionForURL(stplink) != 'OK_ACCESS':
+            error_record = MakeErrorRecord('pull_non_usd', 'NO_PERMISSION', f'Cannot access STP file: {stplink}')
+            print(FormatErrorRecord(error_record))
+            fetched[stplink] = ([error_record], '', None)
+            continue
+        items.append({'url': stplink, 'local_filename': os.path.join(local_dir, f'{token}_{index}download.stp')})
+    if not items:
+        return fetched
+
+    batch_file = os.path.join(local_dir, f'{token}pull_batch.json')
+    with open(batch_file, 'w') as f:
+        json.dump({'items': items}, f)
+    argv = ['--pull_batch', '--batch_file', batch_file, '--token', token, '--max_uploads', str(BATCH_MAX_UPLOADS)]
+    if stale:
+        argv.append('--check_access')
+    if DOWNLOAD_CACHE_MAX_MB > 0:
+        argv += ['--cache_dir', os.path.join(GetCacheDirectoryName(), 'stp'), '--cache_max_mb', str(DOWNLOAD_CACHE_MAX_MB)]
+    if custom_checkpoint:
+        argv += ['--custom_checkpoint', custom_checkpoint]
+    records, stderr = RunOmniClientOperation(argv, on_progress)
+    payload = GetResultPayload(records, 'pull_batch')
+    if payload is None:
+        for item in items:
+            fetched[item['url']] = (records, stderr, None)
+        return fetched
+
+    for entry in payload.get('access', []):
+        SavePermission(entry['permission'], entry['url'], filetype='stp')
+    for item, status in zip(items, payload['items']):
+        # Per-file records in the shape of a single --pull_non_usd, so InsertSTPIntoDocument can read them
+        if status['result']:
+            item_records = [{'type': 'result', 'op': 'pull_non_usd', 'code': 'OK', 'payload': status['result']}]
+            fetched[item['url']] = (item_records, '', item['local_filename'])
+        else:
+            item_records = [MakeErrorRecord('pull_non_usd', error, f"Cannot pull {item['url']}") for error in status['errors']]
+            fetched[item['url']] = (item_records, '', None)
+    print(f"[INFO] Pulled {payload['pulled']} of {len(items)} STEP files, {payload['bytes'] / 1e6:.2f} MB downloaded in {payload['seconds']:.1f} s")
+    return fetched
+
+def InsertSTPIntoDocument(stp_path, records):
+    """
+    Inserts a STEP file fetched by FetchSTPFromNucleus into the active document. Must run on the main thread.
+
+    If the same STEP data was imported before, the shape is read from the BREP cache instead of parsing the STEP file again.
+
+    Returns:
+        tuple: (success, imported_object, fc_err)
+    """
+    if stp_path and os.path.exists(stp_path) and not check_file_isempty(stp_path):
+        payload = GetResultPayload(records, 'pull_non_usd')
+        step_hash = payload.get('content_hash') if payload and BREP_CACHE_MAX_MB > 0 else None
+        if step_hash:
+            imported_object = InsertCachedBrep(step_hash)
+            if imported_object is not None:
+                return True, imported_object, None
         imported_object= Import.insert(stp_path, FreeCAD.ActiveDocument.Name, useLinkGroup=True, merge=False)
         imported_object = imported_object[0][0]
-        return True, imported_object, stdout, stderr, None
-
-    fc_err = '[ERROR] EMPTY_ASSET: Placeholder or failed download.' if os.path.exists(stp_path) else '[ERROR] DLOAD_FAIL: STP download failed!'
+        if step_hash:
+            SaveBrepToCache(imported_object, step_hash)
+        return True, imported_object, None
+
+    errors = GetErrorRecords(records)
+    if errors:
+        fc_err = FormatErrorRecord(errors[0])
+    elif stp_path and os.path.exists(stp_path):
+        fc_err = '[ERROR] EMPTY_ASSET: Placeholder or failed download.'
+    else:
+        fc_err = '[ERROR] DLOAD_FAIL: STP download failed!'
     print(fc_err)
-    return False, None, stdout, stderr, fc_err
+    return False, None, fc_err
+
+def GetBrepCachePath(step_hash):
+    return os.path.join(GetCacheDirectoryName(), 'brep', f'{step_hash}.brep')
+
+def InsertCachedBrep(step_hash):
+    """
+    Adds the shape cached for some STEP data to the active document as a Part feature. Must run on the main thread.
+
+    Returns:
+        The new object, or None if nothing is cached for step_hash.
+    """
+    brep_path = GetBrepCachePath(step_hash)
+    if not os.path.isfile(brep_path):
+        return None
+    shape = Part.Shape()
+    try:
+        shape.read(brep_path)
+    except Exception as e:
+        print(f'[WARN] Could not read cached shape {brep_path}: {e}')
+        return None
+    # Refresh the modification time, which is what PruneCacheDirectory evicts by
+    os.utime(brep_path)
+    print(f'[INFO] STEP data unchanged since it was last imported, using cached shape {brep_path}')
+    imported_object = FreeCAD.ActiveDocument.addObject('Part::Feature', 'Imported')
+    imported_object.Shape = shape
+    FreeCAD.ActiveDocument.recompute()
+    return imported_object
+
+def SaveBrepToCache(imported_object, step_hash):
+    # Keeps the shape of an imported STEP file so the next import of the same data can skip the STEP parser
+    shape = Part.getShape(imported_object)
+    if shape.isNull():
+        return
+    brep_path = GetBrepCachePath(step_hash)
+    os.makedirs(os.path.dirname(brep_path), exist_ok=True)
+    tmp_path = brep_path + '.tmp'
+    try:
+        shape.exportBrep(tmp_path)
+        os.replace(tmp_path, brep_path)
+    except Exception as e:
+        print(f'[WARN] Could not cache shape of {imported_object.Label}: {e}')
+        return
+    PruneCacheDirectory(os.path.dirname(brep_path), BREP_CACHE_MAX_MB * 1024 ** 2)
+
+def PruneCacheDirectory(directory, max_bytes):
+    # Removes the least recently used files until the directory fits in max_bytes
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            stat_result = os.stat(path)
+            entries.append((stat_result.st_mtime, stat_result.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def DownloadSTPFromNucleus(stplink, token, custom_checkpoint=None):
+    """
+    Downloads a STEP (.stp) file from Nucleus and inserts it into the active FreeCAD document.
+
+    Returns:
+        tuple: (success, imported_object, records, stderr_output, fc_err)
+    """
+    records, stderr, stp_path = FetchSTPFromNucleus(stplink, token, custom_checkpoint=custom_checkpoint)
+    ok, imported_object, fc_err = InsertSTPIntoDocument(stp_path, records)
+    return ok, imported_object, records, stderr, fc_err
 
 
 def GetFetcherScriptsDirectory():
@@ -293,6 +1025,13 @@ def GetLocalDirectoryName():
         os.makedirs(local_directory)
     return local_directory
 
+def GetCacheDirectoryName():
+    # Downloaded files are cached outside session_local, so ClearLocalDirectory keeps them
+    workbench_path = os.path.dirname(os.path.realpath(__file__))
+    cache_directory = os.path.join(workbench_path, 'session_cache')
+    os.makedirs(cache_directory, exist_ok=True)
+    return cache_directory
+
 def GetBatchFileName(live=False):
     if live == False:
         batchfilename = "run_py_omni_client.bat"
@@ -303,6 +1042,9 @@ def GetBatchFileName(live=False):
 def ClearLocalDirectory():
     folder = GetLocalDirectoryName()
     for filename in os.listdir(folder):
+        if filename == STATE_FILENAME:
+            # Cleared below in a single atomic write
+            continue
         file_path = os.path.join(folder, filename)
         try:
             if os.path.isfile(file_path) or os.path.islink(file_path):
@@ -311,291 +1053,123 @@ def ClearLocalDirectory():
                 shutil.rmtree(file_path)
         except Exception as e:
             print('[ERROR] Failed to delete %s. Reason: %s' % (file_path, e))
+    GetState().clear()
 
+def GetState():
+    # Links, permissions and asset lists live in memory, see session_state.py
+    return GetSessionState(GetLocalDirectoryName())
+
+# The Save*AsTextFile helpers are named after the text files earlier versions wrote. They now store
+# the value in the session state; the names are kept because the panels and user macros call them.
+# Each link and permission has its own FreeCAD.OV_* attribute, mirroring its session state key.
 def SaveUSDLinkAsTextFile(usdlink):
-    local_directory = GetLocalDirectoryName()
     FreeCAD.OV_link_usd = clean_omniverse_path(str(usdlink))
-    textfile_name = os.path.join(local_directory, 'usdlink.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(usdlink)
+    GetState().set_link('usd', usdlink)
 
 def SaveSecondaryUSDLinkAsTextFile(usdlink):
-    local_directory = GetLocalDirectoryName()
-    FreeCAD.OV_link_usd = clean_omniverse_path(str(usdlink))
-    textfile_name = os.path.join(local_directory, 'secondary_usdlink.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(usdlink)
+    FreeCAD.OV_link_secondary_usd = clean_omniverse_path(str(usdlink))
+    GetState().set_link('secondary_usd', usdlink)
 
 def SaveLastProjectLinkAsTextFile(usdlink):
-    local_directory = GetLocalDirectoryName()
-    FreeCAD.OV_link_project= clean_omniverse_path(str(usdlink))
-    textfile_name = os.path.join(local_directory, 'last_projectlink.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(usdlink)
+    FreeCAD.OV_link_last_project = clean_omniverse_path(str(usdlink))
+    GetState().set_link('last_project', usdlink)
 
 def SaveProjectLinkAsTextFile(usdlink):
-    local_directory = GetLocalDirectoryName()
     FreeCAD.OV_link_project= clean_omniverse_path(str(usdlink))
-    textfile_name = os.path.join(local_directory, 'projectlink.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(usdlink)
+    GetState().set_link('project', usdlink)
 
 def SaveSTPLinkAsTextFile(stplink):
-    local_directory = GetLocalDirectoryName()
     FreeCAD.OV_link_stp = clean_omniverse_path(str(stplink))
-    textfile_name = os.path.join(local_directory, 'stplink.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(stplink)
+    GetState().set_link('stp', stplink)
 
 def SaveSecondarySTPLinkAsTextFile(stplink):
-    local_directory = GetLocalDirectoryName()
-    FreeCAD.OV_link_stp = clean_omniverse_path(str(stplink))
-    textfile_name = os.path.join(local_directory, 'secondary_stplink.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(stplink)
+    FreeCAD.OV_link_secondary_stp = clean_omniverse_path(str(stplink))
+    GetState().set_link('secondary_stp', stplink)
 
-def SaveUSDPermissionsAsTextFile(permission):
-    local_directory = GetLocalDirectoryName()
+def SaveUSDPermissionsAsTextFile(permission, url=None):
     FreeCAD.OV_permission_usd =permission
-    textfile_name = os.path.join(local_directory, 'usd_permission.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(permission)
+    GetState().set_permission(url or GetCurrentUSDLinkNoPrint(), permission)
 
-def SaveSecondaryUSDPermissionsAsTextFile(permission):
-    local_directory = GetLocalDirectoryName()
-    FreeCAD.OV_permission_usd =permission
-    textfile_name = os.path.join(local_directory, 'secondary_usd_permission.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(permission)
+def SaveSecondaryUSDPermissionsAsTextFile(permission, url=None):
+    FreeCAD.OV_permission_secondary_usd =permission
+    GetState().set_permission(url or GetCurrentUSDLinkNoPrint(secondary=True), permission)
 
-def SaveProjectPermissionsAsTextFile(permission):
-    local_directory = GetLocalDirectoryName()
+def SaveProjectPermissionsAsTextFile(permission, url=None):
     FreeCAD.OV_permission_project =permission
-    textfile_name = os.path.join(local_directory, 'project_permission.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(permission)
+    GetState().set_permission(url or GetCurrentProjectLinkNoPrint(), permission)
 
-def SaveSTPPermissionsAsTextFile(permission):
-    local_directory = GetLocalDirectoryName()
+def SaveSTPPermissionsAsTextFile(permission, url=None):
     FreeCAD.OV_permission_stp =permission
-    textfile_name = os.path.join(local_directory, 'stp_permission.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(permission)
+    GetState().set_permission(url or GetCurrentSTPLinkNoPrint(), permission)
 
-def SaveSecondarySTPPermissionsAsTextFile(permission):
-    local_directory = GetLocalDirectoryName()
-    FreeCAD.OV_permission_stp =permission
-    textfile_name = os.path.join(local_directory, 'secondary_stp_permission.txt')
-    with open(textfile_name, 'w') as f:
-        f.write(permission)
+def SaveSecondarySTPPermissionsAsTextFile(permission, url=None):
+    FreeCAD.OV_permission_secondary_stp =permission
+    GetState().set_permission(url or GetCurrentSTPLinkNoPrint(secondary=True), permission)
+
+def SavePermission(permission, url, filetype='usd', secondary=False):
+    save_functions = {
+        ('usd', False): SaveUSDPermissionsAsTextFile,
+        ('stp', False): SaveSTPPermissionsAsTextFile,
+        ('project', False): SaveProjectPermissionsAsTextFile,
+        ('usd', True): SaveSecondaryUSDPermissionsAsTextFile,
+        ('stp', True): SaveSecondarySTPPermissionsAsTextFile
+    }
+
+    save_func = save_functions.get((filetype, secondary))
+    if save_func:
+        save_func(permission, url=url)
 
 def delete_project_link():
-    local_directory = GetLocalDirectoryName()
-    textfile_name = os.path.join(local_directory, 'projectlink.txt')
-    try:
-        os.remove(textfile_name)
-    except FileNotFoundError:
-        # print(f"The file '{textfile_name}' does not exist.")
-        pass
-    except PermissionError:
-        # print(f"Permission denied. Unable to delete the file '{textfile_name}'.")
-        pass
-    except Exception as e:
-        print(f"An error occurred while deleting the file '{textfile_name}': {str(e)}")
+    GetState().delete_links('project')
 
 def delete_asset_localdata():
-    local_directory = GetLocalDirectoryName()
-    textfile_names = [
-        os.path.join(local_directory, 'usdlink.txt'),
-        os.path.join(local_directory, 'usd_permission.txt'),
-        os.path.join(local_directory, 'stplink.txt'),
-        os.path.join(local_directory, 'stp_permission.txt'),
-        os.path.join(local_directory, 'secondary_usd_permission.txt'),
-        os.path.join(local_directory, 'secondary_stp_permission.txt'),
-        os.path.join(local_directory, 'secondary_usdlink.txt'),
-        os.path.join(local_directory, 'secondary_stplink.txt'),
-    ]
-    
-    for asset_data in textfile_names:
-        try:
-            os.remove(asset_data)
-        except FileNotFoundError:
-            # print(f"The file '{asset_data}' does not exist.")
-            pass
-        except PermissionError:
-            # print(f"Permission denied. Unable to delete the file '{asset_data}'.")
-            pass
-        except Exception as e:
-            print(f"An error occurred while deleting the file '{asset_data}': {str(e)}")
+    # One write for all four links, so a crash never leaves a USD link without its STP link
+    GetState().delete_links('usd', 'stp', 'secondary_usd', 'secondary_stp')
+
+def SaveAssetLists(stp_urls, usd_urls):
+    GetState().set_asset_lists(stp_urls, usd_urls)
+
+def GetPermissionForURL(url):
+    return GetState().get_permission(url)
+
+def IsPermissionStale(url):
+    return GetState().is_permission_stale(url)
+
+def EnsureFreshPermission(url, filetype='usd', secondary=False):
+    """
+    Returns the permission for a URL, checking it against Nucleus first if it is missing or older than PERMISSION_TTL.
+    Makes a Nucleus round trip when stale, so call it from a background job.
+    """
+    if url and IsPermissionStale(url):
+        GetAuthCheck(url, filetype=filetype, secondary=secondary)
+    return GetPermissionForURL(url)
 
 def GetCurrentUSDPermissions(secondary=False):
-    if secondary==False:
-        try:
-            local_directory = GetLocalDirectoryName()
-            textfile_name = os.path.join(local_directory, 'usd_permission.txt')
-            with open(textfile_name) as f:
-                lines = f.readlines()
-            if len(lines) != 0:
-                permission = lines[0]
-            else:
-                permission=None
-            return permission
-        except IOError:
-            return None
-    elif secondary == True:
-        try:
-            local_directory = GetLocalDirectoryName()
-            textfile_name = os.path.join(local_directory, 'secondary_usd_permission.txt')
-            with open(textfile_name) as f:
-                lines = f.readlines()
-            if len(lines) != 0:
-                permission = lines[0]
-            else:
-                permission=None
-            return permission
-        except IOError:
-            return None
+    return GetPermissionForURL(GetCurrentUSDLinkNoPrint(secondary=secondary))
 
 def GetCurrentProjectPermissions():
-    try:
-        local_directory = GetLocalDirectoryName()
-        textfile_name = os.path.join(local_directory, 'project_permission.txt')
-        with open(textfile_name) as f:
-            lines = f.readlines()
-        if len(lines) != 0:
-            permission = lines[0]
-        else:
-            permission=None
-        return permission
-    except IOError:
-        return None
+    return GetPermissionForURL(GetCurrentProjectLinkNoPrint())
 
 def GetCurrentSTPPermissions(secondary=False):
-    if secondary==False:
-        try:
-            local_directory = GetLocalDirectoryName()
-            textfile_name = os.path.join(local_directory, 'stp_permission.txt')
-            with open(textfile_name) as f:
-                lines = f.readlines()
-            if len(lines) != 0:
-                permission = lines[0]
-            else:
-                permission=None
-            return permission
-        except IOError:
-            return None
-    elif secondary == True:
-        try:
-            local_directory = GetLocalDirectoryName()
-            textfile_name = os.path.join(local_directory, 'secondary_stp_permission.txt')
-            with open(textfile_name) as f:
-                lines = f.readlines()
-            if len(lines) != 0:
-                permission = lines[0]
-            else:
-                permission=None
-            return permission
-        except IOError:
-            return None
+    return GetPermissionForURL(GetCurrentSTPLinkNoPrint(secondary=secondary))
 
 def GetCurrentUSDLink():
-    try:
-        local_directory = GetLocalDirectoryName()
-        textfile_name = os.path.join(local_directory, 'usdlink.txt')
-        with open(textfile_name) as f:
-            lines = f.readlines()
-        if len(lines) != 0:
-            usdlink = lines[0]
-        else:
-            usdlink=None
-            print('[ERROR] No USD link specified! Check whether you have inputted your USD link.')
-        return usdlink
-    except IOError:
+    usdlink = GetState().get_link('usd')
+    if usdlink is None:
         print('[ERROR] USD link not found! Check whether you have inputted your USD link.')
+    return usdlink
 
 def GetCurrentUSDLinkNoPrint(secondary=False):
-    if secondary == False:
-        try:
-            local_directory = GetLocalDirectoryName()
-            textfile_name = os.path.join(local_directory, 'usdlink.txt')
-            with open(textfile_name) as f:
-                lines = f.readlines()
-            if len(lines) != 0:
-                usdlink = lines[0]
-            else:
-                usdlink=None
-            return usdlink
-        except IOError:
-            return None
-    else:
-        try:
-            local_directory = GetLocalDirectoryName()
-            textfile_name = os.path.join(local_directory, 'secondary_usdlink.txt')
-            with open(textfile_name) as f:
-                lines = f.readlines()
-            if len(lines) != 0:
-                usdlink = lines[0]
-            else:
-                usdlink=None
-            return usdlink
-        except IOError:
-            return None 
+    return GetState().get_link('secondary_usd' if secondary else 'usd')
 
 def GetCurrentProjectLinkNoPrint():
-    try:
-        local_directory = GetLocalDirectoryName()
-        textfile_name = os.path.join(local_directory, 'projectlink.txt')
-        with open(textfile_name) as f:
-            lines = f.readlines()
-        if len(lines) != 0:
-            usdlink = lines[0]
-        else:
-            usdlink=None
-        return usdlink
-    except IOError:
-        return None
+    return GetState().get_link('project')
 
 def GetLastProjectLinkNoPrint():
-    try:
-        local_directory = GetLocalDirectoryName()
-        textfile_name = os.path.join(local_directory, 'last_projectlink.txt')
-        with open(textfile_name) as f:
-            lines = f.readlines()
-        if len(lines) != 0:
-            usdlink = lines[0]
-        else:
-            usdlink=None
-        return usdlink
-    except IOError:
-        return None
+    return GetState().get_link('last_project')
 
 def GetCurrentSTPLinkNoPrint(secondary=False):
-    if secondary == False:
-        try:
-            local_directory = GetLocalDirectoryName()
-            textfile_name = os.path.join(local_directory, 'stplink.txt')
-            with open(textfile_name) as f:
-                lines = f.readlines()
-            if len(lines) != 0:
-                usdlink = lines[0]
-            else:
-                usdlink=None
-            return usdlink
-        except IOError:
-            return None
-    else:
-        try:
-            local_directory = GetLocalDirectoryName()
-            textfile_name = os.path.join(local_directory, 'secondary_stplink.txt')
-            with open(textfile_name) as f:
-                lines = f.readlines()
-            if len(lines) != 0:
-                usdlink = lines[0]
-            else:
-                usdlink=None
-            return usdlink
-        except IOError:
-            return None
+    return GetState().get_link('secondary_stp' if secondary else 'stp')
 
 
 
@@ -613,35 +1187,69 @@ def check_file_isempty(file_path):
 
 
 def GetListOfSTPFiles():
-    try:
-        local_directory = GetLocalDirectoryName()
-        textfile_name = os.path.join(local_directory, 'stplist.txt')
-        stp_url_list = []
-        with open(textfile_name) as f:
-            lines = f.readlines()
-        if len(lines) != 0:
-            for entry in lines:
-                stp_url_list.append(entry)
-        else:
-            stp_url_list=None
-        FreeCAD.OV_link_list_stp = stp_url_list
-        return stp_url_list
-    except IOError:
-        return None
+    stp_url_list = GetState().get_asset_list('stp') or None
+    FreeCAD.OV_link_list_stp = stp_url_list
+    return stp_url_list
 
 def GetListOfUSDFiles():
+    usd_url_list = GetState().get_asset_list('usd') or None
+    FreeCAD.OV_link_list_usd = usd_url_list
+    return usd_url_list
+
+def GetProjectIndexPath(project_url):
+    # One index per project in session_cache, so clearing the session keeps it
+    index_directory = os.path.join(GetCacheDirectoryName(), 'project_index')
+    os.makedirs(index_directory, exist_ok=True)
+    return os.path.join(index_directory, hashlib.sha256(project_url.encode('utf-8')).hexdigest()[:32] + '.json')
+
+def ReadProjectIndex(project_url):
+    """
+    Reads the local asset index of a project, see project_index.py in the worker. Does not touch Nucleus.
+
+    Returns:
+        list: Index entries (url, name, type, size, modified_time, checkpoint, ...), or None if the project was never indexed.
+    """
     try:
-        local_directory = GetLocalDirectoryName()
-        textfile_name = os.path.join(local_directory, 'usdlist.txt')
-        usd_url_list = []
-        with open(textfile_name) as f:
-            lines = f.readlines()
-        if len(lines) != 0:
-            for entry in lines:
-                usd_url_list.append(entry)
-        else:
-            usd_url_list=None
-        FreeCAD.OV_link_list_usd = usd_url_list
-        return usd_url_list
-    except IOError:
-        return None
\ No newline at end of file
+        with open(GetProjectIndexPath(project_url)) as f:
+            index = json.load(f)
+    except (IOError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get('project_url') != project_url or not index.get('checked'):
+        return None
+    return index.get('entries', [])
+
+def RefreshProjectIndex(project_url):
+    """
+    Updates the local asset index of a project, listing only the Nucleus folders that changed
+    since the last refresh. Network only, safe to run in a background job.
+
+    Returns:
+        tuple: (records, stderr_output, index entries or None)
+    """
+    records, stderr_output = RunOmniClientOperation(['--nucleus_url', project_url, '--refresh_project_index',
+                                                     '--index_file', GetProjectIndexPath(project_url)])
+    payload = GetResultPayload(records, 'refresh_project_index')
+    if payload is None:
+        PrintResultRecords(records, stderr_output)
+        return records, stderr_output, None
+    entries = ReadProjectIndex(project_url)
+    print(f"[INFO] Project index: {payload['entries']} files, {payload['listed']} folders listed")
+    return records, stderr_output, entries
+
+def ApplyProjectIndex(result):
+    """
+    Stores the asset lists of an index refreshed by RefreshProjectIndex in the session state. Must run on the main thread.
+    """
+    _, _, entries = result
+    if entries is not None:
+        # Kept in step with the index for code that still reads the asset lists
+        SaveAssetLists(*GetAssetListsFromIndex(entries))
+
+def GetAssetListsFromIndex(entries):
+    """
+    Returns:
+        tuple: (STP URLs, USD URLs) of the assets in a project index, in index order.
+    """
+    stp_urls = [entry['url'] for entry in entries if entry['type'] == 'stp']
+    usd_urls = [entry['url'] for entry in entries if entry['type'] == 'usd']
+    return stp_urls, usd_urls
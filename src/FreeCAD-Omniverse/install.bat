@@ -44,6 +44,6 @@ del .\omniConnect\run_hello_world.bat
 
 echo --- Fetching Python dependencies...
 
-.\omniConnect\_build\target-deps\python\python.exe -m pip install open3d aioconsole --quiet
+.\omniConnect\_build\target-deps\python\python.exe -m pip install numpy aioconsole --quiet
 
 echo === INSTALLATION COMPLETE ===
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# Background job runner for the FreeCAD to Omniverse connector workbench
+#
+# Nucleus round trips (push, pull, assembly queries) run on a QThreadPool so the
+# FreeCAD GUI stays responsive. Anything that touches the FreeCAD document must
+# stay on the main thread: jobs only do network work and hand their result to an
+# on_done callback, which Qt delivers back on the main thread.
+
+from PySide2 import QtCore, QtWidgets
+import traceback
+
+JOB_QUEUED = 'Queued'
+JOB_RUNNING = 'Running'
+JOB_CANCELLING = 'Cancelling'
+
+# Nucleus operations share one connectSampleLib worker, so jobs run one at a time in submission order
+MAX_CONCURRENT_JOBS = 1
+
+
+class _JobSignals(QtCore.QObject):
+    # QRunnable is not a QObject, so a job reports back through this helper
+    started = QtCore.Signal(int)
+    finished = QtCore.Signal(int, object)
+    failed = QtCore.Signal(int, str)
+    progress = QtCore.Signal(int, str)
+
+
+class Job(QtCore.QRunnable):
+    """
+    One queued call of a network-only function.
+    """
+    def __init__(self, job_id, label, func, args, kwargs, on_done=None, on_error=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.job_id = job_id
+        self.label = label
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_error = on_error
+        self.state = JOB_QUEUED
+        self.progress = ''
+        self.cancelled = False
+        self.signals = _JobSignals()
+
+    def report_progress(self, text):
+        # Called from the job's thread; the text reaches the job queue through a queued signal
+        self.signals.progress.emit(self.job_id, text)
+
+    def run(self):
+        if self.cancelled:
+            return
+        self.signals.started.emit(self.job_id)
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception:
+            self.signals.failed.emit(self.job_id, traceback.format_exc())
+            return
+        self.signals.finished.emit(self.job_id, result)
+
+
+class JobRunner(QtCore.QObject):
+    """
+    Queues Nucleus operations on a thread pool and applies their results on the main thread.
+
+    Queued jobs can be cancelled outright. A running job cannot be interrupted half way
+    through a Nucleus transfer, so cancelling it only discards its result.
+    """
+    jobs_changed = QtCore.Signal()
+
+    def __init__(self, max_threads=MAX_CONCURRENT_JOBS):
+        super().__init__()
+        self.pool = QtCore.QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self.jobs = {}
+        self.next_job_id = 0
+
+    def submit(self, label, func, *args, on_done=None, on_error=None, report_progress=False, **kwargs):
+        """
+        Queues func(*args, **kwargs) on the thread pool.
+
+        Args:
+            label (str): Text shown in the job queue.
+            func (callable): Function to run. Must not touch the FreeCAD document or any widget.
+            on_done (callable, optional): Called on the main thread with the return value of func.
+            on_error (callable, optional): Called on the main thread with the formatted traceback.
+            report_progress (bool): If True, func is also passed on_progress, a callable taking a short
+                text that is shown next to the job in the queue. It may be called from any thread.
+
+        Returns:
+            int: The job id, usable with cancel().
+        """
+        self.next_job_id += 1
+        job = Job(self.next_job_id, label, func, args, kwargs, on_done, on_error)
+        if report_progress:
+            job.kwargs['on_progress'] = job.report_progress
+        # The signals object lives on the main thread, so these connections are queued
+        job.signals.started.connect(self._on_started)
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        job.signals.progress.connect(self._on_progress)
+        self.jobs[job.job_id] = job
+        print(f'[INFO] Queued job: {label}')
+        self.pool.start(job)
+        self.jobs_changed.emit()
+        return job.job_id
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. Returns True if the job was still queued and will not run at all.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancelled = True
+        if self.pool.tryTake(job):
+            print(f'[INFO] Cancelled job: {job.label}')
+            del self.jobs[job_id]
+            self.jobs_changed.emit()
+            return True
+        print(f'[INFO] Job already running, its result will be discarded: {job.label}')
+        job.state = JOB_CANCELLING
+        self.jobs_changed.emit()
+        return False
+
+    def list_jobs(self):
+        # (job_id, label, state, progress text) for every job that has not finished yet, in submission order
+        return [(job_id, job.label, job.state, job.progress) for job_id, job in sorted(self.jobs.items())]
+
+    def is_busy(self):
+        return bool(self.jobs)
+
+    @QtCore.Slot(int)
+    def _on_started(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None and not job.cancelled:
+            job.state = JOB_RUNNING
+            self.jobs_changed.emit()
+
+    @QtCore.Slot(int, str)
+    def _on_progress(self, job_id, text):
+        job = self.jobs.get(job_id)
+        if job is not None and not job.cancelled:
+            job.progress = text
+            self.jobs_changed.emit()
+
+    @QtCore.Slot(int, object)
+    def _on_finished(self, job_id, result):
+        job = self.jobs.pop(job_id, None)
+        self.jobs_changed.emit()
+        if job is None or job.cancelled:
+            return
+        print(f'[INFO] Finished job: {job.label}')
+        if job.on_done is not None:
+            self._call_safely(job, job.on_done, result)
+
+    @QtCore.Slot(int, str)
+    def _on_failed(self, job_id, error_text):
+        job = self.jobs.pop(job_id, None)
+        self.jobs_changed.emit()
+        if job is None or job.cancelled:
+            return
+        print(f'[ERROR] Job failed: {job.label}')
+        print(error_text)
+        if job.on_error is not None:
+            self._call_safely(job, job.on_error, error_text)
+
+    def _call_safely(self, job, callback, value):
+        # A failing callback must not take the runner down with it
+        try:
+            callback(value)
+        except Exception:
+            print(f'[ERROR] Failed to apply result of job: {job.label}')
+            traceback.print_exc()
+
+
+class JobQueueWidget(QtWidgets.QWidget):
+    """
+    Lists queued and running Nucleus jobs with a button to cancel the selected one.
+    """
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.title = QtWidgets.QLabel(' Nucleus jobs: none')
+        self.job_list = QtWidgets.QListWidget()
+        self.job_list.setMaximumHeight(90)
+        self.cancel_button = QtWidgets.QPushButton('Cancel selected job')
+        self.cancel_button.clicked.connect(self.cancel_selected)
+        for w in [self.title, self.job_list, self.cancel_button]:
+            layout.addWidget(w)
+        runner.jobs_changed.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        jobs = self.runner.list_jobs()
+        # Progress refreshes the list every few seconds, so the selection is carried over
+        current = self.job_list.currentItem()
+        selected_id = current.data(QtCore.Qt.UserRole) if current is not None else None
+        self.job_list.clear()
+        for job_id, label, state, progress in jobs:
+            item = QtWidgets.QListWidgetItem(f'[{state}] {label} - {progress}' if progress else f'[{state}] {label}')
+            item.setData(QtCore.Qt.UserRole, job_id)
+            self.job_list.addItem(item)
+            if job_id == selected_id:
+                self.job_list.setCurrentItem(item)
+        self.title.setText(f' Nucleus jobs: {len(jobs)}' if jobs else ' Nucleus jobs: none')
+        self.job_list.setVisible(bool(jobs))
+        self.cancel_button.setEnabled(bool(jobs))
+
+    def cancel_selected(self):
+        item = self.job_list.currentItem()
+        if item is None and self.job_list.count():
+            item = self.job_list.item(self.job_list.count() - 1)
+        if item is not None:
+            self.runner.cancel(item.data(QtCore.Qt.UserRole))
+
+
+_job_runner = None
+
+def GetJobRunner():
+    # Single runner shared by commands and panels so every Nucleus job shows up in one queue
+    global _job_runner
+    if _job_runner is None:
+        _job_runner = JobRunner()
+    return _job_runner
+
+def SubmitNucleusJob(label, func, *args, on_done=None, on_error=None, report_progress=False, **kwargs):
+    return GetJobRunner().submit(label, func, *args, on_done=on_done, on_error=on_error, report_progress=report_progress, **kwargs)
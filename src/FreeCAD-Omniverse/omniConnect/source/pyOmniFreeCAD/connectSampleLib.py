@@ -23,17 +23,31 @@
 #
 ###############################################################################
 
+# Annotations that name pxr types must not trigger the deferred pxr import
+from __future__ import annotations
+
+# Imported first so the import report can measure from process start
+from lazy_import import LazyModule, import_timer, preload, print_import_report
+
 # Python built-in
 import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
 import logging
 import math
 import os
+import socket
 import sys
+import threading
 import time
+import traceback
 import re
+import shutil
 
-import open3d as o3d
-import numpy as np
+# Only the mesh operations need these, so they are imported on first use
+np = LazyModule("numpy")
 
 # Python 3.8 - can't use PATH any longer
 if hasattr(os, "add_dll_directory"):
@@ -41,18 +55,57 @@ if hasattr(os, "add_dll_directory"):
     dlldir = os.path.abspath(os.path.join(scriptdir, "../../_build/windows-x86_64/release")) 
     os.add_dll_directory(dlldir)
 
-# USD imports
-from pxr import Gf, Kind, Sdf, Tf, Usd, UsdLux, UsdGeom, UsdPhysics, UsdShade, UsdUtils, Ar
-
 # Omni imports
-import omni.client
-import omni.usd_resolver
+with import_timer("omni.client"):
+    import omni.client
+usd_resolver = LazyModule("omni.usd_resolver")
+
+# USD imports, deferred until an operation opens a stage. The Omniverse resolver is loaded alongside them.
+Gf = LazyModule("pxr.Gf", companions=(usd_resolver,))
+Kind = LazyModule("pxr.Kind", companions=(usd_resolver,))
+Sdf = LazyModule("pxr.Sdf", companions=(usd_resolver,))
+Tf = LazyModule("pxr.Tf", companions=(usd_resolver,))
+Usd = LazyModule("pxr.Usd", companions=(usd_resolver,))
+UsdLux = LazyModule("pxr.UsdLux", companions=(usd_resolver,))
+UsdGeom = LazyModule("pxr.UsdGeom", companions=(usd_resolver,))
+UsdPhysics = LazyModule("pxr.UsdPhysics", companions=(usd_resolver,))
+UsdShade = LazyModule("pxr.UsdShade", companions=(usd_resolver,))
+UsdUtils = LazyModule("pxr.UsdUtils", companions=(usd_resolver,))
+Ar = LazyModule("pxr.Ar", companions=(usd_resolver,))
+Vt = LazyModule("pxr.Vt", companions=(usd_resolver,))
 
 # Internal imports
-import log, xform_utils, get_char_util
+with import_timer("log"):
+    import log, get_char_util, content_hash, download_cache, project_scan, project_index
+xform_utils = LazyModule("xform_utils")
+mesh_utils = LazyModule("mesh_utils")
+from result_records import emit_record, emit_result, emit_progress, emit_error, fail, log_message, RECORD_READY, RECORD_PROGRESS
 
 g_connection_status_subscription = None
 g_stage = None
+logging_enabled = False
+# Set while answering requests with --serve; project index subscriptions only outlive a request then
+g_serving = False
+
+# Worker mode: shut down when no request has arrived for this many seconds
+WORKER_IDLE_TIMEOUT = 900
+
+# Upper bound on concurrent get_acls/stat lookups in one batched auth check
+AUTH_BATCH_MAX_WORKERS = 8
+
+# Variant set holding the levels of detail of a pushed mesh, and the attributes each variant authors
+LOD_VARIANT_SET = 'LOD'
+MESH_GEOMETRY_ATTRIBUTES = ('points', 'faceVertexIndices', 'faceVertexCounts', 'normals', 'extent')
+
+# Upper bound on concurrent STEP transfers in one --push_batch or --pull_batch
+PUSH_BATCH_MAX_WORKERS = 4
+
+# Seconds between progress records while a file is downloaded
+TRANSFER_PROGRESS_INTERVAL = 0.5
+
+# File format of new asset and assembly stages: text (usda) or binary crate (usdc)
+USD_FORMATS = ('usda', 'usdc')
+DEFAULT_USD_FORMAT = 'usda'
 
 LOGGER = log.get_logger("OmniConnectLib", level=logging.INFO)
 
@@ -60,7 +113,8 @@ LOGGER = log.get_logger("OmniConnectLib", level=logging.INFO)
 def logCallback(threadName, component, level, message):
     if logging_enabled:
         LOGGER.setLevel(logging.DEBUG)
-        xform_utils.LOGGER.setLevel(logging.DEBUG)
+        # Same logger xform_utils creates, set by name so pxr is not imported just for logging
+        logging.getLogger("PyXformUtils").setLevel(logging.DEBUG)
         LOGGER.debug(message)
 
 
@@ -160,13 +214,124 @@ def logConnectedUsername(stageUrl, output_log = True):
             # print(dir(serverInfo))
             # print(serverInfo.version)
             LOGGER.info("Connected username: %s", serverInfo.username)
-            print("Connected username: "+ serverInfo.username)
+            log_message("Connected username: "+ serverInfo.username)
         return serverInfo.username
     else:
-        print("ERROR: "+ result.name)
+        log_message("ERROR: "+ result.name)
         LOGGER.info("ERROR: %s", result.name)
         return None
 
+def check_access(stageUrl, op, target='file'):
+    """Checks that the connected user is listed in the ACL of a Nucleus item.
+
+    Emits a result record with the username and ACL entry on success. A missing
+    login or missing item stops the operation; a missing ACL entry is reported as
+    an error record only, as the item may still be readable through a group.
+
+    Args:
+        stageUrl (str): Nucleus URL of the file or project directory.
+        op (str): Operation name written into the records.
+        target (str): Human readable name of the item kind for messages.
+
+    Returns:
+        str: The connected username.
+    """
+    LOGGER.info(f"Connecting to "+stageUrl)
+    log_message("Connecting to "+stageUrl)
+    username = logConnectedUsername(stageUrl, output_log=True)
+    if not username:
+        LOGGER.error(f"Cannot access {target}: {stageUrl}, authentication failed")
+        fail(op, 'NO_AUTH', 'Cannot authenticate with '+stageUrl)
+    code, user_entry = lookup_access(stageUrl, username)
+    if code == 'NOT_FOUND':
+        fail(op, 'NOT_FOUND', 'Provided '+target+' link at: '+stageUrl+' cannot be found! Double check link or ensure nucleus server is added to portal.')
+    if code == 'NO_PERMISSION':
+        emit_error(op, 'NO_PERMISSION', 'Cannot access '+target+': '+stageUrl+'. You do not have permissions to access this file! Contact your Nucleus administrator, or log in under a different username.')
+        return username
+    log_message('You have the following permissions to access this file:')
+    log_message(user_entry)
+    emit_result(op, {'url': stageUrl, 'username': username, 'permission': 'OK_ACCESS', 'acl': user_entry})
+    return username
+
+
+def lookup_access(stageUrl, username):
+    """Looks up the ACL entry of a user on a Nucleus item.
+
+    The ACL and stat requests are independent, so both are sent before waiting on either.
+
+    Returns:
+        tuple: (code, acl_entry) where code is 'OK', 'NOT_FOUND' or 'NO_PERMISSION'
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        acls_future = executor.submit(omni.client.get_acls, stageUrl)
+        stat_future = executor.submit(omni.client.stat, stageUrl)
+        acls = acls_future.result()
+        stat_result = stat_future.result()[0]
+    if stat_result == omni.client.Result.ERROR_NOT_FOUND:
+        return 'NOT_FOUND', None
+    user_entries = [str(entries) for entries in list(acls[1]) if entries.name == username]
+    if len(user_entries)!=1:
+        return 'NO_PERMISSION', None
+    return 'OK', user_entries[0]
+
+def check_access_batch(stageUrls, op='auth_batch'):
+    """Checks access to several Nucleus items in one operation.
+
+    Problems with single items are reported in the payload rather than as error
+    records, so one unreadable file does not hide the result for the others.
+
+    Args:
+        stageUrls (list): Nucleus URLs of files or project directories.
+        op (str): Operation name written into the result record.
+
+    Returns:
+        list: One dict per URL, see lookup_access_batch.
+    """
+    results = lookup_access_batch(stageUrls)
+    emit_result(op, {'results': results})
+    return results
+
+def lookup_access_batch(stageUrls):
+    """Looks up the access of the connected user to several Nucleus items.
+
+    The username is resolved once per server and the ACL/stat lookups of all
+    items run concurrently.
+
+    Returns:
+        list: One dict per URL with url, username, permission, code, message and acl.
+    """
+    usernames = {}
+    for stageUrl in stageUrls:
+        host = getHostFromURL(stageUrl)
+        if host not in usernames:
+            log_message("Connecting to "+stageUrl)
+            usernames[host] = logConnectedUsername(stageUrl, output_log=True)
+
+    def check_one(stageUrl):
+        username = usernames[getHostFromURL(stageUrl)]
+        entry = {'url': stageUrl, 'username': username, 'permission': 'NO_ACCESS', 'acl': None}
+        if not username:
+            entry.update(code='NO_AUTH', message='Cannot authenticate with '+stageUrl)
+            return entry
+        code, user_entry = lookup_access(stageUrl, username)
+        messages = {
+            'OK': 'OK',
+            'NOT_FOUND': 'Provided link at: '+stageUrl+' cannot be found! Double check link or ensure nucleus server is added to portal.',
+            'NO_PERMISSION': 'Cannot access '+stageUrl+'. You do not have permissions to access this file!',
+        }
+        entry.update(code=code, message=messages[code], acl=user_entry)
+        if code == 'OK':
+            entry['permission'] = 'OK_ACCESS'
+        return entry
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(AUTH_BATCH_MAX_WORKERS, max(1, len(stageUrls)))) as executor:
+        results = list(executor.map(check_one, stageUrls))
+    for entry in results:
+        if entry['code'] != 'OK':
+            log_message(f"[WARN] {entry['code']}: {entry['message']}")
+    return results
+
+
 def getHostFromURL(stageUrl):
     urlObject = omni.client.break_url(stageUrl)
     host = urlObject.host
@@ -316,14 +481,14 @@ def save_stage(stageUrl, comment=""):
     global g_stage
 
     # Set checkpoint message for saving Stage.
-    omni.usd_resolver.set_checkpoint_message(comment)
+    usd_resolver.set_checkpoint_message(comment)
 
     # Save the proper edit target (in the case that we're live editing)
     edit_target_layer = g_stage.GetEditTarget().GetLayer()
     edit_target_layer.Save()
 
     # Clear checkpoint message to ensure comment is not used in future file operations.
-    omni.usd_resolver.set_checkpoint_message("")
+    usd_resolver.set_checkpoint_message("")
     omni.client.live_process()
 
 def createEmptyMeshPrim(stageUrl, prim_name, token = None):
@@ -336,7 +501,7 @@ def createEmptyMeshPrim(stageUrl, prim_name, token = None):
     meshPrim = UsdGeom.Mesh.Define(g_stage, meshUrl)
 
     if not meshPrim:
-        sys.exit("[ERROR] Failure to create empty mesh.")
+        fail('create_mesh', 'USD_ERROR', 'Failure to create empty mesh in ' + stageUrl)
 
     if token ==None:
         checkpoint_descriptor = 'NO_TOKEN - Created empty mesh prim.'
@@ -432,7 +597,7 @@ def findGeomMesh(existingStage, boxNumber=0):
     g_stage = Usd.Stage.Open(existingStage)
 
     if not g_stage:
-        sys.exit("[ERROR] Unable to open stage: " + existingStage)
+        fail('open_stage', 'NOT_FOUND', 'Unable to open stage: ' + existingStage)
 
     #meshPrim = stage.GetPrimAtPath('/Root/box_%d' % boxNumber)
     for node in g_stage.Traverse():
@@ -444,7 +609,7 @@ def findGeomMesh(existingStage, boxNumber=0):
     if geom_meshes:
         return geom_meshes, mesh_paths
     if not geom_meshes:    
-        sys.exit("[ERROR] No UsdGeomMesh found in stage: "+ existingStage)
+        fail('open_stage', 'NO_MESH', 'No UsdGeomMesh found in stage: '+ existingStage)
         return None, None
 
 def uploadReferences(destination_path):
@@ -622,11 +787,10 @@ def get_all_xform_reference_paths(stageUrl, token=None):
 
     g_stage = Usd.Stage.Open(stageUrl)
 
-    nodelist = []
-    asset_paths = []
-    
+    prim_data = []
+
     if not g_stage:
-        sys.exit("[ERROR] Unable to open stage: " + stageUrl)
+        fail('get_prim_reference_xforms', 'NOT_FOUND', 'Unable to open stage: ' + stageUrl)
     for node in g_stage.Traverse():
         prim_references = node.GetMetadata('references')
 
@@ -661,21 +825,23 @@ def get_all_xform_reference_paths(stageUrl, token=None):
                 else:
                     scale = tuple(scale)
 
-                print(prim_reference, ' | ', translate, ' | ', rot_xyz, ' | ', scale)
+                prim_data.append({'ref-path': prim_reference, 'transform': translate, 'rot-xyz': rot_xyz, 'scale': scale})
     checkpoint_descriptor = ' - Sent assembly geometry positions to FreeCAD'
     if token==None:
         token = 'NO_TOKEN'
     checkpoint_descriptor = str(token) + checkpoint_descriptor
 
     save_stage(stageUrl, comment=checkpoint_descriptor)
-    return None
+    return prim_data
 
 def set_xform_srt_from_reference_asset_path(assembly_stage_url, list_dict_prim_data, token=None):
     global g_stage
     g_stage = Usd.Stage.Open(assembly_stage_url)
 
     if not g_stage:
-        sys.exit("[ERROR] Unable to open stage: " + assembly_stage_url)
+        fail('move_assembly', 'NOT_FOUND', 'Unable to open stage: ' + assembly_stage_url)
+
+    moved_count = 0
 
     for node in g_stage.Traverse():
         prim_references = node.GetMetadata('references')
@@ -692,7 +858,6 @@ def set_xform_srt_from_reference_asset_path(assembly_stage_url, list_dict_prim_d
                 child_node = child_path[0]
 
                 list_dict_entry = [list_dict_entry for list_dict_entry in list_dict_prim_data if list_dict_entry['ref-path']==prim_reference]
-                print(list_dict_entry)
                 if list_dict_entry != []:
                     list_dict_entry = list_dict_entry[0]
                     srt_action = xform_utils.TransformPrimSRT(
@@ -703,14 +868,15 @@ def set_xform_srt_from_reference_asset_path(assembly_stage_url, list_dict_prim_d
                             rotation_order=Gf.Vec3i(0, 1, 2),
                         )
                     srt_action.do()
-                    print(prim_reference, child_node.GetAttribute('xformOp:rotateXYZ').Get(), child_node.GetAttribute('xformOp:translate').Get())
+                    moved_count += 1
+                    log_message(prim_reference, child_node.GetAttribute('xformOp:rotateXYZ').Get(), child_node.GetAttribute('xformOp:translate').Get())
 
     if token == None:
         checkpoint_descriptor = 'NO_TOKEN - Moved assembly geometry using FreeCAD.'
     else:
         checkpoint_descriptor = str(token) + ' - Moved assembly geometry using FreeCAD'
     save_stage(assembly_stage_url, comment=checkpoint_descriptor)
-    return None
+    return moved_count
 
 def do_xform_translation_rotation(prim, transform, rotate):
     prim.GetPrim()
@@ -936,43 +1102,85 @@ def run_live_edit(prim, stageUrl):
             break
         else:
             LOGGER.info("Enter 't' to transform, 'm' to send a channel message, 'l' to leave the channel, or 'q' to quit.")
-def convertMeshPrimToO3dTriMesh(mesh_prim):
-    mesh_prim_properties = mesh_prim.GetPropertyNames()
-
-    mesh_points = np.array(mesh_prim.GetAttribute('points').Get())
-    mesh_faceVertexIndices = np.array(mesh_prim.GetAttribute('faceVertexIndices').Get())
-
-    # If cannot pickle mesh points, assume stored as a timeSample
-    if mesh_points.size == 1:
-        mesh_points = np.array(mesh_prim.GetAttribute('points').Get(0))
-    # If cannot pickle mesh faceVertexIndices, assume stored as a timeSample
-    if mesh_faceVertexIndices.size == 1:
-        mesh_faceVertexIndices = np.array(mesh_prim.GetAttribute('faceVertexIndices').Get(0))
-    # If it still doesn't work, 
-    if mesh_points.size + mesh_faceVertexIndices.size <= 2:
-        print('[ERROR] USD_INCOMPAT: Mesh points pickling failed.')
-        print('[ERROR] USD_INCOMPAT: Mesh faceVertexIndices pickling failed.')
+def getMeshAttributeValue(mesh_prim, attribute_name):
+    """Reads a mesh attribute, falling back to its first time sample when it has no default value.
+
+    Some exporters (e.g. Paraview) write points and topology only as time samples.
+    """
+    attribute = mesh_prim.GetAttribute(attribute_name)
+    if not attribute:
         return None
-    else:
-        mesh_triangleCount = int(len(mesh_faceVertexIndices)/3)
+    value = attribute.Get()
+    if value is None or len(value) == 0:
+        time_samples = attribute.GetTimeSamples()
+        if time_samples:
+            value = attribute.Get(time_samples[0])
+    return value
 
-        mesh_faceVertexIndices_o3d = np.reshape(mesh_faceVertexIndices, (mesh_triangleCount, 3))
-        
-        triangle_mesh = o3d.geometry.TriangleMesh()
-        triangle_mesh.vertices = o3d.utility.Vector3dVector(mesh_points)
-        triangle_mesh.triangles = o3d.utility.Vector3iVector(mesh_faceVertexIndices_o3d)
-        triangle_mesh = o3d.geometry.TriangleMesh.compute_vertex_normals(triangle_mesh)
-        # triangle_mesh = triangle_mesh.compute_vertex_normals()
-
-        return triangle_mesh
-
-class o3dSTLMesh:
-    def __init__(self, triangle_mesh):
-        self.triangle_mesh = triangle_mesh
-        self.vertices = np.asarray(triangle_mesh.vertices)
-        self.triangles = np.asarray(triangle_mesh.triangles)
-        self.triangle_mesh = self.triangle_mesh.compute_triangle_normals()
-        self.vertex_normals = np.asarray(triangle_mesh.vertex_normals)
+def convertMeshPrimToTriangles(mesh_prim):
+    """Reads a mesh prim as triangles for FreeCAD, triangulating polygons and leaving out holes.
+
+    Returns:
+        tuple: (points, triangles) as (N, 3) float32 and (M, 3) int32 arrays, or None if the mesh cannot be read
+    """
+    mesh_points = getMeshAttributeValue(mesh_prim, 'points')
+    mesh_faceVertexIndices = getMeshAttributeValue(mesh_prim, 'faceVertexIndices')
+    mesh_faceVertexCounts = getMeshAttributeValue(mesh_prim, 'faceVertexCounts')
+    mesh_holeIndices = getMeshAttributeValue(mesh_prim, 'holeIndices')
+
+    if not mesh_points or not mesh_faceVertexIndices:
+        log_message('[ERROR] USD_INCOMPAT: Mesh points or faceVertexIndices could not be read.')
+        return None
+    mesh_points = np.asarray(mesh_points, dtype=np.float32).reshape(-1, 3)
+    mesh_faceVertexIndices = np.asarray(mesh_faceVertexIndices)
+    if not mesh_faceVertexCounts:
+        # Without faceVertexCounts the only sensible reading is a triangle list
+        mesh_faceVertexCounts = np.full(len(mesh_faceVertexIndices) // 3, 3)
+    try:
+        mesh_triangles = mesh_utils.triangulate_polygons(mesh_faceVertexCounts, mesh_faceVertexIndices, mesh_holeIndices)
+    except ValueError as e:
+        log_message('[ERROR] USD_INCOMPAT: ' + str(e))
+        return None
+    if mesh_triangles.size and (mesh_triangles.min() < 0 or mesh_triangles.max() >= len(mesh_points)):
+        log_message('[ERROR] USD_INCOMPAT: faceVertexIndices refer to points that do not exist.')
+        return None
+    return mesh_points, mesh_triangles
+
+class MeshBuffers:
+    """Triangle mesh held as numpy arrays, written to a UsdGeom.Mesh prim.
+
+    Args:
+        vertices (ndarray): (N, 3) vertex positions.
+        triangles (ndarray): (M, 3) vertex indices per triangle.
+        vertex_normals (ndarray, optional): (N, 3) normals. Computed if not given or if the mesh is welded.
+        weld_tolerance (float): Merge vertices closer than this before writing. 0 keeps the vertices as they are.
+        crease_angle (float, optional): Angle in degrees above which computed normals keep the face normal.
+    """
+    def __init__(self, vertices, triangles, vertex_normals=None, weld_tolerance=0, crease_angle=None):
+        if crease_angle is None:
+            crease_angle = mesh_utils.DEFAULT_CREASE_ANGLE
+        self.vertices = np.asarray(vertices)
+        self.triangles = np.asarray(triangles, dtype=np.int32)
+        if weld_tolerance > 0:
+            vertex_count = len(self.vertices)
+            self.vertices, self.triangles = mesh_utils.weld_vertices(self.vertices, self.triangles, weld_tolerance)
+            log_message(f'Welded {vertex_count} vertices into {len(self.vertices)}')
+            # Normals given for the unwelded vertices no longer line up
+            vertex_normals = None
+        self.normals_interpolation = 'vertex'
+        if vertex_normals is None:
+            vertex_normals, self.normals_interpolation = mesh_utils.compute_crease_normals(self.vertices, self.triangles, crease_angle)
+        self.vertex_normals = np.asarray(vertex_normals)
+
+    @classmethod
+    def from_file(cls, path, weld_tolerance=None, crease_angle=None):
+        # Memory-mapped mesh bundle exported by the workbench, or an STL file from older versions of it
+        if weld_tolerance is None:
+            weld_tolerance = mesh_utils.DEFAULT_WELD_TOLERANCE
+        if mesh_utils.is_mesh_bundle(path):
+            return cls(*mesh_utils.load_mesh_buffers(path), weld_tolerance=weld_tolerance, crease_angle=crease_angle)
+        vertices, triangles = mesh_utils.read_stl(path)
+        return cls(vertices, triangles, weld_tolerance=weld_tolerance, crease_angle=crease_angle)
 
     def asUSDGeomMeshFormat(self):
         # defining facevertexindices to assign points to triangles
@@ -980,7 +1188,7 @@ class o3dSTLMesh:
         usdFormFaceVertexIndices = np.reshape(self.triangles, (usdFormFaceVertexIndicesCount,))
         
         # defining fvc to make sure each face is a triangle 
-        usdFormFaceVertexCounts = np.ones((np.shape(self.triangles)[0],))*3
+        usdFormFaceVertexCounts = np.full((np.shape(self.triangles)[0],), 3, dtype=np.int32)
         
         # defining vertex normals
         usdFormNormals = self.vertex_normals
@@ -993,8 +1201,16 @@ class o3dSTLMesh:
         
         return usdFormFaceVertexIndices, usdFormFaceVertexCounts, usdFormNormals, usdFormPoints, usdFormSurfaceTexture
 
+    def asVtArrays(self):
+        # Builds the Vt arrays straight from the (possibly memory-mapped) buffers, without going through Python sequences
+        usdFormFaceVertexIndices, usdFormFaceVertexCounts, usdFormNormals, usdFormPoints, _ = self.asUSDGeomMeshFormat()
+        return (Vt.IntArray.FromNumpy(np.ascontiguousarray(usdFormFaceVertexIndices, dtype=np.int32)),
+                Vt.IntArray.FromNumpy(np.ascontiguousarray(usdFormFaceVertexCounts, dtype=np.int32)),
+                Vt.Vec3fArray.FromNumpy(np.ascontiguousarray(usdFormNormals, dtype=np.float32)),
+                Vt.Vec3fArray.FromNumpy(np.ascontiguousarray(usdFormPoints, dtype=np.float32)))
+
     def convertToUSDGeomMesh(self, input_prim, stageUrl, empty_prim = False):
-        usdFormFaceVertexIndices, usdFormFaceVertexCounts, usdFormNormals, usdFormPoints, usdFormSurfaceTexture = self.asUSDGeomMeshFormat()
+        usdFormFaceVertexIndices, usdFormFaceVertexCounts, usdFormNormals, usdFormPoints = self.asVtArrays()
         if empty_prim==False:
             # Check to see if USD is set as a strange time-sampled animation (somehow USDs from Paraview do this!)
             input_prim_points = np.array(input_prim.GetAttribute('points').Get())
@@ -1018,9 +1234,502 @@ class o3dSTLMesh:
             input_prim.CreateFaceVertexCountsAttr(usdFormFaceVertexCounts)
             input_prim.CreateNormalsAttr(usdFormNormals)
             input_prim.CreateExtentAttr(input_prim.ComputeExtent(usdFormPoints))
+
+        # faceVarying when creases keep per-corner face normals, see mesh_utils.compute_crease_normals.
+        # Set after the normals so the attribute exists to carry the metadata.
+        UsdGeom.Mesh(input_prim).SetNormalsInterpolation(self.normals_interpolation)
         
         return input_prim
 
+def writeMeshFileToPrim(mesh_prim, stageUrl, mesh_file, empty_prim=False, weld_tolerance=None, crease_angle=None):
+    """Writes a mesh exported by the workbench to a mesh prim.
+
+    A mesh directory with several levels of detail is authored as the LOD_VARIANT_SET
+    variant set on the prim, one variant per level with the finest selected.
+
+    Returns:
+        int: Number of levels of detail written (1 without variants)
+    """
+    lod_bundles = mesh_utils.list_lod_bundles(mesh_file)
+    if not lod_bundles:
+        MeshBuffers.from_file(mesh_file, weld_tolerance=weld_tolerance, crease_angle=crease_angle).convertToUSDGeomMesh(mesh_prim, stageUrl, empty_prim=empty_prim)
+        return 1
+
+    mesh = UsdGeom.Mesh(mesh_prim)
+    prim = mesh.GetPrim()
+    # Opinions outside the variants are stronger than the variants, so the single mesh of earlier pushes has to go
+    for attribute_name in MESH_GEOMETRY_ATTRIBUTES:
+        prim.RemoveProperty(attribute_name)
+    variant_set = prim.GetVariantSets().AddVariantSet(LOD_VARIANT_SET)
+    for variant_name, bundle_path in lod_bundles:
+        variant_set.AddVariant(variant_name)
+        variant_set.SetVariantSelection(variant_name)
+        with variant_set.GetVariantEditContext():
+            MeshBuffers.from_file(bundle_path, weld_tolerance=weld_tolerance, crease_angle=crease_angle).convertToUSDGeomMesh(mesh, stageUrl, empty_prim=True)
+    variant_set.SetVariantSelection(lod_bundles[0][0])
+    log_message(f'Wrote {len(lod_bundles)} levels of detail to the {LOD_VARIANT_SET} variant set')
+    return len(lod_bundles)
+
+def getLatestCheckpointHash(url):
+    """Returns the content hash recorded in the newest checkpoint comment of a Nucleus file, or None.
+
+    If the file was changed after that checkpoint (the server hashes of the file and the
+    checkpoint differ), the recorded hash no longer describes it and None is returned.
+    """
+    result, entries = omni.client.list_checkpoints(url)
+    if result != omni.client.Result.OK or not entries:
+        return None
+    latest = max(entries, key=lambda entry: entry.modified_time)
+    recorded_hash = content_hash.parse_checkpoint_hash(latest.comment)
+    if recorded_hash is None:
+        return None
+    stat_result, head = omni.client.stat(url)
+    if stat_result != omni.client.Result.OK:
+        return None
+    if head.hash and latest.hash and head.hash != latest.hash:
+        return None
+    return recorded_hash
+
+def createMetadataCheckpoint(url, comment, content_hash_value=None):
+    """Checkpoints a Nucleus file as it is on the server, without downloading or rewriting it.
+
+    The checkpoint is forced, so it is recorded even though the content has not changed since
+    the last one. The content hash, if known, is carried over so the next push can still be skipped.
+
+    Returns:
+        tuple: (omni.client.Result, checkpoint comment)
+    """
+    if content_hash_value:
+        comment += ' ' + content_hash.format_checkpoint_hash(content_hash_value)
+    checkpoint_result = omni.client.create_checkpoint(url, comment, True)
+    checkpoint_status = checkpoint_result[0] if isinstance(checkpoint_result, tuple) else checkpoint_result
+    log_message('Checkpoint on Nucleus: ' + str(checkpoint_status))
+    return checkpoint_status, comment
+
+def isUploadUnchanged(url, local_hash):
+    # True if the upload can be skipped because Nucleus already has this content
+    if getLatestCheckpointHash(url) != local_hash:
+        return False
+    log_message(f'[INFO] {url} already holds this content, skipping upload')
+    return True
+
+def pushMeshToStage(stage_url, mesh_file, checkpoint_descriptor, weld_tolerance=None, crease_angle=None, force_upload=False):
+    """Writes an exported mesh into the mesh prim of an existing stage and saves it with a checkpoint.
+
+    Returns:
+        dict: Result payload of the push; 'skipped' is set if the stage already holds this mesh
+    """
+    # Hashed before the stage is opened, so an unchanged push costs one checkpoint listing
+    mesh_hash = content_hash.hash_mesh_file(mesh_file, (weld_tolerance, crease_angle))
+    if not force_upload and isUploadUnchanged(stage_url, mesh_hash):
+        return {'url': stage_url, 'skipped': True, 'content_hash': mesh_hash, 'checkpoint': None}
+
+    geom_mesh_prims, geom_mesh_paths = findGeomMesh(stage_url)
+    if not geom_mesh_prims:
+        fail('push', 'NO_MESH', "Unable to find mesh at " + stage_url)
+    geom_mesh_prim = geom_mesh_prims[0]
+
+    checkpoint_descriptor += ' ' + content_hash.format_checkpoint_hash(mesh_hash)
+    lod_count = writeMeshFileToPrim(geom_mesh_prim, stage_url, mesh_file, weld_tolerance=weld_tolerance, crease_angle=crease_angle)
+    geom_mesh_prim.SetCustomDataByKey(content_hash.USD_HASH_KEY, mesh_hash)
+    save_stage(stage_url, comment=checkpoint_descriptor)
+    return {'url': stage_url, 'lods': lod_count, 'bytes': getLocalFileSize(mesh_file),
+            'content_hash': mesh_hash, 'checkpoint': checkpoint_descriptor}
+
+def createStageWithMesh(stage_url, mesh_file, checkpoint_descriptor, token=None, weld_tolerance=None, crease_angle=None):
+    """Replaces a stage with a new one holding a single mesh prim, discarding what the old stage held.
+
+    Returns:
+        dict: Result payload of the new stage
+    """
+    stage_url = createOmniverseModel(stage_url, live_edit=False)
+    prim_name = strip_suffixes(splitURLGetUSDFileName(stage_url))
+    mesh_prim = createEmptyMeshPrim(stage_url, prim_name, token=token)
+
+    # Recorded like a push, so the next push of the same geometry is skipped
+    mesh_hash = content_hash.hash_mesh_file(mesh_file, (weld_tolerance, crease_angle))
+    checkpoint_descriptor += ' ' + content_hash.format_checkpoint_hash(mesh_hash)
+    lod_count = writeMeshFileToPrim(mesh_prim, stage_url, mesh_file, empty_prim=True, weld_tolerance=weld_tolerance, crease_angle=crease_angle)
+    mesh_prim.GetPrim().SetCustomDataByKey(content_hash.USD_HASH_KEY, mesh_hash)
+    save_stage(stage_url, comment=checkpoint_descriptor)
+    return {'url': stage_url, 'lods': lod_count, 'bytes': getLocalFileSize(mesh_file),
+            'content_hash': mesh_hash, 'checkpoint': checkpoint_descriptor}
+
+def streamFile(source_url, destination_url, op, total_bytes, label, watch_path=None, message=''):
+    """Copies a file between the local disk and Nucleus with omni.client.copy.
+
+    The client library streams the file in blocks, so neither side is held in memory.
+    Progress records are emitted at the start and the end, and while watch_path
+    (the local destination of a download) grows.
+
+    Returns:
+        omni.client.Result: Result of the copy
+    """
+    finished = threading.Event()
+
+    def report_progress():
+        while not finished.wait(TRANSFER_PROGRESS_INTERVAL):
+            try:
+                emit_progress(op, os.path.getsize(watch_path), total_bytes, message=label)
+            except OSError:
+                pass
+
+    emit_progress(op, 0, total_bytes, message=label)
+    reporter = threading.Thread(target=report_progress, daemon=True) if watch_path else None
+    if reporter:
+        reporter.start()
+    try:
+        copy_result = omni.client.copy(source_url, destination_url, omni.client.CopyBehavior.OVERWRITE, message)
+    finally:
+        finished.set()
+        if reporter:
+            reporter.join()
+    copy_status = copy_result[0] if isinstance(copy_result, tuple) else copy_result
+    if copy_status == omni.client.Result.OK:
+        emit_progress(op, total_bytes, total_bytes, message=label)
+    return copy_status
+
+def pushFileToNucleus(nucleus_url, local_path, checkpoint_descriptor, force_upload=False):
+    """Writes a local file (e.g. STEP) to Nucleus with a checkpoint comment. Safe to call from several threads.
+
+    The file is streamed from disk (see streamFile) and the size on the server is checked afterwards.
+
+    Returns:
+        dict: Result payload of the push; 'skipped' is set if Nucleus already holds this content
+    """
+    try:
+        local_size = os.path.getsize(local_path)
+    except OSError:
+        fail('push_non_usd', 'FILE_NOT_FOUND', 'Local file not found: ' + local_path)
+
+    if local_path.lower().endswith(('.stp', '.step')):
+        file_hash = content_hash.hash_step_file(local_path)
+    else:
+        file_hash = content_hash.hash_file(local_path)
+    if not force_upload and isUploadUnchanged(nucleus_url, file_hash):
+        return {'url': nucleus_url, 'skipped': True, 'content_hash': file_hash, 'checkpoint': None}
+    checkpoint_descriptor += ' ' + content_hash.format_checkpoint_hash(file_hash)
+
+    # Attempt to write to Nucleus and report the result
+    upload_status = streamFile(os.path.abspath(local_path), nucleus_url, 'push_non_usd', local_size, nucleus_url,
+                               message=checkpoint_descriptor)
+    log_message('Write to Nucleus: ' + str(upload_status))
+    if upload_status != omni.client.Result.OK:
+        fail('push_non_usd', upload_status.name, 'Cannot write to ' + nucleus_url)
+    stat_result, remote_entry = omni.client.stat(nucleus_url)
+    if stat_result == omni.client.Result.OK and remote_entry.size != local_size:
+        fail('push_non_usd', 'SIZE_MISMATCH', f'{nucleus_url} holds {remote_entry.size} bytes after writing {local_size}')
+    return {'url': nucleus_url, 'bytes': local_size, 'content_hash': file_hash, 'checkpoint': checkpoint_descriptor}
+
+def getLocalFileSize(path):
+    # Size of a file, or of every file below a directory (mesh bundles)
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+def runBatchItemStep(step, *args, **kwargs):
+    # One failed file must not end the batch: fail() has already emitted its error record, keep going
+    try:
+        return step(*args, **kwargs), None
+    except SystemExit:
+        return None, 'FAILED'
+    except Exception as e:
+        log_message('[ERROR] ' + repr(e))
+        return None, repr(e)
+
+def pushBatch(items, token=None, weld_tolerance=None, crease_angle=None, force_upload=False, max_workers=PUSH_BATCH_MAX_WORKERS, check_access=False):
+    """Pushes the STEP files and meshes of several objects in one operation.
+
+    STEP files are uploaded concurrently, at most max_workers at a time. USD stages are
+    written one after the other on the calling thread while those uploads run, because
+    the checkpoint message of the USD resolver is global to the process.
+
+    With check_access, the access of the connected user to every destination is looked
+    up first, in the same call and over the same connection, and destinations without
+    access are left out. Every file is checkpointed with the same token and comment.
+
+    The same exported files may be listed in several items to mirror one object to several
+    destinations; each file is then read from the local disk but exported only once.
+
+    Args:
+        items (list): One dict per destination with 'name' and any of 'stp_url'/'stp_file' and 'usd_url'/'mesh_file'.
+            With 'overwrite_usd' set, the USD is recreated instead of updated (see --create_new_usd).
+
+    Returns:
+        dict: Per-object status and aggregate counts and throughput
+    """
+    checkpoint_descriptor = (str(token) if token is not None else "NO_TOKEN") + " - Push from FreeCAD"
+    started = time.time()
+    statuses = [{'name': item.get('name'), 'stp': None, 'usd': None, 'errors': []} for item in items]
+    access = []
+    if check_access:
+        urls = sorted({item.get(key) for item in items for key in ('stp_url', 'usd_url') if item.get(key)})
+        access = lookup_access_batch(urls)
+        denied = {entry['url']: entry['code'] for entry in access if entry['code'] != 'OK'}
+        for index, item in enumerate(items):
+            for kind in ('stp', 'usd'):
+                if item.get(kind + '_url') in denied:
+                    statuses[index]['errors'].append(f"{kind}: {denied[item[kind + '_url']]}")
+                    items[index] = item = dict(item, **{kind + '_url': None})
+    step_count = sum(1 for item in items if item.get('stp_url') and item.get('stp_file'))
+    done_count = 0
+
+    def report(index, label):
+        # Called on this thread only: once per USD stage and once per finished STEP upload
+        nonlocal done_count
+        done_count += 1
+        status = statuses[index]
+        state = 'failed' if status['errors'] else 'ok'
+        emit_progress('push_batch', done_count, len(items) + step_count, message=f"{status['name']} {label}: {state}")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        step_futures = {}
+        for index, item in enumerate(items):
+            if item.get('stp_url') and item.get('stp_file'):
+                step_futures[executor.submit(runBatchItemStep, pushFileToNucleus, item['stp_url'], item['stp_file'],
+                                             checkpoint_descriptor, force_upload=force_upload)] = index
+
+        for index, item in enumerate(items):
+            if item.get('usd_url') and item.get('mesh_file') and item.get('overwrite_usd'):
+                statuses[index]['usd'], error = runBatchItemStep(createStageWithMesh, item['usd_url'], item['mesh_file'], checkpoint_descriptor,
+                                                                 token=token, weld_tolerance=weld_tolerance, crease_angle=crease_angle)
+            elif item.get('usd_url') and item.get('mesh_file'):
+                statuses[index]['usd'], error = runBatchItemStep(pushMeshToStage, item['usd_url'], item['mesh_file'], checkpoint_descriptor,
+                                                                 weld_tolerance=weld_tolerance, crease_angle=crease_angle, force_upload=force_upload)
+            else:
+                error = None
+            if error:
+                statuses[index]['errors'].append('usd: ' + error)
+            report(index, 'USD')
+
+        for future in concurrent.futures.as_completed(step_futures):
+            index = step_futures[future]
+            statuses[index]['stp'], error = future.result()
+            if error:
+                statuses[index]['errors'].append('stp: ' + error)
+            report(index, 'STP')
+
+    elapsed = time.time() - started
+    uploaded_bytes = sum(result.get('bytes', 0) for status in statuses for result in (status['stp'], status['usd'])
+                         if result and not result.get('skipped'))
+    failed = sum(1 for status in statuses if status['errors'])
+    log_message(f'Pushed {len(items) - failed} of {len(items)} objects, {uploaded_bytes} bytes in {elapsed:.1f} s')
+    return {
+        'items': statuses,
+        'pushed': len(items) - failed,
+        'failed': failed,
+        'bytes': uploaded_bytes,
+        'seconds': round(elapsed, 3),
+        'bytes_per_second': round(uploaded_bytes / elapsed) if elapsed > 0 else None,
+        'checkpoint': checkpoint_descriptor,
+        'access': access,
+    }
+
+def pullFileFromNucleus(nucleus_url, local_path, checkpoint_descriptor, cache=None):
+    """Downloads a Nucleus file (e.g. STEP) and records the pull in a checkpoint. Safe to call from several threads.
+
+    The checkpoint only adds metadata on the server (see createMetadataCheckpoint): the file is not uploaded again.
+    Downloads are streamed to disk (see streamFile) and checked against the size on the server and the
+    content hash recorded by the last push, and only then moved into place.
+
+    Args:
+        cache (download_cache.DownloadCache, optional): Reused instead of downloading while the remote file is unchanged.
+
+    Returns:
+        dict: Result payload of the pull, including the content hash of the local file
+    """
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    extension = os.path.splitext(local_path)[1]
+    stat_result, remote_entry = omni.client.stat(nucleus_url)
+    if stat_result != omni.client.Result.OK:
+        fail('pull_non_usd', stat_result.name, 'Cannot read ' + nucleus_url)
+    version_tag = download_cache.remote_version_tag(remote_entry) if cache is not None else None
+    cached_path = cache.get(nucleus_url, version_tag, extension) if version_tag else None
+
+    def hash_local(path):
+        # Lets the workbench reuse what it built from the same STEP data before, see InsertSTPIntoDocument
+        if extension.lower() in ('.stp', '.step'):
+            return content_hash.hash_step_file(path)
+        return content_hash.hash_file(path)
+
+    if cached_path:
+        log_message('Using cached copy of ' + nucleus_url)
+        shutil.copyfile(cached_path, local_path)
+        file_hash = hash_local(local_path)
+    else:
+        # Downloaded next to the destination, so a failed or corrupt download never replaces it
+        partial_path = local_path + '.part'
+        try:
+            read_output_result = streamFile(nucleus_url, os.path.abspath(partial_path), 'pull_non_usd', remote_entry.size,
+                                            nucleus_url, watch_path=partial_path)
+            log_message('Read from Nucleus: '+ str(read_output_result))
+            if read_output_result != omni.client.Result.OK:
+                fail('pull_non_usd', read_output_result.name, 'Cannot read ' + nucleus_url)
+            if os.path.getsize(partial_path) != remote_entry.size:
+                fail('pull_non_usd', 'SIZE_MISMATCH', f'Downloaded {os.path.getsize(partial_path)} of {remote_entry.size} bytes from {nucleus_url}')
+            file_hash = hash_local(partial_path)
+            expected_hash = getLatestCheckpointHash(nucleus_url)
+            if expected_hash and expected_hash != file_hash:
+                fail('pull_non_usd', 'CHECKSUM_MISMATCH', f'{nucleus_url} does not match the hash recorded when it was pushed')
+            os.replace(partial_path, local_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+    log_message('Write to '+local_path+' OK')
+    checkpoint_status, checkpoint_descriptor = createMetadataCheckpoint(nucleus_url, checkpoint_descriptor, file_hash)
+    if checkpoint_status != omni.client.Result.OK:
+        # The file is already here; a missing pull record is not worth failing the pull for
+        log_message(f'[WARN] Cannot checkpoint {nucleus_url}: {checkpoint_status.name}')
+        checkpoint_descriptor = None
+    if cache is not None:
+        # Cached under the version the server holds after the checkpoint above; without a server
+        # hash the checkpoint changes the tag, and a hit left under the old tag would miss next time
+        new_version_tag = getRemoteVersionTag(nucleus_url)
+        if new_version_tag and cached_path:
+            cache.retag(nucleus_url, version_tag, new_version_tag, extension)
+        elif new_version_tag:
+            cache.put(nucleus_url, new_version_tag, local_path, extension)
+    return {'url': nucleus_url, 'local_filename': local_path, 'bytes': os.path.getsize(local_path),
+            'cached': bool(cached_path), 'content_hash': file_hash, 'checkpoint': checkpoint_descriptor}
+
+def pullBatch(items, checkpoint_descriptor, cache=None, max_workers=PUSH_BATCH_MAX_WORKERS, check_access=False):
+    """Downloads several Nucleus files concurrently, at most max_workers at a time.
+
+    Args:
+        items (list): One dict per file with 'url' and 'local_filename'.
+        check_access: Look up access to every URL first, in the same call, and skip those without access.
+
+    Returns:
+        dict: One status per item, in the order given, and aggregate counts and throughput
+    """
+    started = time.time()
+    statuses = [{'url': item['url'], 'result': None, 'errors': []} for item in items]
+    access = []
+    if check_access:
+        access = lookup_access_batch(sorted({item['url'] for item in items}))
+        denied = {entry['url']: entry['code'] for entry in access if entry['code'] != 'OK'}
+        for status in statuses:
+            if status['url'] in denied:
+                status['errors'].append(denied[status['url']])
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(runBatchItemStep, pullFileFromNucleus, item['url'], item['local_filename'],
+                                   checkpoint_descriptor, cache=cache): index
+                   for index, item in enumerate(items) if not statuses[index]['errors']}
+        for done_count, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            status = statuses[futures[future]]
+            status['result'], error = future.result()
+            if error:
+                status['errors'].append(error)
+            emit_progress('pull_batch', done_count, len(futures), message=f"{status['url']}: {'failed' if status['errors'] else 'ok'}")
+
+    elapsed = time.time() - started
+    downloaded_bytes = sum(status['result']['bytes'] for status in statuses
+                           if status['result'] and not status['result']['cached'])
+    failed = sum(1 for status in statuses if status['errors'])
+    log_message(f'Pulled {len(items) - failed} of {len(items)} files, {downloaded_bytes} bytes downloaded in {elapsed:.1f} s')
+    return {
+        'items': statuses,
+        'pulled': len(items) - failed,
+        'failed': failed,
+        'bytes': downloaded_bytes,
+        'seconds': round(elapsed, 3),
+        'bytes_per_second': round(downloaded_bytes / elapsed) if elapsed > 0 else None,
+        'checkpoint': checkpoint_descriptor,
+        'access': access,
+    }
+
+def getRemoteVersionTag(url):
+    # Tag identifying the current content of a Nucleus file for download_cache, or None if it cannot be stat'ed
+    result, entry = omni.client.stat(url)
+    if result != omni.client.Result.OK:
+        return None
+    return download_cache.remote_version_tag(entry)
+
+def reportScanFailures(op, project_url, failed):
+    # The project folder itself must be listable; a folder below it that is not only costs its entries
+    for folder_url, result_name in failed:
+        if folder_url == project_url:
+            fail(op, result_name, 'Cannot list project folder ' + project_url)
+        log_message(f'[WARN] Cannot list {folder_url}: {result_name}')
+
+def withUSDFormat(url, usd_format):
+    # Swaps the extension of a USD URL, e.g. asset.usda -> asset.usdc
+    return re.sub(r'\.(usd|usda|usdc)$', '', url, flags=re.IGNORECASE) + '.' + usd_format
+
+def convertAssetsToUSDC(project_url, token=None):
+    """Rewrites the text (.usda) asset stages of a project as binary crate (.usdc) files.
+
+    Every asset is exported next to the original, then the references of every assembly
+    in the project are pointed at the new files, and only then are the .usda files deleted,
+    so an interrupted conversion never leaves an assembly referencing a missing asset.
+    If an assembly folder cannot be listed, or an assembly cannot be opened or saved,
+    the .usda files are kept, since that assembly may still reference them.
+
+    Returns:
+        tuple: (converted, updated_assemblies, failed, kept_originals) where converted maps old
+            to new URLs and failed lists the assets, assemblies and folders that went wrong
+    """
+    checkpoint_descriptor = (str(token) if token is not None else 'NO_TOKEN') + ' - Converted to binary USD (usdc)'
+    converted = {}
+    failed = []
+    _, usd_records, scan_failed = project_scan.find_asset_files(project_url)
+    reportScanFailures('convert_to_usdc', project_url, scan_failed)
+    for asset_url in (record['url'] for record in usd_records):
+        if not asset_url.lower().endswith('.usda'):
+            continue
+        layer = Sdf.Layer.FindOrOpen(asset_url)
+        new_url = withUSDFormat(asset_url, 'usdc')
+        usd_resolver.set_checkpoint_message(checkpoint_descriptor)
+        exported = bool(layer) and layer.Export(new_url)
+        usd_resolver.set_checkpoint_message("")
+        if not exported:
+            log_message('[WARN] Unable to convert ' + asset_url)
+            failed.append(asset_url)
+            continue
+        log_message('Converted ' + asset_url + ' -> ' + new_url)
+        converted[asset_url] = new_url
+
+    updated_assemblies = []
+    # Assemblies that may still reference the .usda files
+    unconverted_assemblies = []
+    assembly_records, scan_failed = project_scan.find_assembly_files(project_url)
+    reportScanFailures('convert_to_usdc', project_url, scan_failed)
+    unconverted_assemblies.extend(folder_url for folder_url, _ in scan_failed)
+    for assembly_url in (record['url'] for record in assembly_records):
+        layer = Sdf.Layer.FindOrOpen(assembly_url)
+        if not layer:
+            log_message('[WARN] Unable to open assembly ' + assembly_url)
+            unconverted_assemblies.append(assembly_url)
+            continue
+        changed = False
+        for asset_path in layer.GetCompositionAssetDependencies():
+            resolved_path = asset_path if 'omniverse://' in asset_path else resolve_relative_usd_path(assembly_url, asset_path)
+            if resolved_path in converted:
+                # Keep relative references relative, only the extension changes
+                layer.UpdateCompositionAssetDependency(asset_path, withUSDFormat(asset_path, 'usdc'))
+                changed = True
+        if changed:
+            usd_resolver.set_checkpoint_message(checkpoint_descriptor)
+            saved = layer.Save()
+            usd_resolver.set_checkpoint_message("")
+            if not saved:
+                log_message('[WARN] Unable to save assembly ' + assembly_url)
+                unconverted_assemblies.append(assembly_url)
+                continue
+            updated_assemblies.append(assembly_url)
+
+    failed.extend(unconverted_assemblies)
+    if unconverted_assemblies:
+        log_message(f'[WARN] Keeping the .usda assets, {len(unconverted_assemblies)} assemblies or folders could not be updated')
+        return converted, updated_assemblies, failed, True
+    for asset_url in converted:
+        delete_result = omni.client.delete(asset_url)
+        if delete_result != omni.client.Result.OK:
+            log_message(f'[WARN] Unable to delete {asset_url}: {delete_result.name}')
+            failed.append(asset_url)
+    return converted, updated_assemblies, failed, False
+
 def splitURLGetUSDFileName(usd_link):
     usd_link_split = usd_link.split('/')
     usd_filename = usd_link_split[-1]
@@ -1047,7 +1756,7 @@ def parse_srt_and_ref_into_dict(transform_list, rotation_list, asset_reference_l
         dict_list.append(reference_dict)
     return dict_list
 
-if __name__ == "__main__":
+def build_arg_parser():
     parser = argparse.ArgumentParser(description="Python Omniverse Client Sample",
                                      formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     default_local_directory = './session_local'
@@ -1060,6 +1769,8 @@ if __name__ == "__main__":
     parser.add_argument("--push", action="store_true", default=False)
     parser.add_argument("--auth", action="store_true", default=False)
     parser.add_argument("--auth_project", action="store_true", default=False)
+    parser.add_argument("--auth_batch", action="store_true", default=False)
+    parser.add_argument("--auth_urls", nargs ='+', action="store")
     parser.add_argument("--test", action="store_true", default=False)
     parser.add_argument("--move_assembly", action="store_true", default=False)
     parser.add_argument("--push_non_usd", action="store_true", default=False)
@@ -1070,9 +1781,40 @@ if __name__ == "__main__":
     parser.add_argument('--project_name', action="store", default=None)
     parser.add_argument('--asset_name', action="store", default=None)
     parser.add_argument("--local_non_usd_filename", action="store")
+    parser.add_argument("--mesh_file", action="store", default=None,
+                        help="Mesh exported by the workbench for --push and --create_new_usd. Defaults to the token's upload.stl")
+    parser.add_argument("--force_upload", action="store_true", default=False,
+                        help="Upload even if Nucleus already holds the same content")
+    parser.add_argument("--weld_tolerance", type=float, action="store", default=None,
+                        help="Merge mesh vertices closer than this (mm) before writing USD. 0 disables welding")
+    parser.add_argument("--crease_angle", type=float, action="store", default=None,
+                        help="Angle (degrees) above which mesh normals stay per face")
+    parser.add_argument("--cache_dir", action="store", default=None,
+                        help="Keep downloaded files in this directory and reuse them while the Nucleus version is unchanged")
+    parser.add_argument("--cache_max_mb", type=int, action="store", default=download_cache.DEFAULT_CACHE_MAX_BYTES // 1024 ** 2,
+                        help="Size limit of --cache_dir, least recently used files are removed first")
+    parser.add_argument("--push_batch", action="store_true", default=False,
+                        help="Push the objects listed in --batch_file, uploading STEP files concurrently")
+    parser.add_argument("--pull_batch", action="store_true", default=False,
+                        help="Download the files listed in --batch_file concurrently")
+    parser.add_argument("--batch_file", action="store", default=None,
+                        help="JSON file with an 'items' list: {name, stp_url, stp_file, usd_url, mesh_file} for --push_batch, "
+                             "{url, local_filename} for --pull_batch")
+    parser.add_argument("--check_access", action="store_true", default=False,
+                        help="Check access to every --push_batch or --pull_batch file first, skipping those without access")
+    parser.add_argument("--max_uploads", type=int, action="store", default=PUSH_BATCH_MAX_WORKERS,
+                        help="Maximum number of concurrent transfers in --push_batch and --pull_batch")
+    parser.add_argument("--usd_format", choices=USD_FORMATS, action="store", default=DEFAULT_USD_FORMAT,
+                        help="File format of new assets and assemblies: usda (text) or usdc (binary)")
+    parser.add_argument("--convert_to_usdc", action="store_true", default=False,
+                        help="Convert the .usda assets of the project at --nucleus_url to .usdc and update its assemblies")
     parser.add_argument("--create_new_usd", action="store_true", default=False)
     parser.add_argument("--find_stp_and_usd_files", action="store_true", default=False)
     parser.add_argument("--find_existing_assemblies", action="store_true", default=False)
+    parser.add_argument("--refresh_project_index", action="store_true", default=False,
+                        help="Update the asset index of the project at --nucleus_url in --index_file, listing only changed folders")
+    parser.add_argument("--index_file", action="store", default=None,
+                        help="Local JSON file of the project index, see project_index.py")
     parser.add_argument("--create_new_project", action="store_true", default=False)
     parser.add_argument("--create_new_asset", action="store_true", default=False)
     parser.add_argument("--assembly_name", action="store")
@@ -1086,19 +1828,33 @@ if __name__ == "__main__":
     parser.add_argument("--custom_checkpoint", nargs ='+', action="store")
     parser.add_argument("--add_checkpoint_to_usd", action="store_true", default=False)
     parser.add_argument("--add_checkpoint_to_non_usd", action="store_true", default=False)
+    parser.add_argument("--print-import-times", "--print_import_times", dest="print_import_times", action="store_true", default=False,
+                        help="Print how long each module import took to stderr after the operation")
 
-    args = parser.parse_args()
+    # Persistent worker mode
+    parser.add_argument("--serve", action="store_true", default=False)
+    parser.add_argument("--port", type=int, action="store", default=0)
+    parser.add_argument("--idle_timeout", type=float, action="store", default=WORKER_IDLE_TIMEOUT)
+    return parser
+
+
+def run_operation(args):
+    global g_stage, logging_enabled
 
     get_prim_reference_xforms = args.get_prim_reference_xforms
     existing_stage = args.nucleus_url
     find_stp_and_usd_files = args.find_stp_and_usd_files
     find_existing_assemblies = args.find_existing_assemblies
+    refresh_project_index = args.refresh_project_index
+    index_file = args.index_file
     nucleus_url = args.nucleus_url
     logging_enabled = args.verbose
     insert_validation_failure = args.fail
     localSTLPath = args.local_directory
     auth_op = args.auth
     auth_project_op = args.auth_project
+    auth_batch_op = args.auth_batch
+    auth_urls = args.auth_urls
     pull_op = args.pull
     push_op = args.push
     test_op = args.test
@@ -1107,7 +1863,20 @@ if __name__ == "__main__":
     logout_op = args.logout
     token = args.token
     local_non_usd_filename = args.local_non_usd_filename
+    mesh_file = args.mesh_file
+    weld_tolerance = args.weld_tolerance
+    force_upload = args.force_upload
+    crease_angle = args.crease_angle
     create_new_usd = args.create_new_usd
+    usd_format = args.usd_format
+    convert_to_usdc = args.convert_to_usdc
+    push_batch = args.push_batch
+    pull_batch = args.pull_batch
+    batch_file = args.batch_file
+    max_uploads = args.max_uploads
+    check_access_op = args.check_access
+    cache_dir = args.cache_dir
+    cache_max_mb = args.cache_max_mb
     project_name = args.project_name
     host_name = args.host_name
     asset_name = args.asset_name
@@ -1126,9 +1895,6 @@ if __name__ == "__main__":
     add_checkpoint_to_usd = args.add_checkpoint_to_usd
     add_checkpoint_to_non_usd = args.add_checkpoint_to_non_usd
 
-    # print(args)
-
-    startOmniverse()
     if not os.path.exists(localSTLPath):
         # If it doesn't exist, create it
         os.makedirs(localSTLPath)
@@ -1137,59 +1903,14 @@ if __name__ == "__main__":
         # LOGGER.info(f"[I] No USD stage specified")
         
 ### AUTHENTICATION FUNCTION
+    if auth_urls and auth_batch_op==True:
+        check_access_batch(auth_urls, 'auth_batch')
+
     if existing_stage and auth_op==True:
-        LOGGER.info(f"Connecting to "+existing_stage)
-        print("Connecting to "+existing_stage)
-        username = logConnectedUsername(existing_stage, output_log=True)
-        if not username:
-            LOGGER.error(f"Cannot access file: {existing_stage}, authentication failed")
-            print("[ERROR] NO_AUTH: Cannot authenticate with "+existing_stage)
-            sys.exit("[ERROR] NO_AUTH: Cannot authenticate with "+existing_stage)
-        acls = omni.client.get_acls(existing_stage)
-        result = acls[0]
-        acl_dict = list(acls[1])
-        does_usd_exist = not str(omni.client.stat(existing_stage)[0]) == 'Result.ERROR_NOT_FOUND'
-        if does_usd_exist == False:
-            print('[ERROR] NOT_FOUND: Provided file link at: \n' +existing_stage+ '\n Cannot be found! Double check link or ensure nucleus server is added to portal.')
-            sys.exit('[ERROR] NOT_FOUND: Provided file link at: \n' +existing_stage+ '\n Cannot be found! Double check link or ensure nucleus server is added to portal.')
-        access = 0
-        for entries in acl_dict:
-            if entries.name == username:
-                stringentry = str(entries)
-                print('You have the following permissions to access this file:')
-                print(stringentry)
-                access+=1
-        if access!=1:
-            print('[ERROR] NO_PERMISSION: Cannot access file: '+ existing_stage)
-            print('[ERROR] You do not have permissions to access this file! Contact your Nucleus administrator.')
-            print('Try logging in under a different username: log out through the nucleus.')
+        check_access(existing_stage, 'auth', target='file')
 
     if existing_stage and auth_project_op==True:
-        LOGGER.info(f"Connecting to "+existing_stage)
-        print("Connecting to "+existing_stage)
-        username = logConnectedUsername(existing_stage, output_log=True)
-        if not username:
-            LOGGER.error(f"Cannot access project directory: {existing_stage}, authentication failed")
-            print("[ERROR] NO_AUTH: Cannot authenticate with "+existing_stage)
-            sys.exit("[ERROR] NO_AUTH: Cannot authenticate with "+existing_stage)
-        acls = omni.client.get_acls(existing_stage)
-        result = acls[0]
-        acl_dict = list(acls[1])
-        does_usd_exist = not str(omni.client.stat(existing_stage)[0]) == 'Result.ERROR_NOT_FOUND'
-        if does_usd_exist == False:
-            print('[ERROR] NOT_FOUND: Provided project directory link at: \n' +existing_stage+ '\n Cannot be found! Double check link or ensure nucleus server is added to portal.')
-            sys.exit('[ERROR] NOT_FOUND: Provided project directory link at: \n' +existing_stage+ '\n Cannot be found! Double check link or ensure nucleus server is added to portal.')
-        access = 0
-        for entries in acl_dict:
-            if entries.name == username:
-                stringentry = str(entries)
-                print('You have the following permissions to access this file:')
-                print(stringentry)
-                access+=1
-        if access!=1:
-            print('[ERROR] NO_PERMISSION: Cannot access project directory file: '+ existing_stage)
-            print('[ERROR] You do not have permissions to access this file! Contact your Nucleus administrator.')
-            print('Try logging in under a different username: log out through the nucleus.')
+        check_access(existing_stage, 'auth_project', target='project directory')
 
     # if existing_stage and logout_op==True:
     #   LOGGER.info(f"Logging out of "+existing_stage)
@@ -1209,7 +1930,7 @@ if __name__ == "__main__":
     elif existing_stage and pull_op==True:
         geom_mesh_prims, geom_mesh_paths = findGeomMesh(existing_stage)
         if not geom_mesh_prims:
-            sys.exit("[ERROR] Unable to find mesh at " + existing_stage)
+            fail('pull', 'NO_MESH', "Unable to find mesh at " + existing_stage)
         geom_mesh_prims = geom_mesh_prims[0]
         geom_mesh_paths = geom_mesh_paths[0]
 
@@ -1219,113 +1940,74 @@ if __name__ == "__main__":
         else:
             local_fname = localSTLPath+'/download.stl'
             checkpoint_descriptor = "NO_TOKEN - Pull to FreeCAD"
-        o3d_triangle_mesh = convertMeshPrimToO3dTriMesh(geom_mesh_prims)
-        # o3d.visualization.draw_geometries([o3d_triangle_mesh])
-        # print(local_fname)
-        o3d.io.write_triangle_mesh(local_fname, o3d_triangle_mesh)
+        mesh_buffers = convertMeshPrimToTriangles(geom_mesh_prims)
+        if mesh_buffers is None:
+            fail('pull', 'USD_INCOMPAT', 'Mesh points could not be read from ' + existing_stage)
+        # Binary STL is what FreeCAD's Mesh module reads fastest, in C++ rather than through Python lists
+        mesh_points, mesh_triangles = mesh_buffers
+        mesh_utils.write_stl(local_fname, mesh_points, mesh_triangles)
         save_stage(existing_stage, comment=checkpoint_descriptor)
-        print(checkpoint_descriptor)
+        emit_result('pull', {'url': existing_stage, 'local_filename': local_fname, 'triangles': len(mesh_triangles), 'checkpoint': checkpoint_descriptor})
 
     elif add_checkpoint_to_usd and nucleus_url and custom_checkpoint:
-        g_stage = Usd.Stage.Open(nucleus_url)
         if token:
             checkpoint_descriptor = str(token) + ' - ' + custom_checkpoint[0]
-            save_stage(nucleus_url, comment=checkpoint_descriptor)
         else:
             checkpoint_descriptor = 'NO_TOKEN - ' + custom_checkpoint[0]
-            save_stage(nucleus_url, comment=checkpoint_descriptor)
+        # Nothing on the stage changes, so it is checkpointed on the server without being opened and saved
+        checkpoint_status, checkpoint_descriptor = createMetadataCheckpoint(nucleus_url, checkpoint_descriptor,
+                                                                            getLatestCheckpointHash(nucleus_url))
+        if checkpoint_status != omni.client.Result.OK:
+            fail('add_checkpoint_to_usd', checkpoint_status.name, 'Cannot write checkpoint to ' + nucleus_url)
+        emit_result('add_checkpoint_to_usd', {'url': nucleus_url, 'checkpoint': checkpoint_descriptor})
 
     elif add_checkpoint_to_non_usd and nucleus_url and custom_checkpoint:
-        read_output_from_nucleus = omni.client.read_file(url=nucleus_url)
-        read_output_content = read_output_from_nucleus[2]
-        read_output_result = read_output_from_nucleus[0]
-
-        read_output_bin = bytearray(read_output_content)
         if token is not None:
             checkpoint_descriptor = str(token) + ' - ' + custom_checkpoint[0]
         else:
             checkpoint_descriptor = 'NO_TOKEN - ' + custom_checkpoint[0]
 
-        upload_result = omni.client.write_file(url=nucleus_url, 
-            content=read_output_bin, 
-            message=checkpoint_descriptor)
+        # The content is unchanged, so keep the hash of the last push for the next one
+        checkpoint_status, checkpoint_descriptor = createMetadataCheckpoint(nucleus_url, checkpoint_descriptor,
+                                                                            getLatestCheckpointHash(nucleus_url))
+        if checkpoint_status != omni.client.Result.OK:
+            fail('add_checkpoint_to_non_usd', checkpoint_status.name, 'Cannot write checkpoint to ' + nucleus_url)
+        emit_result('add_checkpoint_to_non_usd', {'url': nucleus_url, 'checkpoint': checkpoint_descriptor})
 
 ### PUSH FUNCTION
     elif existing_stage and push_op==True:
-        geom_mesh_prims, geom_mesh_paths = findGeomMesh(existing_stage)
-        if not geom_mesh_prims:
-            sys.exit("[ERROR] Unable to find mesh at" + existing_stage)
-        geom_mesh_prims = geom_mesh_prims[0]
-        geom_mesh_paths = geom_mesh_paths[0]
-
         if token is not None:
             local_fname = localSTLPath+'/'+str(token)+'upload.stl'
             checkpoint_descriptor = str(token) + " - Push from FreeCAD"
         else:
             local_fname = localSTLPath+'/upload.stl'
             checkpoint_descriptor = "NO_TOKEN - Push from FreeCAD"
-        new_mesh = o3d.io.read_triangle_mesh(local_fname)
-        o3dToUSDConverter = o3dSTLMesh(new_mesh)
-        geom_mesh_prims = o3dToUSDConverter.convertToUSDGeomMesh(geom_mesh_prims, existing_stage)
-        save_stage(existing_stage, comment=checkpoint_descriptor)
-        print(checkpoint_descriptor)
+        payload = pushMeshToStage(existing_stage, mesh_file or local_fname, checkpoint_descriptor,
+                                  weld_tolerance=weld_tolerance, crease_angle=crease_angle, force_upload=force_upload)
+        emit_result('push', payload)
 
 ### FUNCTION TO CREATE NEW USD
     elif nucleus_url and create_new_usd==True:
-        nucleus_url = createOmniverseModel(nucleus_url, live_edit=False)
-
-        usd_filename=splitURLGetUSDFileName(nucleus_url)
-        prim_name = strip_suffixes(usd_filename)
-        if token is not None:
-            meshPrim = createEmptyMeshPrim(nucleus_url, prim_name, token = token)
-        else:
-            meshPrim = createEmptyMeshPrim(nucleus_url, prim_name)
-
-
         if token is not None:
             local_fname = localSTLPath+'/'+str(token)+'upload.stl'
             checkpoint_descriptor = str(token) + " - Created new asset on FreeCAD"
         else:
             local_fname = localSTLPath+'/upload.stl'
             checkpoint_descriptor = "NO_TOKEN - Created new asset on FreeCAD"
-
-        new_mesh = o3d.io.read_triangle_mesh(local_fname)
-        o3dToUSDConverter = o3dSTLMesh(new_mesh)
-        meshPrim = o3dToUSDConverter.convertToUSDGeomMesh(meshPrim, nucleus_url, empty_prim = True)
-        save_stage(nucleus_url, comment=checkpoint_descriptor)
-        print(checkpoint_descriptor)
+        payload = createStageWithMesh(nucleus_url, mesh_file or local_fname, checkpoint_descriptor, token=token,
+                                      weld_tolerance=weld_tolerance, crease_angle=crease_angle)
+        emit_result('create_new_usd', payload)
 
     elif nucleus_url and find_stp_and_usd_files==True and localSTLPath:
-        folder_url = nucleus_url
-        result, project_folder_contents = omni.client.list(url=folder_url)
-        list_of_stp_urls = []
-        list_of_usd_urls = []
-        for folder_items in project_folder_contents:
-            result, resolved_folder_info, resolved_absolute_url= omni.client.resolve(url=folder_items.relative_path, search_urls=[folder_url])
-            if 'assembly' not in resolved_absolute_url:
-                result, asset_folder_contents = omni.client.list(url=resolved_absolute_url)
-                for asset_items in asset_folder_contents:
-                    result, resolved_item_folder_info, resolved_item_folder_absolute_url= omni.client.resolve(url=asset_items.relative_path, search_urls=[resolved_absolute_url])
-                    result, single_asset_folder_contents = omni.client.list(url=resolved_item_folder_absolute_url)
-                    for stp_or_usd_file in single_asset_folder_contents:
-                        result, resolved_item_usd_or_stp_folder_info, resolved_item_usd_or_stp_absolute_url= omni.client.resolve(url=stp_or_usd_file.relative_path, search_urls=[resolved_item_folder_absolute_url])
-                        if ".stp" in resolved_item_usd_or_stp_absolute_url:
-                            list_of_stp_urls.append(resolved_item_usd_or_stp_absolute_url)
-                        if ".usd" in resolved_item_usd_or_stp_absolute_url:
-                            list_of_usd_urls.append(resolved_item_usd_or_stp_absolute_url)
+        stp_records, usd_records, scan_failed = project_scan.find_asset_files(nucleus_url)
+        reportScanFailures('find_stp_and_usd_files', nucleus_url, scan_failed)
+        list_of_stp_urls = [record['url'] for record in stp_records]
+        list_of_usd_urls = [record['url'] for record in usd_records]
         if list_of_usd_urls == []:
-            print('[ERROR] No USD files found!')
+            log_message('[WARN] No USD files found!')
         if list_of_stp_urls ==[]:
-            print('[ERROR] No STP files found!')
-        local_file_path = localSTLPath
-        local_step_list_txt = localSTLPath + '/stplist.txt'
-        local_usd_list_txt = localSTLPath + '/usdlist.txt'
-        with open(local_step_list_txt, 'w') as stp_file_txt:
-            for stp_link in list_of_stp_urls:
-                stp_file_txt.write(stp_link + '\n')
-        with open(local_usd_list_txt, 'w') as usd_file_txt:
-            for usd_link in list_of_usd_urls:
-                usd_file_txt.write(usd_link + '\n')
+            log_message('[WARN] No STP files found!')
+        emit_result('find_stp_and_usd_files', {'stp_urls': list_of_stp_urls, 'usd_urls': list_of_usd_urls})
 
 ### FUNC TO CREATE NEW PROJECT
     elif create_new_project ==True and project_name and host_name:
@@ -1338,19 +2020,18 @@ if __name__ == "__main__":
         elif make_public==True:
             newpath = '/Projects/'+str(app_name)+'/'+str(project_name)
         new_url = omni.client.make_url(scheme = 'omniverse', host = host_name, path = newpath)
-        print(new_url)
+        log_message(new_url)
         result = createEmptyFolder(new_url)
         if result != 'OK':
             if result =='ERROR_CONNECTION':
-                stringError = 'ERROR: '+ str(result) + ' Failed to connect to '+ base_url
-            else:
-                stringError = 'ERROR: '+ str(result)
-            print(stringError)
+                fail('create_new_project', result, 'Failed to connect to '+ base_url)
+            fail('create_new_project', result, 'Failed to create project folder '+ new_url)
+        emit_result('create_new_project', {'project_url': new_url})
 
 ### FUNC TO CREATE NEW ASSET
     elif create_new_asset ==True and asset_name:
         if host_name and project_name:
-            print('Creating new asset at host: '+ host_name+' project name: '+ project_name)
+            log_message('Creating new asset at host: '+ host_name+' project name: '+ project_name)
             base_url = omni.client.make_url(scheme = 'omniverse', host = host_name)
             app_name = 'FreeCAD'
             username = None
@@ -1361,24 +2042,23 @@ if __name__ == "__main__":
                 asset_path = '/Projects/'+str(app_name)+'/'+str(project_name)+'/assets/'+str(asset_name)
             asset_path_url = omni.client.make_url(scheme = 'omniverse', host = host_name, path = asset_path)
         elif nucleus_url:
-            print('Creating new asset at existing project: ', nucleus_url)
+            log_message('Creating new asset at existing project: ' + nucleus_url)
             asset_path_url = nucleus_url +'/assets/'+str(asset_name)
             asset_path_url_item = omni.client.break_url(url = asset_path_url)
             asset_path = str(asset_path_url_item.path)
             
         result = createEmptyFolder(asset_path_url)
         if result != 'OK':
-            print('ERROR: Asset with this name already exists! '+str(result))
-            exit()
+            fail('create_new_asset', result, 'Asset with this name already exists! '+str(result))
         else:
             if host_name and project_name:
-                full_usd_asset_url = asset_path+'/'+asset_name+'.usda'
+                full_usd_asset_url = asset_path+'/'+asset_name+'.'+usd_format
                 full_stp_asset_url = asset_path+'/'+asset_name+'.stp'
 
                 full_usd_asset_url = omni.client.make_url(scheme = 'omniverse', host = host_name, path = full_usd_asset_url)
                 full_stp_asset_url = omni.client.make_url(scheme = 'omniverse', host = host_name, path = full_stp_asset_url)
             elif nucleus_url:
-                full_usd_asset_url = asset_path_url + '/'+asset_name+'.usda'
+                full_usd_asset_url = asset_path_url + '/'+asset_name+'.'+usd_format
                 full_stp_asset_url = asset_path_url + '/'+asset_name+'.stp'
             # Create new USD file
             full_usd_asset_url = createOmniverseModel(full_usd_asset_url, live_edit=False)
@@ -1398,14 +2078,12 @@ if __name__ == "__main__":
                 checkpoint_descriptor = "NO_TOKEN - Created new asset on FreeCAD"
 
             save_stage(full_usd_asset_url, comment=checkpoint_descriptor)
-            print(checkpoint_descriptor)
+            log_message(checkpoint_descriptor)
 
             placeholder_bin_data = str.encode('EMPTY_FILE')
             upload_result = omni.client.write_file(url=full_stp_asset_url, content=placeholder_bin_data, message=checkpoint_descriptor)
-            print('STP write to Nucleus: ' +str(upload_result))
-            #DO NOT UNCOMMENT!!!
-            print(full_stp_asset_url)
-            print(full_usd_asset_url)
+            log_message('STP write to Nucleus: ' +str(upload_result))
+            emit_result('create_new_asset', {'stp_url': full_stp_asset_url, 'usd_url': full_usd_asset_url, 'checkpoint': checkpoint_descriptor})
 
     elif create_new_assembly ==True and nucleus_url:
         #parse url and make new assembly folder if it doesn't exist
@@ -1415,9 +2093,9 @@ if __name__ == "__main__":
 
         # if assembly name wasn't provided, assign a name to it and create a new omniverse stage
         if assembly_name:
-            assembly_usd_url = assembly_folder_url+ '/'+ str(assembly_name)+'.usda'
+            assembly_usd_url = assembly_folder_url+ '/'+ str(assembly_name)+'.'+usd_format
         else:
-            assembly_usd_url = assembly_folder_url+'/assembly.usda'
+            assembly_usd_url = assembly_folder_url+'/assembly.'+usd_format
         assembly_usd_url = createOmniverseModel(assembly_usd_url, live_edit=False)
         if token is not None:
             save_stage(assembly_usd_url, comment = str(token) + ' - Created new assembly file')
@@ -1427,32 +2105,21 @@ if __name__ == "__main__":
         default_prim_path = g_stage.GetDefaultPrim().GetPath().pathString
 
         # searching for components to make assembly from
+        list_of_stp_urls = []
+        list_of_usd_urls = []
         if not asset_usd_links or not asset_stp_links: #if all of the project components are selected
-            list_of_stp_urls = []
-            list_of_usd_urls = []
-            result, project_folder_contents = omni.client.list(url=project_url)#looking for the 'assets' folder
-            for folder_items in project_folder_contents:
-                # TODO: ERROR HANDLING IF RESULT NOT OK!
-                result, resolved_folder_info, resolved_absolute_url= omni.client.resolve(url=folder_items.relative_path, search_urls=[folder_url]) #getting the full URL of the 'assets' folder
-                if 'assembly' not in resolved_absolute_url:
-                    result, asset_folder_contents = omni.client.list(url=resolved_absolute_url) #looking for a list of available assets in the assets folder
-                    for asset_items in asset_folder_contents:
-                        result, resolved_item_folder_info, resolved_item_folder_absolute_url= omni.client.resolve(url=asset_items.relative_path, search_urls=[resolved_absolute_url]) #getting full URL of component folder
-                        result, single_asset_folder_contents = omni.client.list(url=resolved_item_folder_absolute_url) #listing the available USD and STP files in the folder
-                        for stp_or_usd_file in single_asset_folder_contents:
-                            result, resolved_item_usd_or_stp_folder_info, resolved_item_usd_or_stp_absolute_url= omni.client.resolve(url=stp_or_usd_file.relative_path, search_urls=[resolved_item_folder_absolute_url]) #getting the full URL of STP and USD files in the asset folder
-                            if ".stp" in resolved_item_usd_or_stp_absolute_url:
-                                list_of_stp_urls.append(resolved_item_usd_or_stp_absolute_url)
-                            if ".usd" in resolved_item_usd_or_stp_absolute_url:
-                                list_of_usd_urls.append(resolved_item_usd_or_stp_absolute_url)
+            stp_records, usd_records, scan_failed = project_scan.find_asset_files(project_url)
+            reportScanFailures('create_new_assembly', project_url, scan_failed)
+            list_of_stp_urls = [record['url'] for record in stp_records]
+            list_of_usd_urls = [record['url'] for record in usd_records]
 
         elif asset_usd_links and asset_stp_links: #alternate scenario where user wants to create assembly from specific items (read usd list or something)
             if len(asset_usd_links)==len(asset_stp_links):
                 list_of_stp_urls = asset_stp_links
                 list_of_usd_urls = asset_usd_links
 
+        prim_name_list = []
         if list_of_stp_urls and list_of_usd_urls:
-            prim_name_list = []
             prim_list = []
             for asset_usd_link in list_of_usd_urls:
                 usd_filename=splitURLGetUSDFileName(asset_usd_link)
@@ -1463,34 +2130,48 @@ if __name__ == "__main__":
                 else:
                     XformPrim = createXformWithReference(assembly_usd_url, prim_name, asset_usd_link)
             # print(prim_name_list)
-        print(assembly_usd_url)
+        emit_result('create_new_assembly', {'assembly_url': assembly_usd_url, 'components': prim_name_list})
+    elif push_batch==True and batch_file:
+        try:
+            with open(batch_file) as f:
+                batch_items = json.load(f)['items']
+        except (IOError, ValueError, KeyError) as e:
+            fail('push_batch', 'BAD_BATCH_FILE', f'Cannot read batch file {batch_file}: {e}')
+        payload = pushBatch(batch_items, token=token, weld_tolerance=weld_tolerance, crease_angle=crease_angle,
+                            force_upload=force_upload, max_workers=max_uploads, check_access=check_access_op)
+        emit_result('push_batch', payload, code='OK' if not payload['failed'] else 'PARTIAL')
+
+    elif convert_to_usdc==True and nucleus_url:
+        converted, updated_assemblies, failed, kept_originals = convertAssetsToUSDC(nucleus_url, token=token)
+        if not converted and failed:
+            fail('convert_to_usdc', 'CONVERSION_FAILED', 'Unable to convert the assets of ' + nucleus_url)
+        emit_result('convert_to_usdc', {'project_url': nucleus_url, 'converted': converted,
+                                        'assemblies': updated_assemblies, 'failed': failed, 'kept_originals': kept_originals},
+                    code='OK' if not failed else 'PARTIAL')
+
     elif find_existing_assemblies==True and nucleus_url:
         #test opening existing assembly
         #find existing assemblies 
         project_url = nucleus_url
+        assembly_records, scan_failed = project_scan.find_assembly_files(project_url)
+        reportScanFailures('find_existing_assemblies', project_url, scan_failed)
+        list_of_usd_urls = [record['url'] for record in assembly_records]
+        emit_result('find_existing_assemblies', {'assembly_urls': list_of_usd_urls})
 
-        result, project_folder_contents = omni.client.list(url=project_url)
-        list_of_stp_urls = []
-        list_of_usd_urls = []
-
-        for folder_items in project_folder_contents:
-            # TODO: ERROR HANDLING IF RESULT NOT OK!
-            result, resolved_folder_info, resolved_absolute_url= omni.client.resolve(url=folder_items.relative_path, search_urls=[project_url])
-            if 'assembly' in resolved_absolute_url:
-                result, assembly_folder_contents = omni.client.list(url=resolved_absolute_url)
-                for assembly_item_file in assembly_folder_contents:
-                     result, resolved_item_info, resolved_item_absolute_url= omni.client.resolve(url=assembly_item_file.relative_path, search_urls=[resolved_absolute_url])
-                     if ".usd" in resolved_item_absolute_url:
-                        print(resolved_item_absolute_url)
-                        list_of_usd_urls.append(resolved_item_absolute_url)
+    elif refresh_project_index==True and nucleus_url and index_file:
+        index, stats, scan_failed = project_index.refresh_index(nucleus_url, index_file, watch=g_serving)
+        reportScanFailures('refresh_project_index', nucleus_url, scan_failed)
+        emit_result('refresh_project_index', dict(stats, project_url=nucleus_url, index_file=index_file,
+                                                  entries=len(index['entries'])))
 
     elif get_prim_reference_xforms ==True and nucleus_url:
         #func to get location, attitude, and reference of items in a assembly USD
         assembly_url = nucleus_url
         if token is not None:
-            get_all_xform_reference_paths(assembly_url, token = token)
+            prim_data = get_all_xform_reference_paths(assembly_url, token = token)
         else:
-            get_all_xform_reference_paths(assembly_url)
+            prim_data = get_all_xform_reference_paths(assembly_url)
+        emit_result('get_prim_reference_xforms', {'url': assembly_url, 'prims': prim_data})
     elif move_assembly ==True and set_rot_xyz and set_transform and asset_usd_links:
         # func to set location and rotation for individual items in a given assembly USD
         # print(args)
@@ -1500,47 +2181,23 @@ if __name__ == "__main__":
         set_transform = parse_srt_list(set_transform)
         prim_data = parse_srt_and_ref_into_dict(set_transform, set_rot_xyz, asset_usd_links)
         if token is not None:
-            set_xform_srt_from_reference_asset_path(assembly_url, prim_data, token = token)
+            moved_count = set_xform_srt_from_reference_asset_path(assembly_url, prim_data, token = token)
         else:
-            set_xform_srt_from_reference_asset_path(assembly_url, prim_data)
+            moved_count = set_xform_srt_from_reference_asset_path(assembly_url, prim_data)
+        emit_result('move_assembly', {'url': assembly_url, 'moved': moved_count})
  
     elif nucleus_url and push_non_usd ==True and local_non_usd_filename:
-        local_upload_file_path = local_non_usd_filename
-        try:
-            with open(local_upload_file_path, "rb") as local_bin_f:
-                bin_data = local_bin_f.read()
-                print(f'Read {len(bin_data)} bytes from {local_upload_file_path} OK')
-                data = bytearray(bin_data)
-                print(f'Converted to bytearray: {len(data)} bytes')
-
-                # Confirm the data length matches the file size
-                if len(data) != len(bin_data):
-                    print("[ERROR] Byte array length does not match file size")
-        except FileNotFoundError:
-            print('[ERROR] FileNotFoundError. Check file name.')
-
         if custom_checkpoint is not None:
             checkpoint_descriptor = str(token) + ' - ' + custom_checkpoint[0]
         else:
             checkpoint_descriptor = (str(token) if token is not None else "NO_TOKEN") + " - Push from FreeCAD"
 
-        # Attempt to write to Nucleus and print result
-        upload_result = omni.client.write_file_ex(
-            url=nucleus_url, 
-            content=bin_data, 
-            message=checkpoint_descriptor
-        )
-        print('Write to Nucleus: ' + str(upload_result))
-        local_bin_f.close()
+        # A custom checkpoint is an explicit request for a new version, so it is never skipped
+        payload = pushFileToNucleus(nucleus_url, local_non_usd_filename, checkpoint_descriptor,
+                                    force_upload=force_upload or custom_checkpoint is not None)
+        emit_result('push_non_usd', payload)
 
     elif nucleus_url and pull_non_usd==True and local_non_usd_filename:
-        local_download_file_path = local_non_usd_filename
-        local_bin_f = open(local_download_file_path, 'wb')
-        read_output_from_nucleus = omni.client.read_file(url=nucleus_url)
-        read_output_content = read_output_from_nucleus[2]
-        read_output_result = read_output_from_nucleus[0]
-        print('Read from Nucleus: '+ str(read_output_result))
-        read_output_bin = bytearray(read_output_content)
         if custom_checkpoint is not None:
             checkpoint_descriptor = str(token) + ' - ' + custom_checkpoint[0] 
         else:
@@ -1548,19 +2205,162 @@ if __name__ == "__main__":
                 checkpoint_descriptor = str(token) + " - Pull to FreeCAD"
             else:
                 checkpoint_descriptor = "NO_TOKEN - Pull to FreeCAD"
+        cache = download_cache.DownloadCache(cache_dir, cache_max_mb * 1024 ** 2) if cache_dir else None
+        payload = pullFileFromNucleus(nucleus_url, local_non_usd_filename, checkpoint_descriptor, cache=cache)
+        emit_result('pull_non_usd', payload)
+
+    elif pull_batch==True and batch_file:
+        try:
+            with open(batch_file) as f:
+                batch_items = json.load(f)['items']
+        except (IOError, ValueError, KeyError) as e:
+            fail('pull_batch', 'BAD_BATCH_FILE', f'Cannot read batch file {batch_file}: {e}')
+        if custom_checkpoint is not None:
+            checkpoint_descriptor = str(token) + ' - ' + custom_checkpoint[0]
+        else:
+            checkpoint_descriptor = (str(token) if token is not None else "NO_TOKEN") + " - Pull to FreeCAD"
+        cache = download_cache.DownloadCache(cache_dir, cache_max_mb * 1024 ** 2) if cache_dir else None
+        payload = pullBatch(batch_items, checkpoint_descriptor, cache=cache, max_workers=max_uploads, check_access=check_access_op)
+        emit_result('pull_batch', payload, code='OK' if not payload['failed'] else 'PARTIAL')
+
+
+class ProgressForwardingBuffer(io.StringIO):
+    """
+    Captures the stdout of a worker request and hands every progress record to forward as it is written.
+
+    emit_record writes each record with a single write call, so records never arrive split across writes.
+    """
+    def __init__(self, forward=None):
+        super().__init__()
+        self.forward = forward
+
+    def write(self, text):
+        if self.forward is not None and RECORD_PROGRESS in text:
+            for line in text.splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("type") == RECORD_PROGRESS:
+                    self.forward(record)
+        return super().write(text)
+
+
+def handle_worker_request(parser, request, forward_progress=None):
+    """
+    Runs a single operation requested through the worker socket.
 
+    stdout and stderr are captured per request so that the client receives the same
+    records it would get from a one-shot run of this script. Progress records are also
+    passed to forward_progress while the operation runs. Failures that escape the
+    operation are turned into error records.
+    """
+    global g_stage
+    stdout_buffer, stderr_buffer = ProgressForwardingBuffer(forward_progress), io.StringIO()
+    exit_code = 0
+    args = None
+    with contextlib.redirect_stdout(stdout_buffer), contextlib.redirect_stderr(stderr_buffer):
+        try:
+            args = parser.parse_args(request.get("argv", []))
+            if args.serve:
+                fail('serve', 'WORKER', '--serve cannot be requested from a running worker.')
+            run_operation(args)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                emit_error('worker', 'EXIT', str(e.code))
+                exit_code = 1
+        except Exception as e:
+            traceback.print_exc()
+            emit_error('worker', 'EXCEPTION', repr(e))
+            exit_code = 1
+        if args is not None and args.print_import_times:
+            print_import_report()
+    # Release the stage so the next request re-opens it from Nucleus
+    g_stage = None
+    return {
+        "id": request.get("id"),
+        "exit_code": exit_code,
+        "stdout": stdout_buffer.getvalue(),
+        "stderr": stderr_buffer.getvalue(),
+    }
+
+
+def serve_requests(parser, port=0, idle_timeout=WORKER_IDLE_TIMEOUT):
+    """
+    Keeps omni.client and the USD modules loaded and answers operations sent over a local socket.
+
+    A ``ready`` record carrying the port is written to stdout once the socket listens.
+    Each request is one JSON line ``{"id": ..., "argv": [...]}`` where argv holds the same
+    arguments the script accepts on the command line. While it runs, every progress record
+    is sent straight away as ``{"id": ..., "progress": {...}}``. The response that ends the
+    request is one JSON line with ``id``, ``exit_code``, ``stdout`` (all JSON-lines records,
+    progress included) and ``stderr``. ``{"shutdown": true}`` stops the worker.
+    """
+    global g_serving
+    g_serving = True
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", port))
+    server.listen(1)
+    server.settimeout(idle_timeout)
+    emit_record({"type": RECORD_READY, "op": "serve", "payload": {"port": server.getsockname()[1]}})
+    LOGGER.info("Worker listening on port %s", server.getsockname()[1])
+
+    # Import the mesh and USD modules while idle so the first push does not pay for them
+    threading.Thread(target=preload, args=(Usd, UsdGeom, Sdf, Gf, Kind, Tf, np, mesh_utils, xform_utils), daemon=True).start()
+
+    running = True
+    while running:
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            LOGGER.info("Worker idle for %s seconds, shutting down", idle_timeout)
+            break
+        with conn:
+            conn.settimeout(idle_timeout)
+            reader = conn.makefile("r", encoding="utf-8")
+            try:
+                for line in reader:
+                    if not line.strip():
+                        continue
+                    request = json.loads(line)
+                    if request.get("shutdown"):
+                        running = False
+                        break
+                    def forward_progress(record, request_id=request.get("id")):
+                        # Records are written under the emit lock, so sends from batch threads do not interleave
+                        try:
+                            conn.sendall((json.dumps({"id": request_id, "progress": record}) + "\n").encode("utf-8"))
+                        except OSError:
+                            # The lost connection is reported when the response is sent
+                            pass
+                    response = handle_worker_request(parser, request, forward_progress)
+                    conn.sendall((json.dumps(response) + "\n").encode("utf-8"))
+            except socket.timeout:
+                LOGGER.info("Worker idle for %s seconds, shutting down", idle_timeout)
+                running = False
+            except (OSError, ValueError) as e:
+                LOGGER.warning("Dropped worker connection: %s", e)
+    server.close()
+    project_index.stop_watchers()
+    g_serving = False
+
+
+if __name__ == "__main__":
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    logging_enabled = args.verbose
+
+    startOmniverse()
+
+    if args.serve:
+        serve_requests(parser, port=args.port, idle_timeout=args.idle_timeout)
+        shutdownOmniverse()
+    else:
         try:
-            local_bin_f.write(read_output_bin)
-            print('Write to '+local_download_file_path+' OK')
-            upload_result = omni.client.write_file(url=nucleus_url, 
-                content=read_output_bin, 
-                message=checkpoint_descriptor)
-
-        except FileNotFoundError:
-            print('[ERROR] FileNotFoundError. Check file name.')
-            os.makedirs(os.path.dirname(local_download_file_path), exist_ok=True)
-            local_bin_f.write(read_output_bin)
-            print('Write to '+local_download_file_path+' OK')
-        local_bin_f.close()
-
-    shutdownOmniverse()
\ No newline at end of file
+            run_operation(args)
+        finally:
+            if args.print_import_times:
+                print_import_report()
+        shutdownOmniverse()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# Content hashes used by connectSampleLib.py to skip unchanged uploads.
+#
+# A push records the hash of what it uploaded: as customData on the USD mesh
+# prim, and at the end of the Nucleus checkpoint comment of STEP files. The
+# next push hashes its local files the same way and leaves Nucleus untouched
+# when the hashes match.
+#
+###############################################################################
+
+import hashlib
+import os
+import re
+
+HASH_ALGORITHM = 'sha256'
+# Bumped whenever a hash function changes what it hashes, so tags written by older versions never match.
+# Version 1 tags ([sha256:...]) joined STEP lines without a separator.
+HASH_VERSION = 2
+HASH_TAG = f'{HASH_ALGORITHM}v{HASH_VERSION}'
+# customData key on the mesh prim
+USD_HASH_KEY = 'freecadContentHash'
+# Suffix appended to STEP checkpoint comments, e.g. "abc123 - Push from FreeCAD [sha256v2:...]"
+CHECKPOINT_HASH_PATTERN = re.compile(r'\[' + HASH_TAG + r':([0-9a-f]{64})\]')
+
+# Read files in blocks so large STEP files are not held in memory twice
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def format_checkpoint_hash(content_hash):
+    return f'[{HASH_TAG}:{content_hash}]'
+
+
+def parse_checkpoint_hash(comment):
+    match = CHECKPOINT_HASH_PATTERN.search(comment or '')
+    return match.group(1) if match else None
+
+
+def hash_step_file(path):
+    """
+    Hashes the DATA section of a STEP file. The HEADER section holds the export
+    time, so hashing the whole file would never match between two exports.
+    Line endings are normalised, but every line still ends in a separator, so
+    moving text across a line break changes the hash.
+    """
+    digest = hashlib.new(HASH_ALGORITHM)
+    in_data = False
+    with open(path, 'rb') as f:
+        for line in f:
+            if not in_data:
+                in_data = line.strip().upper() == b'DATA;'
+                continue
+            digest.update(line.rstrip(b'\r\n'))
+            digest.update(b'\n')
+    if not in_data:
+        # Not a STEP file we understand: fall back to every byte
+        return hash_file(path)
+    return digest.hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.new(HASH_ALGORITHM)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_mesh_file(path, options=()):
+    """
+    Hashes a mesh exported by the workbench: every .npy array of a mesh bundle
+    (including all levels of detail), or the bytes of an STL file.
+
+    Args:
+        path (str): Mesh bundle directory or STL file.
+        options (tuple): Settings that change the USD written from the same mesh
+            (e.g. weld tolerance), so changing them is not mistaken for no change.
+    """
+    if not os.path.isdir(path):
+        digest = hashlib.new(HASH_ALGORITHM, hash_file(path).encode())
+    else:
+        digest = hashlib.new(HASH_ALGORITHM)
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.endswith('.npy'):
+                    continue
+                # Relative names keep the hash independent of the token in the directory name
+                digest.update(os.path.relpath(os.path.join(root, name), path).replace(os.sep, '/').encode())
+                with open(os.path.join(root, name), 'rb') as f:
+                    for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                        digest.update(block)
+    digest.update(repr(tuple(options)).encode())
+    return digest.hexdigest()
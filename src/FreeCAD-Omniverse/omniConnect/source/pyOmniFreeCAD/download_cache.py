@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# On-disk cache of files downloaded from Nucleus by connectSampleLib.py.
+#
+# Entries are keyed by the Nucleus URL together with the version tag of the
+# remote file (see remote_version_tag), so a stat is enough to tell whether a
+# cached copy is still current. Files are evicted least recently used first
+# once the cache grows past its size limit. The cache lives outside
+# session_local, so clearing the session keeps it.
+#
+#   <cache_dir>/
+#       <sha256 of url and version tag><extension>
+#
+###############################################################################
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+
+def remote_version_tag(list_entry):
+    """
+    Returns a tag that changes whenever the content of a Nucleus file changes.
+
+    Args:
+        list_entry: omni.client.ListEntry from omni.client.stat.
+
+    Returns:
+        str: The content hash reported by the server, or its version, size and modification time if it has none.
+    """
+    if getattr(list_entry, 'hash', None):
+        return 'hash:' + list_entry.hash
+    return 'version:{}:{}:{}'.format(getattr(list_entry, 'version', ''), list_entry.size, list_entry.modified_time)
+
+
+class DownloadCache:
+    """
+    Least recently used cache of downloaded files, bounded by their total size.
+
+    A hit refreshes the modification time of the entry, which is what eviction sorts by.
+    """
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, url, version_tag, extension):
+        key = hashlib.sha256(f'{url}\0{version_tag}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + extension)
+
+    def get(self, url, version_tag, extension=''):
+        """
+        Returns the path of the cached copy of a file version, or None on a miss.
+        """
+        path = self._entry_path(url, version_tag, extension)
+        with self.lock:
+            try:
+                os.utime(path)
+            except OSError:
+                return None
+        return path
+
+    def put(self, url, version_tag, source_path, extension=''):
+        """
+        Copies a downloaded file into the cache and evicts old entries if the cache is over its limit.
+
+        Returns:
+            str: Path of the cache entry.
+        """
+        path = self._entry_path(url, version_tag, extension)
+        # Copy next to the entry and swap it in, so a reader never sees half a file
+        fd, tmp_path = tempfile.mkstemp(prefix='.download_', suffix='.tmp', dir=self.directory)
+        os.close(fd)
+        try:
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.evict(keep=path)
+        return path
+
+    def retag(self, url, old_version_tag, new_version_tag, extension=''):
+        """
+        Moves an entry to a new version tag, e.g. after a checkpoint changed the tag but not the content.
+
+        Returns:
+            str: Path of the entry under the new tag, or None if there was no entry under the old one.
+        """
+        old_path = self._entry_path(url, old_version_tag, extension)
+        new_path = self._entry_path(url, new_version_tag, extension)
+        if old_path == new_path:
+            return self.get(url, new_version_tag, extension)
+        with self.lock:
+            try:
+                os.replace(old_path, new_path)
+                os.utime(new_path)
+            except OSError:
+                return None
+        return new_path
+
+    def evict(self, keep=None):
+        # Removes the least recently used entries until the cache fits in max_bytes
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat_result = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat_result.st_mtime, stat_result.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# Deferred module imports for connectSampleLib.py.
+#
+# numpy and the pxr stack take seconds to import, but most operations
+# (auth checks, folder listings, checkpoints on STEP files) only need
+# omni.client. A LazyModule stands in for a module and imports it the first
+# time one of its attributes is used, recording how long the import took.
+#
+###############################################################################
+
+import contextlib
+import importlib
+import sys
+import threading
+import time
+
+PROCESS_START = time.perf_counter()
+
+# (module name, seconds, lazy) in the order the imports happened
+_import_times = []
+_import_lock = threading.RLock()
+
+
+def record_import_time(name, seconds, lazy):
+    _import_times.append((name, seconds, lazy))
+
+
+@contextlib.contextmanager
+def import_timer(name):
+    """Times an eager import so it shows up in the import report."""
+    start = time.perf_counter()
+    yield
+    record_import_time(name, time.perf_counter() - start, False)
+
+
+class LazyModule:
+    """
+    Proxy that imports a module on first attribute access.
+
+    Args:
+        name (str): Dotted module name, e.g. 'pxr.Usd'.
+        companions (tuple): LazyModules imported right after this one, for modules
+            that must be loaded together (e.g. the Omniverse USD resolver with pxr).
+    """
+    def __init__(self, name, companions=()):
+        self.__dict__['_name'] = name
+        self.__dict__['_companions'] = tuple(companions)
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is not None:
+            return module
+        with _import_lock:
+            if self.__dict__['_module'] is None:
+                start = time.perf_counter()
+                module = importlib.import_module(self._name)
+                record_import_time(self._name, time.perf_counter() - start, True)
+                self.__dict__['_module'] = module
+                for companion in self._companions:
+                    companion._load()
+        return self.__dict__['_module']
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f'<LazyModule {self._name} ({state})>'
+
+
+def is_loaded(lazy_module):
+    return lazy_module.__dict__['_module'] is not None
+
+
+def preload(*lazy_modules):
+    # Used by the worker to warm up heavy modules while it waits for requests
+    for lazy_module in lazy_modules:
+        lazy_module._load()
+
+
+def format_import_report():
+    """
+    Returns the import timings as human readable lines, slowest first.
+    """
+    lines = ['Import times:']
+    total = 0.0
+    for name, seconds, lazy in sorted(_import_times, key=lambda entry: -entry[1]):
+        total += seconds
+        kind = 'lazy' if lazy else 'eager'
+        lines.append(f'  {name:<24} {seconds * 1000:9.1f} ms  ({kind})')
+    lines.append(f'  {"total":<24} {total * 1000:9.1f} ms')
+    lines.append(f'  {"since process start":<24} {(time.perf_counter() - PROCESS_START) * 1000:9.1f} ms')
+    return lines
+
+
+def print_import_report(file=None):
+    file = file if file is not None else sys.stderr
+    for line in format_import_report():
+        print(line, file=file, flush=True)
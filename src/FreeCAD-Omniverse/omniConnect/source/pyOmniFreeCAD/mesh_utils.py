@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# numpy mesh helpers for connectSampleLib.py.
+#
+# The workbench tessellates the selected shape itself and saves the result as
+# a bundle of .npy files in session_local. The worker memory-maps them and
+# hands them to USD, so a push needs no intermediate STL file, and the arrays
+# are never parsed or copied into Python lists.
+#
+#   <token>upload_mesh/
+#       points.npy     float32 (N, 3)  vertex positions in mm
+#       triangles.npy  int32   (M, 3)  indices into points, one row per triangle
+#       normals.npy    float32 (N, 3)  optional, computed by the worker if absent
+#
+# When several levels of detail are pushed, the directory holds one such bundle
+# per level instead, lod0 (finest) to lod<N> (coarsest).
+#
+# STL files (written by older versions of the workbench, and by --pull) are
+# read and written here too, binary STL through a memory-mapped structured array.
+#
+###############################################################################
+
+import os
+import re
+
+import numpy as np
+
+MESH_BUFFER_ARRAYS = ('points', 'triangles', 'normals')
+
+# Binary STL: 80 byte header, uint32 triangle count, then one 50 byte record per triangle
+STL_HEADER_SIZE = 84
+STL_RECORD_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attributes', '<u2'),
+])
+
+# Vertices closer than this (mm) are merged before writing USD. 0 disables welding.
+DEFAULT_WELD_TOLERANCE = 1e-4
+# Corners whose face turns away from the smoothed vertex normal by more than this (degrees) keep the face normal
+DEFAULT_CREASE_ANGLE = 30.0
+
+
+def is_mesh_bundle(path):
+    return os.path.isfile(os.path.join(str(path), 'points.npy'))
+
+
+def list_lod_bundles(path):
+    """
+    Returns (name, path) of each level of detail bundle in a mesh directory, finest first.
+    Empty if the directory holds a single mesh.
+    """
+    if not os.path.isdir(path) or is_mesh_bundle(path):
+        return []
+    names = [name for name in os.listdir(path)
+             if re.fullmatch(r'lod\d+', name) and is_mesh_bundle(os.path.join(path, name))]
+    return [(name, os.path.join(path, name)) for name in sorted(names, key=lambda name: int(name[3:]))]
+
+
+def load_mesh_buffers(path):
+    """
+    Memory-maps a mesh bundle saved by the workbench.
+
+    Args:
+        path (str): Bundle directory written by ExportMeshForUpload.
+
+    Returns:
+        tuple: (points, triangles, normals) as read-only (N, 3), (M, 3) and (N, 3) arrays. normals is None if the bundle has none.
+    """
+    arrays = {}
+    for name in MESH_BUFFER_ARRAYS:
+        array_path = os.path.join(path, name + '.npy')
+        if os.path.isfile(array_path):
+            arrays[name] = np.load(array_path, mmap_mode='r')
+    points, triangles, normals = arrays['points'], arrays['triangles'], arrays.get('normals')
+    if triangles.size and (triangles.min() < 0 or triangles.max() >= len(points)):
+        raise ValueError(f'Triangle indices out of range in {path}')
+    if normals is not None and normals.shape != points.shape:
+        raise ValueError(f'Normals do not match points in {path}')
+    return points, triangles, normals
+
+
+def read_stl(path):
+    """
+    Reads a binary or ASCII STL file as triangle soup.
+
+    Returns:
+        tuple: (points, triangles) with three points per triangle, (3M, 3) float32 and (M, 3) int32
+    """
+    if _is_binary_stl(path):
+        if os.path.getsize(path) == STL_HEADER_SIZE:
+            return np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.int32)
+        records = np.memmap(path, dtype=STL_RECORD_DTYPE, mode='r', offset=STL_HEADER_SIZE)
+        points = np.array(records['vertices'], dtype=np.float32).reshape(-1, 3)
+        del records
+    else:
+        points = _read_ascii_stl_points(path)
+    triangles = np.arange(len(points), dtype=np.int32).reshape(-1, 3)
+    return points, triangles
+
+
+def write_stl(path, points, triangles):
+    """
+    Writes a triangle mesh as binary STL, with normals computed from the triangle winding.
+    """
+    points = np.asarray(points)
+    triangles = np.asarray(triangles)
+    records = np.zeros(len(triangles), dtype=STL_RECORD_DTYPE)
+    records['normal'] = compute_triangle_normals(points, triangles)
+    records['vertices'] = points[triangles]
+    header = np.zeros(STL_HEADER_SIZE, dtype=np.uint8)
+    header[:80] = np.frombuffer(b'Binary STL written by mesh_utils.py'.ljust(80), dtype=np.uint8)
+    header[80:] = np.frombuffer(np.array(len(records), dtype='<u4').tobytes(), dtype=np.uint8)
+    with open(path, 'wb') as f:
+        header.tofile(f)
+        records.tofile(f)
+
+
+def _is_binary_stl(path):
+    # ASCII files start with "solid", but so do some binary ones, so the size decides
+    size = os.path.getsize(path)
+    if size < STL_HEADER_SIZE:
+        return False
+    with open(path, 'rb') as f:
+        f.seek(80)
+        count = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+    return size == STL_HEADER_SIZE + count * STL_RECORD_DTYPE.itemsize
+
+
+def _read_ascii_stl_points(path):
+    with open(path, 'r', errors='replace') as f:
+        coordinates = [line.split()[1:4] for line in f if line.lstrip().startswith('vertex')]
+    return np.array(coordinates, dtype=np.float32).reshape(-1, 3)
+
+
+def triangulate_polygons(face_vertex_counts, face_vertex_indices, hole_indices=None):
+    """
+    Splits the polygons of a USD mesh into triangles without a Python loop over faces.
+
+    Each polygon with n corners becomes a fan of n - 2 triangles around its first
+    corner, which is exact for the convex polygons USD exporters write. Faces with
+    fewer than three corners are skipped, as are faces listed in hole_indices.
+
+    Args:
+        face_vertex_counts (array): Corners per face (faceVertexCounts).
+        face_vertex_indices (array): Point index of every corner, face after face (faceVertexIndices).
+        hole_indices (array, optional): Faces to leave out (holeIndices).
+
+    Returns:
+        ndarray: (M, 3) int32 point indices per triangle
+
+    Raises:
+        ValueError: If the counts do not match the indices or a hole index is not a face.
+    """
+    counts = np.asarray(face_vertex_counts, dtype=np.int64).ravel()
+    indices = np.asarray(face_vertex_indices, dtype=np.int64).ravel()
+    if counts.sum() != len(indices):
+        raise ValueError(f'faceVertexCounts add up to {counts.sum()} corners but faceVertexIndices has {len(indices)}')
+    face_starts = np.cumsum(counts) - counts
+    triangle_counts = np.maximum(counts - 2, 0)
+    if hole_indices is not None and len(hole_indices):
+        holes = np.asarray(hole_indices, dtype=np.int64).ravel()
+        # Negative indices would silently count from the end, so anything outside the faces is rejected
+        if holes.min() < 0 or holes.max() >= len(counts):
+            raise ValueError(f'holeIndices must lie in [0, {len(counts)}), got {holes.min()} to {holes.max()}')
+        triangle_counts[holes] = 0
+
+    # For every output triangle: the face it comes from and its position k in that face's fan
+    triangle_faces = np.repeat(np.arange(len(counts)), triangle_counts)
+    first_triangle = np.cumsum(triangle_counts) - triangle_counts
+    fan_position = np.arange(len(triangle_faces)) - first_triangle[triangle_faces] + 1
+
+    starts = face_starts[triangle_faces]
+    corners = np.stack([starts, starts + fan_position, starts + fan_position + 1], axis=1)
+    return indices[corners].astype(np.int32)
+
+
+def compute_triangle_normals(points, triangles, normalize=True):
+    """
+    Returns one normal per triangle. Without normalisation the length of each
+    normal is twice the triangle area, which is what area weighting needs.
+    """
+    v0 = points[triangles[:, 0]]
+    normals = np.cross(points[triangles[:, 1]] - v0, points[triangles[:, 2]] - v0)
+    if normalize:
+        normals = _normalize_rows(normals)
+    return normals
+
+
+def compute_vertex_normals(points, triangles):
+    """
+    Area weighted vertex normals: every triangle adds its unnormalised normal to
+    its three vertices, then the sums are normalised.
+    """
+    face_normals = compute_triangle_normals(points, triangles, normalize=False)
+    vertex_ids = triangles.ravel()
+    # Each face normal is counted once for each of its three corners
+    weights = np.repeat(face_normals, 3, axis=0)
+    normals = np.empty((len(points), 3), dtype=np.float64)
+    for axis in range(3):
+        normals[:, axis] = np.bincount(vertex_ids, weights=weights[:, axis], minlength=len(points))
+    return _normalize_rows(normals)
+
+
+def _normalize_rows(vectors):
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Degenerate triangles and unused vertices keep a zero normal instead of NaN
+    lengths[lengths == 0] = 1.0
+    return vectors / lengths
+
+
+# Cell offsets to the 13 neighbours after a cell in lexicographic order; with the cell itself they cover every adjacent pair once
+WELD_NEIGHBOUR_OFFSETS = np.array([offset for offset in np.ndindex(3, 3, 3) if offset > (1, 1, 1)], dtype=np.int64) - 1
+# Point pairs measured at once while welding; bounds the memory a dense cell can take
+WELD_PAIR_CHUNK = 1 << 18
+
+
+def _row_keys(rows):
+    # View each row as one opaque value, so unique and searchsorted run on a flat array instead of rows
+    rows = np.ascontiguousarray(rows)
+    return rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+
+
+def _cell_pair_members(cells_a, cells_b, cell_starts, cell_counts, order):
+    """
+    Yields every (point in cell a, point in cell b) combination for the given cell pairs,
+    at most WELD_PAIR_CHUNK pairs at a time. A dense cell pair is split across chunks, so the
+    memory used does not grow with the square of the points in one cell.
+    """
+    pair_sizes = cell_counts[cells_a] * cell_counts[cells_b]
+    pair_ends = np.cumsum(pair_sizes)
+    total = int(pair_ends[-1]) if len(pair_ends) else 0
+    for chunk_start in range(0, total, WELD_PAIR_CHUNK):
+        flat = np.arange(chunk_start, min(chunk_start + WELD_PAIR_CHUNK, total), dtype=np.int64)
+        pair = np.searchsorted(pair_ends, flat, side='right')
+        within = flat - (pair_ends[pair] - pair_sizes[pair])
+        size_b = cell_counts[cells_b[pair]]
+        first = order[cell_starts[cells_a[pair]] + within // size_b]
+        second = order[cell_starts[cells_b[pair]] + within % size_b]
+        yield first, second
+
+
+def _connected_components(count, first, second):
+    """
+    Labels every node with the lowest node index of its connected component.
+    Minimum labels are pushed along the edges, with pointer jumping to shorten long chains.
+    """
+    labels = np.arange(count)
+    while True:
+        updated = labels.copy()
+        np.minimum.at(updated, first, labels[second])
+        np.minimum.at(updated, second, labels[first])
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def _merge_components(labels, first, second):
+    """
+    Joins the components of labels along the edges (first, second). Every node is labelled
+    with the lowest node of its component, before and after.
+    """
+    label_first, label_second = labels[first], labels[second]
+    joined = label_first != label_second
+    if not joined.any():
+        return labels
+    # Only the components the edges touch take part, so the work follows the number of edges
+    nodes, inverse = np.unique(np.concatenate([label_first[joined], label_second[joined]]), return_inverse=True)
+    inverse = inverse.reshape(-1)
+    edge_count = np.count_nonzero(joined)
+    remap = np.arange(len(labels))
+    remap[nodes] = nodes[_connected_components(len(nodes), inverse[:edge_count], inverse[edge_count:])]
+    return remap[labels]
+
+
+def weld_vertices(points, triangles, tolerance=DEFAULT_WELD_TOLERANCE):
+    """
+    Merges vertices closer than tolerance to each other, turning triangle soup
+    (e.g. from STL) into an indexed mesh. Triangles that collapse to a line or
+    point are dropped.
+
+    Points are sorted into a grid with cells as wide as the tolerance, so two
+    points within tolerance are in the same or adjacent cells, and only those
+    pairs are measured, WELD_PAIR_CHUNK pairs at a time so a cell crowded with
+    points costs time but not memory. Merging is transitive: a chain of points, each within
+    tolerance of the next, becomes one vertex. A welded vertex keeps the position
+    of the first point of its group, so the result does not depend on where the
+    grid lines fall.
+
+    Returns:
+        tuple: (points, triangles) of the welded mesh
+    """
+    points = np.asarray(points)
+    triangles = np.asarray(triangles)
+    if tolerance <= 0 or len(points) == 0:
+        return points, triangles
+
+    # Exact duplicates first: triangle soup repeats every position several times
+    _, first_index, inverse = np.unique(_row_keys(points), return_index=True, return_inverse=True)
+    by_first = np.argsort(first_index)
+    rank = np.empty_like(by_first)
+    rank[by_first] = np.arange(len(by_first))
+    distinct_index = first_index[by_first]
+    point_to_distinct = rank[inverse.reshape(-1)]
+    positions = np.asarray(points[distinct_index], dtype=np.float64)
+
+    cells = np.floor(positions / tolerance).astype(np.int64)
+    cell_keys, cell_first, point_cells = np.unique(_row_keys(cells), return_index=True, return_inverse=True)
+    point_cells = point_cells.reshape(-1)
+    order = np.argsort(point_cells, kind='stable')
+    cell_counts = np.bincount(point_cells, minlength=len(cell_keys))
+    cell_starts = np.cumsum(cell_counts) - cell_counts
+
+    all_cells = np.arange(len(cell_keys))
+    cell_pairs = [(all_cells, all_cells)]
+    for offset in WELD_NEIGHBOUR_OFFSETS:
+        neighbour_keys = _row_keys(cells[cell_first] + offset)
+        neighbour = np.minimum(np.searchsorted(cell_keys, neighbour_keys), len(cell_keys) - 1)
+        found = cell_keys[neighbour] == neighbour_keys
+        cell_pairs.append((all_cells[found], neighbour[found]))
+
+    # Close pairs are folded into the labels chunk by chunk instead of being collected first
+    labels = np.arange(len(positions))
+    for index, (cells_a, cells_b) in enumerate(cell_pairs):
+        for first, second in _cell_pair_members(cells_a, cells_b, cell_starts, cell_counts, order):
+            if index == 0:
+                same_cell = first < second
+                first, second = first[same_cell], second[same_cell]
+            offsets = positions[first] - positions[second]
+            close = np.einsum('ij,ij->i', offsets, offsets) <= tolerance * tolerance
+            labels = _merge_components(labels, first[close], second[close])
+
+    groups, distinct_to_welded = np.unique(labels, return_inverse=True)
+    welded_points = points[distinct_index[groups]]
+    welded_triangles = distinct_to_welded.reshape(-1)[point_to_distinct[triangles]].astype(np.int32)
+    t0, t1, t2 = welded_triangles[:, 0], welded_triangles[:, 1], welded_triangles[:, 2]
+    keep = (t0 != t1) & (t1 != t2) & (t2 != t0)
+    return welded_points, welded_triangles[keep]
+
+
+def compute_crease_normals(points, triangles, crease_angle=DEFAULT_CREASE_ANGLE):
+    """
+    Smooth vertex normals, except at corners where the face bends away from the
+    vertex normal by more than crease_angle. Those corners use the face normal,
+    so sharp CAD edges stay sharp on a welded mesh.
+
+    Returns:
+        tuple: (normals, interpolation) where interpolation is 'vertex' with one normal
+            per point, or 'faceVarying' with one normal per triangle corner
+    """
+    face_normals = compute_triangle_normals(points, triangles)
+    vertex_normals = compute_vertex_normals(points, triangles)
+    corner_normals = vertex_normals[triangles]
+    cosines = np.einsum('mcj,mj->mc', corner_normals, face_normals)
+    creased = cosines < np.cos(np.radians(crease_angle))
+    if not creased.any():
+        return vertex_normals, 'vertex'
+    corner_normals = np.where(creased[:, :, None], face_normals[:, None, :], corner_normals)
+    return corner_normals.reshape(-1, 3), 'faceVarying'
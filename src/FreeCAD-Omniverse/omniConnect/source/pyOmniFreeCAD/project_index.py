@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# Persistent index of the assets and assemblies of a FreeCAD project on Nucleus.
+#
+# The index is a JSON file written by connectSampleLib.py --refresh_project_index
+# and read directly by the workbench:
+#
+#   {"version": 1, "project_url": "...", "checked": <time of the last full diff>,
+#    "top_folders": [url, ...], "folders": {asset folder url: modified time},
+#    "entries": [{"url", "name", "type", "folder", "size", "modified_time",
+#                 "version", "hash", "checkpoint"}, ...]}
+#
+# with "type" one of "stp", "usd" or "assembly". A refresh lists the project,
+# its top-level folders and every asset folder. While connectSampleLib.py runs
+# as a worker, every indexed folder is also watched with
+# omni.client.list_subscribe_with_callback, and a refresh only lists the folders
+# that reported changes since the last one, or whose modified time differs from
+# the index. Without subscriptions a folder's modified time is not enough: it
+# does not change when a file in the folder is overwritten.
+#
+###############################################################################
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from lazy_import import LazyModule
+
+import project_layout
+import project_scan
+from result_records import log_message
+
+# Only needed to watch folders, so an index can be refreshed from any listing
+omni_client = LazyModule("omni.client")
+
+INDEX_VERSION = 1
+# Even with live subscriptions, list the project structure and compare modified times this often in case an event was missed
+INDEX_FULL_CHECK_SECONDS = 300
+
+
+def empty_index(project_url):
+    return {'version': INDEX_VERSION, 'project_url': project_url, 'checked': 0,
+            'top_folders': [], 'folders': {}, 'entries': []}
+
+
+def load_index(path, project_url):
+    # An index that is missing, unreadable or of another project is rebuilt from scratch
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except (IOError, ValueError):
+        return empty_index(project_url)
+    if not isinstance(index, dict) or index.get('version') != INDEX_VERSION or index.get('project_url') != project_url:
+        return empty_index(project_url)
+    return index
+
+
+def save_index(path, index):
+    # Written next to the index and swapped in, so the workbench never reads half a file
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.index_', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class FolderWatcher:
+    """
+    Subscribes to changes of Nucleus folders and remembers which folders changed.
+
+    Events arrive on omni.client threads; take_dirty hands the changed folders to the next refresh.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.dirty = set()
+
+    def _subscribe(self, folder_url):
+        def on_listed(result, entries):
+            if result != omni_client.Result.OK:
+                self._mark_dirty(folder_url)
+
+        def on_event(result, event, entry):
+            # Any event, or a broken subscription, means the folder has to be listed again
+            self._mark_dirty(folder_url)
+
+        return omni_client.list_subscribe_with_callback(folder_url, on_listed, on_event)
+
+    def _mark_dirty(self, folder_url):
+        with self.lock:
+            self.dirty.add(folder_url)
+
+    def watch(self, folder_urls):
+        # Subscribes to new folders and drops subscriptions of folders that are gone
+        folder_urls = set(folder_urls)
+        with self.lock:
+            removed = [url for url in self.requests if url not in folder_urls]
+            added = [url for url in folder_urls if url not in self.requests]
+        for url in removed:
+            self.requests.pop(url).stop()
+        for url in added:
+            self.requests[url] = self._subscribe(url)
+
+    def is_watching(self, folder_urls):
+        return all(url in self.requests for url in folder_urls)
+
+    def take_dirty(self):
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def stop(self):
+        for request in self.requests.values():
+            request.stop()
+        self.requests.clear()
+
+
+# One watcher per project, alive as long as the worker process
+_watchers = {}
+
+
+def stop_watchers():
+    for watcher in _watchers.values():
+        watcher.stop()
+    _watchers.clear()
+
+
+def refresh_index(project_url, index_path, watch=False, max_concurrency=project_scan.SCAN_MAX_CONCURRENCY):
+    """
+    Brings the index of a project up to date and saves it.
+
+    Args:
+        project_url (str): Nucleus URL of the project folder.
+        index_path (str): Local JSON file of the index; created if missing.
+        watch (bool): Keep folder subscriptions after the refresh. Only useful in a process that
+            outlives the call, i.e. the worker.
+
+    Returns:
+        tuple: (index, stats, failed) where stats counts the folders listed and reused and
+            failed holds (folder URL, result name) of folders that could not be listed
+    """
+    index = load_index(index_path, project_url)
+    watcher = _watchers.get(project_url) if watch else None
+    dirty = watcher.take_dirty() if watcher else set()
+    structure_folders = [project_url] + index['top_folders']
+    watched = watcher is not None and watcher.is_watching(structure_folders + list(index['folders']))
+    live = watched and time.time() - index['checked'] < INDEX_FULL_CHECK_SECONDS
+    failed = []
+    listed = 0
+
+    if live and not dirty.intersection(structure_folders):
+        # No folder was added or removed: only the asset folders with events are listed again
+        top_folders = index['top_folders']
+        asset_folders = dict(index['folders'])
+        assemblies = [entry for entry in index['entries'] if entry['type'] == 'assembly']
+        stale = [url for url in asset_folders if url in dirty]
+    else:
+        records, failed = project_scan.scan_folders(project_url, 2, max_concurrency=max_concurrency)
+        if any(folder_url == project_url for folder_url, _ in failed):
+            return index, {'listed': 1, 'reused': 0, 'watching': False}, failed
+        listed += 1 + sum(1 for record in records if record['depth'] == 1 and record['is_folder'])
+        # Top-level folders that could not be listed keep the asset folders they held before
+        top_folders, asset_folders, assemblies = project_layout.read_project_structure(
+            records, index['folders'], unlisted=[folder_url for folder_url, _ in failed])
+        stale = project_layout.changed_asset_folders(asset_folders, index['folders'], dirty, watched=watched)
+        index['checked'] = time.time()
+
+    folders = {url: index['folders'].get(url) for url in asset_folders}
+    relisted = {}
+    for folder_url, (result, records) in zip(stale, project_scan.list_folders(stale, depth=3, max_concurrency=max_concurrency)):
+        if records is None:
+            # Keeps the old entries and the old modified time, so the folder is listed again next time
+            failed.append((folder_url, result.name))
+            continue
+        relisted[folder_url] = project_layout.asset_entries(records)
+        folders[folder_url] = asset_folders[folder_url]
+    listed += len(stale)
+
+    index['top_folders'] = top_folders
+    index['folders'] = folders
+    index['entries'] = assemblies + project_layout.merge_asset_entries(index['entries'], folders, relisted)
+    save_index(index_path, index)
+
+    if watch:
+        watcher = _watchers.setdefault(project_url, FolderWatcher())
+        watcher.watch([project_url] + top_folders + list(folders))
+    log_message(f'Project index: {listed} folders listed, {len(folders) - len(stale)} asset folders reused')
+    return index, {'listed': listed, 'reused': len(folders) - len(stale), 'watching': bool(watch)}, failed
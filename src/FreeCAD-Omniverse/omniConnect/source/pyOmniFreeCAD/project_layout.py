@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# Layout of a FreeCAD project on Nucleus.
+#
+#   <project>/assets/<asset>/<asset>.stp, <asset>.usda
+#   <project>/assembly/<assembly>.usda
+#
+# Functions here only look at the entry records produced by project_scan, and
+# at the project index entries made from them (see project_index.py). They
+# never call omni.client themselves, so they work on listings from any source.
+#
+###############################################################################
+
+ASSEMBLY_FOLDER = 'assembly'
+STP_EXTENSIONS = ('.stp', '.step')
+USD_EXTENSIONS = ('.usd', '.usda', '.usdc')
+
+
+def file_type(name):
+    """
+    Returns 'stp' or 'usd' for a STEP or USD file name, or None for anything else.
+    """
+    name = name.lower()
+    if name.endswith(STP_EXTENSIONS):
+        return 'stp'
+    if name.endswith(USD_EXTENSIONS):
+        return 'usd'
+    return None
+
+
+def is_asset_container(record):
+    # Every top-level folder except the assemblies holds asset folders
+    return record['depth'] > 1 or record['name'] != ASSEMBLY_FOLDER
+
+
+def is_assembly_folder(record):
+    return record['name'] == ASSEMBLY_FOLDER
+
+
+def split_asset_files(records):
+    """
+    Picks the STEP and USD files inside asset folders out of a project scanned three levels deep.
+
+    Returns:
+        tuple: (stp_records, usd_records) in listing order
+    """
+    files = [record for record in records if record['depth'] == 3 and not record['is_folder']]
+    stp_records = [record for record in files if file_type(record['name']) == 'stp']
+    usd_records = [record for record in files if file_type(record['name']) == 'usd']
+    return stp_records, usd_records
+
+
+def assembly_files(records):
+    """
+    Picks the assembly stages out of a project scanned two levels deep.
+    """
+    return [record for record in records if record['depth'] == 2 and not record['is_folder']
+            and record['folder'].rsplit('/', 1)[-1] == ASSEMBLY_FOLDER and file_type(record['name']) == 'usd']
+
+
+def index_entry(record, entry_type):
+    return {
+        'url': record['url'],
+        'name': record['name'],
+        'type': entry_type,
+        'folder': record['folder'],
+        'size': record['size'],
+        'modified_time': record['modified_time'],
+        'version': record['version'],
+        'hash': record['hash'],
+        'checkpoint': record['comment'],
+    }
+
+
+def asset_entries(records):
+    # Index entries for the STEP and USD files of one listed asset folder
+    return [index_entry(record, file_type(record['name'])) for record in records
+            if not record['is_folder'] and file_type(record['name'])]
+
+
+def read_project_structure(records, previous_folders=None, unlisted=()):
+    """
+    Reads the folders and assemblies of a project out of a scan two levels deep.
+
+    Args:
+        records (list): Entry records of the project and its top-level folders.
+        previous_folders (dict, optional): Asset folder URL to modified time, from the index.
+        unlisted (iterable): Top-level folders that could not be listed; the asset folders they held
+            before are carried over from previous_folders.
+
+    Returns:
+        tuple: (top_folders, asset_folders, assemblies) with asset_folders mapping each asset folder
+            URL to its modified time and assemblies holding index entries
+    """
+    top_folders = [record['url'] for record in records if record['depth'] == 1 and record['is_folder']]
+    unlisted = set(unlisted)
+    asset_folders = {url: modified_time for url, modified_time in (previous_folders or {}).items()
+                     if url.rsplit('/', 1)[0] in unlisted}
+    assemblies = [index_entry(record, 'assembly') for record in assembly_files(records)]
+    for record in records:
+        if record['depth'] == 2 and record['is_folder'] and record['folder'].rsplit('/', 1)[-1] != ASSEMBLY_FOLDER:
+            asset_folders[record['url']] = record['modified_time']
+    return top_folders, asset_folders, assemblies
+
+
+def changed_asset_folders(asset_folders, previous_folders, dirty=(), watched=False):
+    """
+    Returns the asset folders that have to be listed again, in the order of asset_folders.
+
+    A folder's modified time only changes when files are added or removed in it, not when
+    one of its files is overwritten. Only with live subscriptions, which report every change
+    as an event (dirty), is comparing modified times enough; otherwise every folder is listed.
+    """
+    if not watched:
+        return list(asset_folders)
+    dirty = set(dirty)
+    return [url for url, modified_time in asset_folders.items()
+            if previous_folders.get(url) != modified_time or url in dirty]
+
+
+def merge_asset_entries(entries, asset_folders, relisted):
+    """
+    Combines the entries of folders listed again with the indexed entries of the others.
+
+    Args:
+        entries (list): Entries of the index so far.
+        asset_folders (iterable): Asset folders of the project now, in index order.
+        relisted (dict): Folder URL to the asset_entries of its new listing.
+
+    Returns:
+        list: Asset entries folder by folder. Entries of folders no longer in the project are dropped.
+    """
+    entries_by_folder = {}
+    for entry in entries:
+        if entry['type'] != 'assembly':
+            entries_by_folder.setdefault(entry['folder'], []).append(entry)
+    entries_by_folder.update(relisted)
+    return [entry for folder_url in asset_folders for entry in entries_by_folder.get(folder_url, [])]
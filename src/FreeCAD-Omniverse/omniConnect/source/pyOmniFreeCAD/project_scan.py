@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# Concurrent listing of FreeCAD project folders on Nucleus.
+#
+# The project layout is described in project_layout.py. scan_folders lists one level at a time, with every folder of a level listed
+# concurrently through omni.client.list_async (at most max_concurrency at
+# once). Entry URLs are joined onto the URL of the folder that was listed, so
+# no omni.client.resolve round trip is needed per entry.
+#
+###############################################################################
+
+import asyncio
+
+from lazy_import import LazyModule
+
+import project_layout
+
+# Imported on the first listing, so modules built on this one load without the client library
+omni_client = LazyModule("omni.client")
+
+SCAN_MAX_CONCURRENCY = 16
+
+
+def entry_record(folder_url, entry, depth):
+    """
+    Describes one omni.client.ListEntry of a listed folder.
+
+    Returns:
+        dict: 'url', 'name', 'folder' (URL of the listed folder), 'depth' (1 for entries of the scanned folder),
+            'is_folder', 'size', 'modified_time' (POSIX timestamp), 'version', 'hash' and 'comment' (checkpoint comment)
+    """
+    name = entry.relative_path.rstrip('/')
+    modified_time = entry.modified_time
+    return {
+        'url': folder_url.rstrip('/') + '/' + name,
+        'name': name,
+        'folder': folder_url.rstrip('/'),
+        'depth': depth,
+        'is_folder': bool(entry.flags & omni_client.ItemFlags.CAN_HAVE_CHILDREN),
+        'size': entry.size,
+        'modified_time': modified_time.timestamp() if hasattr(modified_time, 'timestamp') else modified_time,
+        'version': getattr(entry, 'version', None),
+        'hash': getattr(entry, 'hash', None),
+        'comment': getattr(entry, 'comment', None),
+    }
+
+
+async def _list_folder(folder_url, depth, semaphore):
+    async with semaphore:
+        result, entries = await omni_client.list_async(folder_url)
+    if result != omni_client.Result.OK:
+        return result, None
+    return result, [entry_record(folder_url, entry, depth) for entry in entries]
+
+
+async def _list_folders(folder_urls, depth, max_concurrency):
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    return await asyncio.gather(*(_list_folder(url, depth, semaphore) for url in folder_urls))
+
+
+async def _scan_folders(root_url, max_depth, descend, max_concurrency):
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    records, failed = [], []
+    level = [root_url]
+    for depth in range(1, max_depth + 1):
+        listings = await asyncio.gather(*(_list_folder(url, depth, semaphore) for url in level))
+        next_level = []
+        for folder_url, (result, folder_records) in zip(level, listings):
+            if result != omni_client.Result.OK:
+                failed.append((folder_url, result.name))
+                continue
+            records.extend(folder_records)
+            next_level.extend(record['url'] for record in folder_records
+                              if record['is_folder'] and (descend is None or descend(record)))
+        if not next_level:
+            break
+        level = next_level
+    return records, failed
+
+
+def scan_folders(root_url, max_depth, descend=None, max_concurrency=SCAN_MAX_CONCURRENCY):
+    """
+    Lists a Nucleus folder and its subfolders down to max_depth levels.
+
+    Args:
+        root_url (str): Folder to scan.
+        max_depth (int): 1 lists root_url only, 2 also its subfolders, and so on.
+        descend (callable, optional): Called with the record of each subfolder; only folders it accepts are listed.
+        max_concurrency (int): Upper bound on list requests in flight.
+
+    Returns:
+        tuple: (records, failed) with one entry_record per file and folder found, in listing order,
+            and (folder URL, result name) for every folder that could not be listed
+    """
+    return asyncio.run(_scan_folders(root_url, max_depth, descend, max_concurrency))
+
+
+def list_folders(folder_urls, depth=1, max_concurrency=SCAN_MAX_CONCURRENCY):
+    """
+    Lists several Nucleus folders concurrently, without descending into them.
+
+    Returns:
+        list: (omni.client.Result, records) per folder, in the order given, with records at the given depth,
+            or None for a folder that could not be listed
+    """
+    return asyncio.run(_list_folders(list(folder_urls), depth, max_concurrency))
+
+
+def find_asset_files(project_url, max_concurrency=SCAN_MAX_CONCURRENCY):
+    """
+    Finds the STEP and USD files of every asset in a project.
+
+    Returns:
+        tuple: (stp_records, usd_records, failed)
+    """
+    records, failed = scan_folders(project_url, 3, descend=project_layout.is_asset_container, max_concurrency=max_concurrency)
+    stp_records, usd_records = project_layout.split_asset_files(records)
+    return stp_records, usd_records, failed
+
+
+def find_assembly_files(project_url, max_concurrency=SCAN_MAX_CONCURRENCY):
+    """
+    Finds the assembly stages of a project.
+
+    Returns:
+        tuple: (usd_records, failed)
+    """
+    records, failed = scan_folders(project_url, 2, descend=project_layout.is_assembly_folder, max_concurrency=max_concurrency)
+    return project_layout.assembly_files(records), failed
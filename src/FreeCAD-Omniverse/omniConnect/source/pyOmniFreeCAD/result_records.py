@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# JSON-lines records written by connectSampleLib.py.
+#
+# Every line connectSampleLib.py writes to stdout is one JSON record. Anything
+# meant for humans (progress text, diagnostics, tracebacks) goes to stderr, so
+# clients never need to scrape text to find out what happened.
+#
+#   {"type": "result",   "op": "auth", "code": "OK", "payload": {...}}
+#   {"type": "progress", "op": "push_non_usd", "done": 4096, "total": 8192}
+#   {"type": "error",    "op": "auth", "code": "NO_PERMISSION", "message": "..."}
+#   {"type": "ready",    "op": "serve", "payload": {"port": 50123}}
+#
+###############################################################################
+
+import json
+import sys
+import threading
+
+RECORD_RESULT = "result"
+RECORD_PROGRESS = "progress"
+RECORD_ERROR = "error"
+RECORD_READY = "ready"
+
+# Batch operations emit from several threads; one record per line must stay intact
+_emit_lock = threading.Lock()
+
+
+def emit_record(record):
+    # sys.stdout is looked up on every call so worker-mode redirection is respected
+    line = json.dumps(record) + "\n"
+    with _emit_lock:
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
+
+def emit_result(op, payload=None, code="OK"):
+    emit_record({"type": RECORD_RESULT, "op": op, "code": code, "payload": payload if payload is not None else {}})
+
+
+def emit_progress(op, done, total=None, message=None):
+    record = {"type": RECORD_PROGRESS, "op": op, "done": done, "total": total}
+    if message is not None:
+        record["message"] = message
+    emit_record(record)
+
+
+def emit_error(op, code, message):
+    emit_record({"type": RECORD_ERROR, "op": op, "code": code, "message": message})
+    log_message(f"[ERROR] {code}: {message}")
+
+
+def fail(op, code, message):
+    """Emits an error record and stops the current operation."""
+    emit_error(op, code, message)
+    raise SystemExit(1)
+
+
+def log_message(*args):
+    # Human readable output for the log stream
+    print(*args, file=sys.stderr, flush=True)
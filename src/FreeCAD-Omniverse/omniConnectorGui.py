@@ -41,6 +41,7 @@ import datetime
 import threading
 from utils import *
 from file_utils import *
+from job_runner import GetJobRunner, JobQueueWidget, SubmitNucleusJob
 __dir__ = os.path.dirname(__file__)
 
 def GetCurrentSelection():
@@ -66,36 +67,21 @@ def FindUSDandSTPFiles(usdlink):
         usdlink (str): The Nucleus URL of the project.
 
     Returns:
-        tuple: (stdout_lines, stderr_output)
+        tuple: (records, stderr_output)
     """
     print('Finding asset files in the project folder ...')
 
-    # Assemble paths and command
-    script_dir = GetFetcherScriptsDirectory().replace(" ", "` ")
-    batch_file = GetBatchFileName()
-    batch_path = os.path.join(script_dir, batch_file)
     local_dir = GetLocalDirectoryName()
-
-    cmd = f'{batch_path} --local_directory {local_dir} --nucleus_url {usdlink} --find_stp_and_usd_files'
-    print(cmd)
-
-    # Run the command
-    process = subprocess.Popen(
-        ['powershell', cmd],
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    stdout, stderr = process.communicate()
-    stdout_lines = stdout.decode('utf-8').split('\r\n')
-    stderr_output = stderr.decode('utf-8')
+    records, stderr_output = RunOmniClientOperation(['--local_directory', local_dir, '--nucleus_url', usdlink, '--find_stp_and_usd_files'])
 
     # Output results
-    for line in stdout_lines:
-        print('[OmniClient]', line)
-    print('ERRORS:', stderr_output)
+    PrintResultRecords(records, stderr_output)
+
+    payload = GetResultPayload(records, 'find_stp_and_usd_files')
+    if payload is not None:
+        SaveAssetLists(payload['stp_urls'], payload['usd_urls'])
 
-    return stdout_lines, stderr_output
+    return records, stderr_output
 
 def DownloadUSDFromNucleus(usdlink):
     """
@@ -105,7 +91,7 @@ def DownloadUSDFromNucleus(usdlink):
         usdlink (str): The Nucleus URL to download from.
 
     Returns:
-        tuple: (stdout_output, stderr_output)
+        tuple: (records, stderr_output)
     """
     permission = GetCurrentUSDPermissions()
     print(f'File permission: {permission}')
@@ -114,22 +100,18 @@ def DownloadUSDFromNucleus(usdlink):
         print(f'[ERROR] NO_PERMISSION: Cannot access USD file: {usdlink}')
         print('[ERROR] You do not have permissions to access this file! Contact your Nucleus administrator.')
         print('Try logging in under a different username: log out through the nucleus. SIGNOUT BUTTON IS WIP')
-        return 'FAIL', 'NO_PERMISSION'
+        return [MakeErrorRecord('pull', 'NO_PERMISSION', f'Cannot access USD file: {usdlink}')], ''
 
     if permission is None:
         print(f'[ERROR] PERMISSION_NOT_FOUND: Cannot access USD file: {usdlink}')
         print('[ERROR] You have not entered a valid USD link.')
-        return 'FAIL', 'PERMISSION_NOT_FOUND'
+        return [MakeErrorRecord('pull', 'PERMISSION_NOT_FOUND', f'Cannot access USD file: {usdlink}')], ''
 
     if permission != 'OK_ACCESS':
-        return 'FAIL', 'UNKNOWN_PERMISSION_STATUS'
+        return [MakeErrorRecord('pull', 'UNKNOWN_PERMISSION_STATUS', f'Cannot access USD file: {usdlink}')], ''
 
     # Permission OK — proceed with download
     doc = FreeCAD.ActiveDocument  # Required to allow Mesh.insert
-    script_dir = GetFetcherScriptsDirectory().replace(" ", "` ")
-    batch_file = GetBatchFileName()
-    batch_path = os.path.join(script_dir, batch_file)
-
     local_dir = GetLocalDirectoryName()
     token = str(RandomTokenGenerator())
     stl_filename = f'{token}download.stl'
@@ -137,29 +119,17 @@ def DownloadUSDFromNucleus(usdlink):
 
     print(f'Unique version identifier: {token}')
     
-    cmd = (
-        f'{batch_path} --nucleus_url {usdlink} '
-        f'--local_directory {local_dir.replace(" ", "` ")} '
-        f'--pull --token {token}'
-    )
-    print(f'[CMD] {cmd}')
-
-    process = subprocess.Popen(
-        ['powershell', cmd],
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+    records, stderr_decoded = RunOmniClientOperation(
+        ['--nucleus_url', usdlink, '--local_directory', local_dir, '--pull', '--token', token]
     )
-    stdout, stderr = process.communicate()
-    stdout_decoded = stdout.decode('utf-8')
-    stderr_decoded = stderr.decode('utf-8')
 
-    if os.path.exists(stl_path):
-        Mesh.insert(stl_path)
+    payload = GetResultPayload(records, 'pull')
+    if payload and os.path.exists(payload['local_filename']):
+        Mesh.insert(payload['local_filename'])
     else:
         print('[ERROR] DLOAD_FAIL: USD download failed!')
 
-    return stdout_decoded, stderr_decoded
+    return records, stderr_decoded
 
 
 
@@ -168,31 +138,25 @@ def CreateNewAssemblyOnNucleus(projectURL, assembly_name='assembly',
                                 assembly_items_usd_links=None, assembly_items_stp_links=None, token=None):
     """
     Creates a new assembly in a Nucleus project and returns its USD link if successful.
+
+    Returns:
+        tuple: (records, stderr_lines, assembly USD link or None)
     """
-    batch_path = os.path.join(GetFetcherScriptsDirectory().replace(" ", "` "), GetBatchFileName())
-    cmd = (
-        f'{batch_path} --nucleus_url {projectURL} --create_new_assembly '
-        f'--assembly_name {assembly_name}'
-    )
+    argv = ['--nucleus_url', projectURL, '--create_new_assembly', '--assembly_name', assembly_name, '--usd_format', GetUSDFormat()]
 
     if assembly_items_usd_links and assembly_items_stp_links:
-        cmd += f' --asset_usd_links {" ".join(assembly_items_usd_links)}'
-        cmd += f' --asset_stp_links {" ".join(assembly_items_stp_links)}'
+        argv += ['--asset_usd_links'] + list(assembly_items_usd_links)
+        argv += ['--asset_stp_links'] + list(assembly_items_stp_links)
 
     if token:
-        cmd += f' --token {token}'
+        argv += ['--token', token]
 
-    print(f'[CMD] {cmd}')
-    p = subprocess.Popen(['powershell', cmd], shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = p.communicate()
-    stdout_lines = stdout.decode().split('\n')
-    stderr_lines = stderr.decode().split('\n')
+    records, stderr = RunOmniClientOperation(argv)
 
-    # Find the generated assembly USD link
-    assembly_usd_link = next((line.strip() for line in stdout_lines
-                              if '.usd' in line and f'{projectURL}/assembly' in line), None)
+    payload = GetResultPayload(records, 'create_new_assembly')
+    assembly_usd_link = payload['assembly_url'] if payload else None
 
-    return stdout_lines, stderr_lines, assembly_usd_link
+    return records, stderr.split('\n'), assembly_usd_link
 
 def AddCheckpointToNucleusAsset(url, custom_checkpoint, token=None, filetype='usd'):
     """
@@ -204,33 +168,27 @@ def AddCheckpointToNucleusAsset(url, custom_checkpoint, token=None, filetype='us
         token (str, optional): Upload token.
         filetype (str): 'usd' (default) or 'non_usd'.
     """
-    batch_path = os.path.join(GetFetcherScriptsDirectory().replace(" ", "` "), GetBatchFileName())
-    checkpoint = f'"{custom_checkpoint}"'
     flag = '--add_checkpoint_to_usd' if filetype == 'usd' else '--add_checkpoint_to_non_usd'
 
-    cmd = f'{batch_path} --nucleus_url {url} {flag} --custom_checkpoint {checkpoint}'
+    argv = ['--nucleus_url', url, flag, '--custom_checkpoint', custom_checkpoint]
     if token:
-        cmd += f' --token {token}'
+        argv += ['--token', token]
 
-    print(f'[CMD] {cmd}')
-    subprocess.Popen(['powershell', cmd], shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE).communicate()
+    RunOmniClientOperation(argv)
 
 
 def FindExistingAssembliesOnNucleus(projectURL):
     """
     Searches for existing assembly USD files in a given Nucleus project.
-    """
-    batch_path = os.path.join(GetFetcherScriptsDirectory().replace(" ", "` "), GetBatchFileName())
-    cmd = f'{batch_path} --nucleus_url {projectURL} --find_existing_assemblies'
-    print(f'[CMD] {cmd}')
 
-    p = subprocess.Popen(['powershell', cmd], shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = p.communicate()
-    stdout_lines = stdout.decode().split('\n')
-    stderr_lines = stderr.decode().split('\n')
+    Returns:
+        tuple: (records, stderr_lines, list of assembly USD links or None)
+    """
+    records, stderr = RunOmniClientOperation(['--nucleus_url', projectURL, '--find_existing_assemblies'])
 
-    links = [line.strip() for line in stdout_lines if '/assembly' in line and '.usd' in line]
-    return stdout_lines, stderr_lines, links or None
+    payload = GetResultPayload(records, 'find_existing_assemblies')
+    links = payload['assembly_urls'] if payload else []
+    return records, stderr.split('\n'), links or None
 
 
 def GetPrimReferenceXForms(assemblyURL, token=None):
@@ -238,52 +196,34 @@ def GetPrimReferenceXForms(assemblyURL, token=None):
     Fetches reference, transform, rotation, and scale data of prims in a Nucleus assembly.
 
     Returns:
-        tuple: (stdout_lines, stderr_lines, list of reference dictionaries or None)
+        tuple: (records, stderr_lines, list of reference dictionaries or None)
     """
-    batch_path = os.path.join(GetFetcherScriptsDirectory().replace(" ", "` "), GetBatchFileName())
-    cmd = f'{batch_path} --nucleus_url {assemblyURL} --get_prim_reference_xforms'
+    argv = ['--nucleus_url', assemblyURL, '--get_prim_reference_xforms']
     if token:
-        cmd += f' --token {token}'
-    print(f'[CMD] {cmd}')
+        argv += ['--token', token]
 
-    p = subprocess.Popen(['powershell', cmd], shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = p.communicate()
-    stdout_lines = stdout.decode().split('\n')
-    stderr_lines = stderr.decode().split('\n')
+    records, stderr = RunOmniClientOperation(argv)
 
+    payload = GetResultPayload(records, 'get_prim_reference_xforms')
     prim_data = []
-    for line in stdout_lines:
-        parts = [p.strip() for p in line.split('|')]
-        if len(parts) == 4 and parts[0]:
-            step_path = parts[0].replace('.usda', '.stp').replace('.usd', '.stp')
-            prim_data.append({
-                "ref-path": parts[0],
-                "step-path": step_path,
-                "transform": ast.literal_eval(parts[1]),
-                "rot-xyz": ast.literal_eval(parts[2]),
-                "scale": ast.literal_eval(parts[3])
-            })
+    for prim in (payload['prims'] if payload else []):
+        prim_data.append({
+            "ref-path": prim['ref-path'],
+            "step-path": re.sub(r'\.usd[ac]?$', '.stp', prim['ref-path']),
+            "transform": tuple(prim['transform']),
+            "rot-xyz": tuple(prim['rot-xyz']),
+            "scale": tuple(prim['scale'])
+        })
 
-    return stdout_lines, stderr_lines, prim_data or None
+    return records, stderr.split('\n'), prim_data or None
 
 
 
 
-def _DownloadCmdWrapper(stplink, usdlink, token, custom_checkpoint=None):
-    """
-    Downloads a STEP file from Nucleus and attaches metadata to the imported object. Used by assembly mode only.
-    """
-    if not stplink:
-        return None
-
-    GetAuthCheck(stplink, filetype='stp')
-    print(f'Pulling from {stplink}')
-    ok, obj, output, error, fc_err = DownloadSTPFromNucleus(stplink, token=token, custom_checkpoint=custom_checkpoint)
-    print('\n'.join(f'OmniClient: {line}' for line in output.split('\r\n')))
-    print('ERRORS', error)
-    label = GetComponentNameFromStplink(stplink)
+def _AttachNucleusProperties(obj, stplink, usdlink, token):
+    # Records where a pulled component came from so it can be pushed back later
     properties = {
-        "Label": label,
+        "Label": GetComponentNameFromStplink(stplink),
         "Nucleus_link_stp": stplink,
         "Nucleus_link_usd": usdlink,
         "Nucleus_version_id": token,
@@ -295,6 +235,34 @@ def _DownloadCmdWrapper(stplink, usdlink, token, custom_checkpoint=None):
 
     return obj
 
+def _FetchAssemblyComponents(assembly_url, token, custom_checkpoint=None, on_progress=None):
+    """
+    Reads the component placements of an assembly and downloads every component concurrently. Network only, runs inside a background job.
+
+    Returns:
+        list: Reference dictionaries from GetPrimReferenceXForms, each with the (records, stderr_output, local STEP path) of its component under 'fetched'.
+    """
+    _, _, data = GetPrimReferenceXForms(assembly_url, token)
+    data = data or []
+    for d in data:
+        print(d['step-path'])
+    # A component placed several times is downloaded once
+    fetched = FetchSTPBatchFromNucleus([d['step-path'] for d in data], token, custom_checkpoint, on_progress=on_progress)
+    for d in data:
+        d['fetched'] = fetched.get(d['step-path'], ([], '', None))
+    return data
+
+def _InsertAssemblyComponent(fetched, stplink, usdlink, token):
+    """
+    Inserts a component fetched by _FetchAssemblyComponents and attaches its Nucleus metadata. Must run on the main thread.
+    """
+    records, error, stp_path = fetched
+    PrintResultRecords(records, error)
+    ok, obj, fc_err = InsertSTPIntoDocument(stp_path, records)
+    if not ok:
+        return None
+    return _AttachNucleusProperties(obj, stplink, usdlink, token)
+
 class _DownloadCmd:
     """Command to download geometry from Nucleus."""
 
@@ -307,21 +275,17 @@ class _DownloadCmd:
             print('No STPLINK')
             return None
         print(f'Pulling from {stplink}')
-        ok, obj, output, error, fc_err = DownloadSTPFromNucleus(stplink, token=token)
+        SubmitNucleusJob(f'Pull {stplink.split("/")[-1]}', FetchSTPFromNucleus, stplink, token, report_progress=True,
+                         on_done=lambda result: self.apply_download(result, stplink, usdlink, token))
+
+    def apply_download(self, result, stplink, usdlink, token):
+        # Runs on the main thread once the STEP file has been fetched
+        records, error, stp_path = result
+        ok, obj, fc_err = InsertSTPIntoDocument(stp_path, records)
 
         if ok:
-            print('\n'.join(f'OmniClient: {line}' for line in output.split('\r\n')))
-            print('ERRORS', error)
-            label = GetComponentNameFromStplink(stplink)
-            props = {
-                "Label": label,
-                "Nucleus_link_stp": stplink,
-                "Nucleus_link_usd": usdlink,
-                "Nucleus_version_id": token,
-                "Last_Nucleus_sync_time": time.strftime(" %d %b  %Y %H:%M:%S", time.localtime())
-            }
-            for key, val in props.items():
-                obj = attachNewStringProperty(obj, property_name=key, property_value=val)
+            PrintResultRecords(records, error)
+            _AttachNucleusProperties(obj, stplink, usdlink, token)
         else:
             QtWidgets.QMessageBox.critical(
                 None,
@@ -355,13 +319,13 @@ class _ClearJunkCmd:
         # what is done when the command is clicked
         current_project_link = GetCurrentProjectLinkNoPrint()
         last_project_link = GetLastProjectLinkNoPrint()
-        ClearLocalDirectory()
+        with GetState().transaction():
+            ClearLocalDirectory()
+            if current_project_link != None:
+                SaveLastProjectLinkAsTextFile(current_project_link)
+            elif last_project_link!=None:
+                SaveLastProjectLinkAsTextFile(last_project_link)
         FreeCAD.assembly_usd_link=None
-
-        if current_project_link != None:
-            SaveLastProjectLinkAsTextFile(current_project_link)
-        elif last_project_link!=None:
-            SaveLastProjectLinkAsTextFile(last_project_link)
     def GetResources(self):
         # icon and command information
         MenuText = QtCore.QT_TRANSLATE_NOOP(
@@ -380,8 +344,11 @@ class _ClearJunkCmd:
         return not FreeCAD.ActiveDocument is None
 
 class _UploadCmd:
-    """Button to upload a selected component to Nucleus."""
+    """Button to upload the selected components to Nucleus."""
     def Activated(self):
+        objects = [obj for obj in FreeCADGui.Selection.getSelection() if obj.TypeId != 'App::Origin']
+        if len(objects) > 1:
+            return self.ActivatedMultiple(objects)
         selection = GetCurrentSelection()
         if not selection:
             return
@@ -409,20 +376,69 @@ class _UploadCmd:
         else:
             usdlink, stplink = usd_local, stp_local
 
-        # Upload USD
+        secondary_usd = secondary_stp = None
+        if getattr(FreeCAD, 'is_enabled_secondary_usdlink', False):
+            secondary_usd = GetCurrentUSDLinkNoPrint(secondary=True)
+        if getattr(FreeCAD, 'is_enabled_secondary_stplink', False):
+            secondary_stp = GetCurrentSTPLinkNoPrint(secondary=True)
+
+        self.push(selection, usdlink, stplink, secondary_usd, secondary_stp, token)
+
+    def push(self, selection, usdlink, stplink, secondary_usd, secondary_stp, token):
+        # Export the mesh and STEP file once on the main thread, then send them to every destination in one worker call.
+        # Permissions older than the cache TTL are re-checked by the worker in that same call.
+        targets = [(usdlink, 'usd', False), (stplink, 'stp', False), (secondary_usd, 'usd', True), (secondary_stp, 'stp', True)]
+        allowed, stale = GetStaleUploadTargets(targets)
+        destinations = [
+            (usdlink if usdlink in allowed else None, stplink if stplink in allowed else None, False),
+            (secondary_usd if secondary_usd in allowed else None, secondary_stp if secondary_stp in allowed else None, True),
+        ]
+        mesh_path = stp_path = None
+        if any(usd for usd, _, _ in destinations):
+            mesh_path = ExportMeshForUpload(selection, token)
+        if any(stp for _, stp, _ in destinations):
+            stp_path = ExportSTPForUpload(selection, token)
+
+        items = []
+        for usd, stp, secondary in destinations:
+            if not usd and not stp:
+                continue
+            print(f'Pushing {selection.Name} to {", ".join(link for link in (usd, stp) if link)}')
+            # The secondary USD is rewritten from scratch rather than updated, see --create_new_usd
+            items.append({'name': selection.Name,
+                          'usd_url': usd, 'mesh_file': mesh_path if usd else None,
+                          'stp_url': stp, 'stp_file': stp_path if stp else None,
+                          'overwrite_usd': secondary})
+        if not items:
+            return
+
+        SubmitNucleusJob(f'Push {selection.Label}', SendBatchToNucleus, items, token, access_targets=stale, report_progress=True,
+                         on_done=lambda result: self.apply_upload(result, items, selection, usdlink, stplink, token))
+
+    def apply_upload(self, result, items, selection, usdlink, stplink, token):
+        # Runs on the main thread once every transfer of the push has finished
+        records, stderr, payload = result
+        PrintResultRecords(records, stderr)
+        if payload is None:
+            QtWidgets.QMessageBox.critical(None, "Omniverse Connector for FreeCAD", "Failed to push to Nucleus!")
+            return
+        # The worker reports one status per item, in the order they were sent
+        primary = None
+        for item, status in zip(items, payload['items']):
+            if not item['overwrite_usd']:
+                primary = status
+            if status['errors']:
+                print(f"[ERROR] Push to {'secondary' if item['overwrite_usd'] else 'primary'} links failed: {', '.join(status['errors'])}")
+
         if usdlink:
-            print(f'Pushing {selection.Name} to {usdlink}')
-            output, error = UploadUSDToNucleus(usdlink, selection, token=token)
-            print('\n'.join(f'OmniClient {line}' for line in output.split('\r\n')))
-            print('ERRORS', error)
             selection = attachNewStringProperty(selection, "Nucleus_link_usd", usdlink)
 
-        # Upload STP
         if stplink:
-            print(f'Pushing {selection.Name} to {stplink}')
-            output, error = UploadSTPToNucleus(stplink, selection, token=token)
-            print('\n'.join(f'OmniClient {line}' for line in output.split('\r\n')))
-            print('ERRORS', error)
+            stp_result = primary['stp'] if primary else None
+            if stp_result and stp_result.get('skipped'):
+                # Nucleus already had this geometry, so the version on Nucleus is still the one pulled or pushed last
+                print(f'[INFO] STP unchanged, nothing uploaded to {stplink}')
+                token = getattr(selection, 'Nucleus_version_id', token)
             props = {
                 "Label": GetComponentNameFromStplink(stplink),
                 "Nucleus_link_stp": stplink,
@@ -432,12 +448,72 @@ class _UploadCmd:
             for k, v in props.items():
                 selection = attachNewStringProperty(selection, k, v)
 
-        # Upload to secondary USD if enabled
-        if getattr(FreeCAD, 'is_enabled_secondary_usdlink', False):
-            secondary_usd = GetCurrentUSDLinkNoPrint(secondary=True)
-            output, error = UploadUSDToNucleus(secondary_usd, selection, token=token, overwrite_history=True, secondary=True)
-            print('\n'.join(f'OmniClient {line}' for line in output.split('\r\n')))
-            print('ERRORS', error)
+    def ActivatedMultiple(self, objects):
+        # Every object goes to its own asset, so only objects that were pushed before can be pushed together
+        pushable = [obj for obj in objects if hasattr(obj, 'Nucleus_link_usd') and hasattr(obj, 'Nucleus_link_stp')]
+        for obj in objects:
+            if obj not in pushable:
+                print(f'[WARN] {obj.Label} has no Nucleus links yet. Push it on its own first.')
+        if not pushable:
+            QtWidgets.QMessageBox.critical(None, "Omniverse Connector for FreeCAD", "None of the selected objects has been pushed to Nucleus before!")
+            return
+
+        self.push_many(pushable, str(RandomTokenGenerator()))
+
+    def push_many(self, objects, token):
+        # Export on the main thread (tessellation runs in a thread pool), then push everything in one worker call
+        targets = []
+        for obj in objects:
+            targets += [(obj.Nucleus_link_usd, 'usd', False), (obj.Nucleus_link_stp, 'stp', False)]
+        allowed_links, stale = GetStaleUploadTargets(targets)
+        allowed = []
+        for obj in objects:
+            if obj.Nucleus_link_usd in allowed_links and obj.Nucleus_link_stp in allowed_links:
+                allowed.append(obj)
+            else:
+                print(f'[WARN] Skipping {obj.Label}: no write access to its Nucleus files')
+        if not allowed:
+            return
+
+        exports = ExportObjectsForUpload(allowed, token)
+        items = []
+        for obj in allowed:
+            mesh_path, stp_path = exports[obj.Name]
+            items.append({'name': obj.Name, 'stp_url': obj.Nucleus_link_stp, 'stp_file': stp_path,
+                          'usd_url': obj.Nucleus_link_usd if mesh_path else None, 'mesh_file': mesh_path})
+        SubmitNucleusJob(f'Push {len(items)} objects', SendBatchToNucleus, items, token, access_targets=stale, report_progress=True,
+                         on_done=lambda result: self.apply_batch_upload(result, allowed, token))
+
+    def apply_batch_upload(self, result, objects, token):
+        records, stderr, payload = result
+        PrintResultRecords(records, stderr)
+        if payload is None:
+            QtWidgets.QMessageBox.critical(None, "Omniverse Connector for FreeCAD", "Failed to push to Nucleus!")
+            return
+
+        def describe(file_result):
+            if file_result is None:
+                return 'not updated'
+            return 'unchanged' if file_result.get('skipped') else 'uploaded'
+
+        objects_by_name = {obj.Name: obj for obj in objects}
+        sync_time = time.strftime(" %d %b %Y %H:%M:%S", time.localtime())
+        for status in payload['items']:
+            obj = objects_by_name.get(status['name'])
+            print(f"[INFO] {obj.Label if obj else status['name']}: STP {describe(status['stp'])}, USD {describe(status['usd'])}")
+            if obj is None or status['errors']:
+                continue
+            # The version id only moves on when new STEP data was written
+            if not status['stp'].get('skipped'):
+                attachNewStringProperty(obj, "Nucleus_version_id", token)
+            attachNewStringProperty(obj, "Last_Nucleus_sync_time", sync_time)
+
+        megabytes = payload['bytes'] / 1e6
+        rate = f", {payload['bytes_per_second'] / 1e6:.2f} MB/s" if payload['bytes_per_second'] else ''
+        print(f"[INFO] Pushed {payload['pushed']} of {len(payload['items'])} objects: {megabytes:.2f} MB in {payload['seconds']:.1f} s{rate}")
+        if payload['failed']:
+            QtWidgets.QMessageBox.warning(None, "Omniverse Connector for FreeCAD",
+                                          f"{payload['failed']} of {len(payload['items'])} objects could not be pushed. See the report view for details.")
 
     def GetResources(self):
         return {
@@ -622,7 +698,8 @@ class OmniverseAssemblyPanel:
         self.live_mode_button = QtWidgets.QPushButton("(EXPERIMENTAL) Live assembly mode")
         self.live_mode_button.setCheckable(True)
         self.live_mode_button.clicked.connect(self.flow_start_live_assy_mode)
-        for w in [QtWidgets.QLabel("Assembly Panel"), self.status_label, project_label, self.assy_label, self.live_mode_button]:
+        self.job_queue = JobQueueWidget(GetJobRunner())
+        for w in [QtWidgets.QLabel("Assembly Panel"), self.status_label, project_label, self.assy_label, self.live_mode_button, self.job_queue]:
             self.layout.addWidget(w)
 
     def _warn(self, msg):
@@ -641,16 +718,33 @@ class OmniverseAssemblyPanel:
         usd_links = [o.Nucleus_link_usd for o in selected]
         stp_links = [o.Nucleus_link_stp for o in selected]
         token = str(RandomTokenGenerator())
-        out, err, link = CreateNewAssemblyOnNucleus(self.currentProjectURL, name, usd_links, stp_links, token)
-        print('\n'.join(out + err))
-        for usd in usd_links:
-            AddCheckpointToNucleusAsset(usd, f"Add asset to assembly in {link.split('/')[-1]}", token)
+
+        def create_assembly():
+            out, err, link = CreateNewAssemblyOnNucleus(self.currentProjectURL, name, usd_links, stp_links, token)
+            if link:
+                for usd in usd_links:
+                    AddCheckpointToNucleusAsset(usd, f"Add asset to assembly in {link.split('/')[-1]}", token)
+            return out, err, link
+
+        self.status_label.setText(' Status: ⏳ Creating assembly ...')
+        SubmitNucleusJob(f'Create assembly {name}', create_assembly, on_done=self._apply_new_assembly)
+
+    def _apply_new_assembly(self, result):
+        out, err, link = result
+        PrintResultRecords(out, '\n'.join(err))
+        if not link:
+            self.status_label.setText(' Status: ❌')
+            return self._warn("Failed to create assembly!")
         FreeCAD.assembly_usd_link = link
-        self.assy_label.setText(f' \u2705 Current assembly: {link.split("/")[-1]}')
-        self.status_label.setText(' Status: \u2705 Ready')
+        self.assy_label.setText(f' ✅ Current assembly: {link.split("/")[-1]}')
+        self.status_label.setText(' Status: ✅ Ready')
 
     def flow_open_existing_assembly(self):
-        out, err, links = FindExistingAssembliesOnNucleus(self.currentProjectURL)
+        SubmitNucleusJob('Find existing assemblies', FindExistingAssembliesOnNucleus, self.currentProjectURL,
+                         on_done=self._choose_existing_assembly)
+
+    def _choose_existing_assembly(self, result):
+        out, err, links = result
         if not links: return self._warn("No existing assemblies found.")
         names = [l.split('/')[-1] for l in links]
         name, ok = QtWidgets.QInputDialog.getItem(self.form, "Select assembly", "Import:", names, 0, False)
@@ -658,32 +752,51 @@ class OmniverseAssemblyPanel:
         link = next(l for l in links if name in l)
         FreeCAD.assembly_usd_link = link
         token = str(RandomTokenGenerator())
-        _, _, data = GetPrimReferenceXForms(link, token)
-        for d in data:
-            print(d['step-path'])
-        for d in data:
-            obj = _DownloadCmdWrapper(d['step-path'], d['ref-path'], token, f"Imported as {name}")
-            obj.Placement.Base = FreeCAD.Vector(d['transform'])
-            obj.Placement.Rotation = FreeCAD.Rotation(*d['rot-xyz'][::-1])
-        AddCheckpointToNucleusAsset(link, "Imported assembly into FreeCAD", token)
-        self.assy_label.setText(f' \u2705 Current assembly: {link.split("/")[-1]}')
-        self.status_label.setText(' Status: \u2705 Ready')
+        self.status_label.setText(f' Status: ⏳ Importing {name} ...')
+        SubmitNucleusJob(f'Import assembly {name}', _FetchAssemblyComponents, link, token, f"Imported as {name}", report_progress=True,
+                         on_done=lambda data: self._insert_existing_assembly(data, link, token))
+
+    def _insert_existing_assembly(self, data, link, token):
+        # All components go in as one undo step, with a single recompute at the end
+        document = FreeCAD.ActiveDocument
+        document.openTransaction(f'Import assembly {link.split("/")[-1]}')
+        try:
+            for d in data:
+                obj = _InsertAssemblyComponent(d['fetched'], d['step-path'], d['ref-path'], token)
+                if obj is None:
+                    continue
+                obj.Placement.Base = FreeCAD.Vector(d['transform'])
+                obj.Placement.Rotation = FreeCAD.Rotation(*d['rot-xyz'][::-1])
+        finally:
+            document.commitTransaction()
+        document.recompute()
+        SubmitNucleusJob('Checkpoint imported assembly', AddCheckpointToNucleusAsset, link, "Imported assembly into FreeCAD", token)
+        self.assy_label.setText(f' ✅ Current assembly: {link.split("/")[-1]}')
+        self.status_label.setText(' Status: ✅ Ready')
 
     def flow_upload_assembly_changes(self):
         link = getattr(FreeCAD, 'assembly_usd_link', None)
         if not link: return self._warn("No assembly link found.")
         usd_links, pos = get_assembly_component_placement('base')
         _, rot = get_assembly_component_placement('rotation')
-        MoveAssemblyXformPositions(link, usd_links, pos, rot, token=str(RandomTokenGenerator()))
+        SubmitNucleusJob('Upload assembly changes', MoveAssemblyXformPositions, link, usd_links, pos, rot,
+                         token=str(RandomTokenGenerator()),
+                         on_done=lambda result: PrintResultRecords(result[0], '\n'.join(result[1])))
 
     def flow_download_assembly_changes(self):
         link = getattr(FreeCAD, 'assembly_usd_link', None)
         if not link: return self._warn("No assembly link specified.")
         token = str(RandomTokenGenerator())
-        _, _, data = GetPrimReferenceXForms(link, token)
+        SubmitNucleusJob('Fetch assembly changes', GetPrimReferenceXForms, link, token,
+                         on_done=self._apply_assembly_changes)
+
+    def _apply_assembly_changes(self, result):
+        _, _, data = result
         valid_objs = [o for o in FreeCAD.ActiveDocument.Objects if hasattr(o, 'Nucleus_link_usd')]
-        for d in data:
-            obj = next(o for o in valid_objs if o.Nucleus_link_usd == d['ref-path'])
+        for d in data or []:
+            obj = next((o for o in valid_objs if o.Nucleus_link_usd == d['ref-path']), None)
+            if obj is None:
+                continue
             obj.Placement.Base = FreeCAD.Vector(d['transform'])
             obj.Placement.Rotation = FreeCAD.Rotation(*d['rot-xyz'][::-1])
 
@@ -727,19 +840,18 @@ def MoveAssemblyXformPositions(assembly_url, usd_links, translations, rotations,
     """
     Function to send a message to Nucleus to move objects in an assembly. Only used for batch assembly workflow.
     """
-    batch_path = os.path.join(GetFetcherScriptsDirectory().replace(" ", "` "), GetBatchFileName())
-    cmd = f'{batch_path} --nucleus_url {assembly_url} --move_assembly ' \
-          f'--set_rot_xyz {parse_list_into_set_srt_command_arg(rotations)} ' \
-          f'--set_transform {parse_list_into_set_srt_command_arg(translations)} ' \
-          f'--asset_usd_links {" ".join(usd_links)}'
+    argv = (
+        ['--nucleus_url', assembly_url, '--move_assembly']
+        + ['--set_rot_xyz'] + parse_list_into_srt_args(rotations)
+        + ['--set_transform'] + parse_list_into_srt_args(translations)
+        + ['--asset_usd_links'] + list(usd_links)
+    )
 
     if token:
-        cmd += f' --token {token}'
+        argv += ['--token', token]
 
-    print(cmd)
-    process = subprocess.Popen(['powershell', cmd], shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = process.communicate()
-    return stdout.decode().splitlines(), stderr.decode().splitlines()
+    records, stderr = RunOmniClientOperation(argv)
+    return records, stderr.splitlines()
 
 class OmniConnectionSettingsPanel:
     # Omniverse connection settings panel
@@ -777,6 +889,8 @@ class OmniConnectionSettingsPanel:
         layout.addWidget(self.currentProjectURL_text)
         layout.addWidget(self.selected_asset_text)
         layout.addWidget(self.selected_asset_usd_text)
+        self.job_queue = JobQueueWidget(GetJobRunner())
+        layout.addWidget(self.job_queue)
         self.form.setLayout(layout)
 
     def show_about_page(self):
@@ -861,15 +975,55 @@ class OmniConnectionSettingsPanel:
             step_link.setText(FreeCAD.secondary_stplink)
         main_layout.addLayout(grid_layout)
 
+        # Tessellation used for the USD mesh on push
+        linear_deflection, angular_deflection, lod_count = GetMeshSettings()
+        mesh_layout = QtWidgets.QFormLayout()
+        linear_deflection_box = QtWidgets.QDoubleSpinBox()
+        linear_deflection_box.setDecimals(3)
+        linear_deflection_box.setRange(0.001, 100.0)
+        linear_deflection_box.setSuffix(' mm')
+        linear_deflection_box.setValue(linear_deflection)
+        angular_deflection_box = QtWidgets.QDoubleSpinBox()
+        angular_deflection_box.setRange(1.0, 90.0)
+        angular_deflection_box.setSuffix(' \u00b0')
+        angular_deflection_box.setValue(angular_deflection)
+        lod_count_box = QtWidgets.QSpinBox()
+        lod_count_box.setRange(1, MAX_LOD_COUNT)
+        lod_count_box.setValue(lod_count)
+        lod_count_box.setToolTip('Levels above 1 are written as an LOD variant set, each one coarser than the last.')
+        mesh_layout.addRow('USD mesh linear deflection:', linear_deflection_box)
+        mesh_layout.addRow('USD mesh angular deflection:', angular_deflection_box)
+        mesh_layout.addRow('USD levels of detail:', lod_count_box)
+        usdc_toggle = QtWidgets.QCheckBox("Create new assets and assemblies as binary .usdc")
+        usdc_toggle.setChecked(GetUSDFormat() == 'usdc')
+        mesh_layout.addRow(usdc_toggle)
+        convert_button = QtWidgets.QPushButton("Convert project assets to .usdc")
+        convert_button.setToolTip('Rewrites the .usda assets of the current project as .usdc and updates the references in its assemblies.')
+        convert_button.setEnabled(GetCurrentProjectLinkNoPrint() is not None)
+        convert_button.clicked.connect(lambda: self.convert_project_to_usdc(advanced_dialog))
+        mesh_layout.addRow(convert_button)
+        main_layout.addLayout(mesh_layout)
+
         button_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
         button_box.accepted.connect(advanced_dialog.accept)
         button_box.rejected.connect(advanced_dialog.reject)
         main_layout.addWidget(button_box)
 
         if advanced_dialog.exec_() == QtWidgets.QDialog.Accepted:
+            SaveMeshSettings(linear_deflection_box.value(), angular_deflection_box.value(), lod_count_box.value())
+            SaveUSDFormat('usdc' if usdc_toggle.isChecked() else 'usda')
+
+            # Both secondary links are checked in one round trip
+            targets = []
+            if usd_toggle.isChecked():
+                targets.append((usd_link.text(), 'usd', True))
+            if step_toggle.isChecked():
+                targets.append((step_link.text(), 'stp', True))
+            _, _, permissions = GetAuthCheckBatch(targets)
+
             if usd_toggle.isChecked():
                 secondary_usdlink = usd_link.text()
-                _, _, permission = GetAuthCheck(secondary_usdlink, filetype='usd', secondary=True)
+                permission = permissions.get(secondary_usdlink, 'NO_ACCESS')
                 if permission == 'OK_ACCESS':
                     print(f"USD Secondary Link: {secondary_usdlink}")
                     SaveSecondaryUSDLinkAsTextFile(secondary_usdlink)
@@ -884,7 +1038,7 @@ class OmniConnectionSettingsPanel:
             # Handle STEP link
             if step_toggle.isChecked():
                 secondary_stplink = step_link.text()
-                _, _, permission = GetAuthCheck(secondary_stplink, filetype='stp', secondary=True)
+                permission = permissions.get(secondary_stplink, 'NO_ACCESS')
                 if permission == 'OK_ACCESS':
                     print(f"STP Secondary Link: {secondary_stplink}")
                     SaveSecondarySTPLinkAsTextFile(secondary_stplink)
@@ -897,19 +1051,36 @@ class OmniConnectionSettingsPanel:
                 FreeCAD.is_enabled_secondary_stplink = False
 
 
+    def convert_project_to_usdc(self, parent):
+        project_url = GetCurrentProjectLinkNoPrint()
+        answer = QtWidgets.QMessageBox.question(
+            parent, "Convert to .usdc",
+            f"Convert every .usda asset in {project_url} to .usdc? The .usda files are deleted once the assemblies reference the new files.")
+        if answer != QtWidgets.QMessageBox.Yes:
+            return
+
+        def apply_conversion(result):
+            records, stderr, converted = result
+            PrintResultRecords(records, stderr)
+            ApplyUSDLinkMigration(converted)
+
+        SubmitNucleusJob('Convert project assets to .usdc', ConvertProjectAssetsToUSDC, project_url, str(RandomTokenGenerator()),
+                         on_done=apply_conversion)
+
     def disconnect_from_project(self):
         if not getattr(FreeCAD, 'is_connected_to_nucleus_project', False):
             self._warn("No Nucleus project currently connected!")
             return
 
-        SaveLastProjectLinkAsTextFile(GetCurrentProjectLinkNoPrint() or GetLastProjectLinkNoPrint())
         last_project_link = GetLastProjectLinkNoPrint()
         current_project_link = GetCurrentProjectLinkNoPrint()
-        ClearLocalDirectory()
-        if current_project_link != None:
-            SaveLastProjectLinkAsTextFile(current_project_link)
-        elif last_project_link!=None:
-            SaveLastProjectLinkAsTextFile(last_project_link)
+        # Clearing the session and remembering the project is one write, so a crash keeps either the old or the new state
+        with GetState().transaction():
+            ClearLocalDirectory()
+            if current_project_link != None:
+                SaveLastProjectLinkAsTextFile(current_project_link)
+            elif last_project_link!=None:
+                SaveLastProjectLinkAsTextFile(last_project_link)
         FreeCAD.assembly_usd_link = None
         FreeCAD.is_connected_to_nucleus_project = False
         self.currentProjectURL_text.setText('❌ No project Nucleus URL specified.')
@@ -953,16 +1124,13 @@ class OmniConnectionSettingsPanel:
             if name_new_project!='':
                 if text_follows_rules(name_new_project) ==True:
                     if no_restricted_strings_in_project_link(name_new_project) == True:
-                        ok, stdout, stderr = CreateNewProjectOnNucleus(host_name = hostname_new_project, project_name = name_new_project, make_public = public_project)
+                        ok, records, stderr = CreateNewProjectOnNucleus(host_name = hostname_new_project, project_name = name_new_project, make_public = public_project)
                         if ok==False:
                             print('[ERROR] Failed to create new project!')
                             error_warning_text = None
-                            for line in stdout:
-                                if 'ERROR' in line:
-                                    error_warning_text = line
-                                    print(line)
-                                else:
-                                    print('OmniClient:'+line)
+                            errors = GetErrorRecords(records)
+                            if errors:
+                                error_warning_text = FormatErrorRecord(errors[0])
                             if error_warning_text == None:
                                 error_warning_text = 'Failed to create new project!'
 
@@ -971,8 +1139,7 @@ class OmniConnectionSettingsPanel:
                             msgBox.setText(error_warning_text)
                             msgBox.exec_()
                         elif ok==True:
-                            stdout = [line.strip() for line in stdout]
-                            projectURL = [line for line in stdout if 'omniverse://'+hostname_new_project in line][0]
+                            projectURL = GetResultPayload(records, 'create_new_project')['project_url']
                             print('Creating new project at '+ projectURL)
                             check_project_ok = self.checkProjectURL(inputProjectURL=projectURL)
                             if check_project_ok ==True:
@@ -1138,15 +1305,16 @@ class OmniConnectionSettingsPanel:
             if asset_name!='':
                 if text_follows_rules(asset_name)==True:
                     print('Creating new asset '+ asset_name+' on project '+ currentProjectURL)
-                    stdout, stderr, stplink, usdlink, error_text = CreateNewAssetOnNucleus(asset_name, use_url = True, projectURL=currentProjectURL, token=token)
+                    records, stderr, stplink, usdlink, error_text = CreateNewAssetOnNucleus(asset_name, use_url = True, projectURL=currentProjectURL, token=token)
                     if error_text == None:
                         self.selected_asset_text.setText(' \u2705 Selected asset: '+stplink.split('/')[-1])
                         self.selected_asset_usd_text.setText(' \u2705 Corresponding USD: '+ usdlink.split('/')[-1])
                         SaveSTPLinkAsTextFile(stplink)
                         SaveUSDLinkAsTextFile(usdlink)
 
-                        GetAuthCheck(stplink,  filetype='stp')
-                        GetAuthCheck(usdlink,  filetype='usd')
+                        GetAuthCheckBatch([(stplink, 'stp', False), (usdlink, 'usd', False)])
+                        # So the asset picker lists the new asset the next time it opens
+                        SubmitNucleusJob('Refresh project index', RefreshProjectIndex, currentProjectURL, on_done=ApplyProjectIndex)
                     else:
                         msgBox = QtWidgets.QMessageBox()
                         msgBox.setIcon(QtWidgets.QMessageBox.Critical)
@@ -1176,9 +1344,18 @@ class OmniConnectionSettingsPanel:
     def getListItem(self):
         currentProjectURL = GetCurrentProjectLinkNoPrint()
         if currentProjectURL is not None:
-            FindUSDandSTPFiles(currentProjectURL)
-            item_list = GetListOfSTPFiles()
-            usd_list = GetListOfUSDFiles()
+            entries = ReadProjectIndex(currentProjectURL)
+            if entries is None:
+                # First time this project is opened: index it now, later opens read the index and refresh it in the background
+                print('Indexing asset files in the project folder ...')
+                result = RefreshProjectIndex(currentProjectURL)
+                ApplyProjectIndex(result)
+                entries = result[2]
+            else:
+                SubmitNucleusJob('Refresh project index', RefreshProjectIndex, currentProjectURL, on_done=ApplyProjectIndex)
+            stp_urls, usd_urls = GetAssetListsFromIndex(entries or [])
+            item_list = stp_urls or None
+            usd_list = usd_urls or None
 
             if item_list!=None and usd_list!=None:
                 usd_list = [link_entry.strip() for link_entry in usd_list]
@@ -1204,8 +1381,7 @@ class OmniConnectionSettingsPanel:
                         print(usdlink)
                         SaveSTPLinkAsTextFile(item)
                         SaveUSDLinkAsTextFile(usdlink)
-                        GetAuthCheck(item,  filetype='stp')
-                        GetAuthCheck(usdlink,  filetype='usd')
+                        GetAuthCheckBatch([(item, 'stp', False), (usdlink, 'usd', False)])
                         self.selected_asset_text.setText(' \u2705 Selected asset: '+item_short)
                         self.selected_asset_usd_text.setText(' \u2705 Corresponding USD: '+ usdlink_short)
                     elif item_short==new_asset_string:
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+# Session state for the FreeCAD to Omniverse connector workbench
+#
+# Links (project, STP, USD, ...), the permissions checked for them and the asset
+# lists of the current project are kept in memory and persisted to one JSON file in
+# session_local. FreeCAD polls IsActive on every toolbar refresh, so reads must never
+# touch the disk once the state is loaded. Writes replace the file atomically, and a
+# transaction groups several changes into one write.
+
+import contextlib
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+
+STATE_FILENAME = 'session_state.json'
+STATE_VERSION = 1
+# Seconds a permission checked against Nucleus is trusted before a transfer checks it again
+PERMISSION_TTL = 600
+
+LINK_NAMES = ('project', 'last_project', 'usd', 'stp', 'secondary_usd', 'secondary_stp')
+PERMISSION_VALUES = ('OK_ACCESS', 'NO_ACCESS')
+ASSET_LIST_NAMES = ('stp', 'usd')
+
+# Text files used by earlier versions of the workbench, imported once into the state file
+LEGACY_LINK_FILES = {
+    'projectlink.txt': 'project',
+    'last_projectlink.txt': 'last_project',
+    'usdlink.txt': 'usd',
+    'stplink.txt': 'stp',
+    'secondary_usdlink.txt': 'secondary_usd',
+    'secondary_stplink.txt': 'secondary_stp',
+}
+LEGACY_PERMISSION_FILES = {
+    'project_permission.txt': 'project',
+    'usd_permission.txt': 'usd',
+    'stp_permission.txt': 'stp',
+    'secondary_usd_permission.txt': 'secondary_usd',
+    'secondary_stp_permission.txt': 'secondary_stp',
+}
+LEGACY_LIST_FILES = {
+    'stplist.txt': 'stp',
+    'usdlist.txt': 'usd',
+}
+
+
+def _EmptyState():
+    return {
+        'version': STATE_VERSION,
+        'links': {},
+        'permissions': {},
+        'asset_lists': {name: [] for name in ASSET_LIST_NAMES},
+    }
+
+
+class SessionState:
+    """
+    Links, per-URL permissions and project asset lists of the current session.
+
+    Permissions are stored per URL with the time they were checked, so changing a link
+    never picks up the permission of the previous one.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self._data = None
+        self._depth = 0
+        self._dirty = False
+
+    def _load(self):
+        # Reads the state file once; afterwards everything is served from memory
+        if self._data is not None:
+            return
+        data = None
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            data = None
+        if isinstance(data, dict) and data.get('version') == STATE_VERSION:
+            self._data = _EmptyState()
+            self._data['links'].update(data.get('links', {}))
+            self._data['permissions'].update(data.get('permissions', {}))
+            self._data['asset_lists'].update(data.get('asset_lists', {}))
+        else:
+            self._data = _EmptyState()
+            self._migrate_legacy_files()
+
+    def _migrate_legacy_files(self):
+        directory = os.path.dirname(self.path)
+        legacy_paths = []
+
+        def read_lines(filename):
+            path = os.path.join(directory, filename)
+            if not os.path.isfile(path):
+                return None
+            legacy_paths.append(path)
+            with open(path) as f:
+                return [line.strip() for line in f.readlines() if line.strip()]
+
+        for filename, name in LEGACY_LINK_FILES.items():
+            lines = read_lines(filename)
+            if lines:
+                self._data['links'][name] = lines[0]
+        for filename, name in LEGACY_PERMISSION_FILES.items():
+            lines = read_lines(filename)
+            url = self._data['links'].get(name)
+            if lines and url and lines[0] in PERMISSION_VALUES:
+                # The old files carried no timestamp, so the permission is re-checked before the next transfer
+                self._data['permissions'][url] = {'permission': lines[0], 'checked': 0}
+        for filename, name in LEGACY_LIST_FILES.items():
+            lines = read_lines(filename)
+            if lines:
+                self._data['asset_lists'][name] = lines
+
+        if legacy_paths:
+            print(f'[INFO] Migrating {len(legacy_paths)} session files into {STATE_FILENAME}')
+            self._write()
+            for path in legacy_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _write(self):
+        # Write to a temporary file next to the state file and swap it in, so a crash never leaves a half written state
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.session_state_', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._dirty = False
+
+    def _save(self):
+        self._dirty = True
+        if self._depth == 0:
+            self._write()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Groups changes into one atomic write. If the block raises, the in-memory state is rolled back.
+
+            with state.transaction():
+                state.delete_links('usd', 'stp')
+                state.set_link('last_project', url)
+        """
+        with self.lock:
+            self._load()
+            snapshot = copy.deepcopy(self._data) if self._depth == 0 else None
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if snapshot is not None:
+                    self._data = snapshot
+                    self._dirty = False
+                raise
+            self._depth -= 1
+            if self._depth == 0 and self._dirty:
+                self._write()
+
+    def get_link(self, name):
+        if name not in LINK_NAMES:
+            raise KeyError(f'Unknown link: {name}')
+        with self.lock:
+            self._load()
+            return self._data['links'].get(name)
+
+    def set_link(self, name, url):
+        if name not in LINK_NAMES:
+            raise KeyError(f'Unknown link: {name}')
+        with self.lock:
+            self._load()
+            self._data['links'][name] = str(url)
+            self._save()
+
+    def delete_links(self, *names):
+        """
+        Removes links together with the permissions cached for them.
+        """
+        with self.lock:
+            self._load()
+            links = self._data['links']
+            for name in names:
+                url = links.pop(name, None)
+                if url is not None and url not in links.values():
+                    self._data['permissions'].pop(url, None)
+            self._save()
+
+    def get_permission(self, url):
+        with self.lock:
+            self._load()
+            entry = self._data['permissions'].get(url) if url else None
+            return entry['permission'] if entry else None
+
+    def set_permission(self, url, permission):
+        if not url:
+            return
+        if permission not in PERMISSION_VALUES:
+            raise ValueError(f'Unknown permission: {permission}')
+        with self.lock:
+            self._load()
+            self._data['permissions'][url] = {'permission': permission, 'checked': time.time()}
+            self._save()
+
+    def is_permission_stale(self, url, ttl=PERMISSION_TTL):
+        # A permission that was never checked counts as stale
+        with self.lock:
+            self._load()
+            entry = self._data['permissions'].get(url) if url else None
+            return entry is None or time.time() - entry['checked'] > ttl
+
+    def invalidate_permissions(self, *urls):
+        """
+        Forgets cached permissions for the given URLs, or for every URL if none are given.
+        """
+        with self.lock:
+            self._load()
+            if urls:
+                for url in urls:
+                    self._data['permissions'].pop(url, None)
+            else:
+                self._data['permissions'].clear()
+            self._save()
+
+    def get_asset_list(self, name):
+        if name not in ASSET_LIST_NAMES:
+            raise KeyError(f'Unknown asset list: {name}')
+        with self.lock:
+            self._load()
+            return list(self._data['asset_lists'][name])
+
+    def set_asset_lists(self, stp_urls, usd_urls):
+        with self.lock:
+            self._load()
+            self._data['asset_lists'] = {'stp': list(stp_urls), 'usd': list(usd_urls)}
+            self._save()
+
+    def replace_urls(self, url_map):
+        """
+        Points links, cached permissions and asset lists at new URLs, e.g. after assets were converted to another format.
+        """
+        with self.lock:
+            self._load()
+            links = self._data['links']
+            for name, url in list(links.items()):
+                links[name] = url_map.get(url, url)
+            permissions = self._data['permissions']
+            for old_url, new_url in url_map.items():
+                if old_url in permissions:
+                    permissions[new_url] = permissions.pop(old_url)
+            for name, urls in self._data['asset_lists'].items():
+                self._data['asset_lists'][name] = [url_map.get(url, url) for url in urls]
+            self._save()
+
+    def clear(self):
+        # Forgets everything in one write, e.g. when the session directory is emptied
+        with self.lock:
+            self._load()
+            self._data = _EmptyState()
+            self._save()
+
+
+_session_state = None
+_session_state_lock = threading.Lock()
+
+def GetSessionState(local_directory):
+    global _session_state
+    with _session_state_lock:
+        if _session_state is None:
+            _session_state = SessionState(os.path.join(local_directory, STATE_FILENAME))
+        return _session_state
@@ -0,0 +1,7 @@
+# Listing records for tests of the project scan and index modules, in the shape of project_scan.entry_record
+
+
+def record(folder, name, depth, is_folder=False, modified_time=1000.0, size=None):
+    return {'url': folder + '/' + name, 'name': name, 'folder': folder, 'depth': depth, 'is_folder': is_folder,
+            'size': size if size is not None else (0 if is_folder else 10), 'modified_time': modified_time,
+            'version': None, 'hash': None, 'comment': None}
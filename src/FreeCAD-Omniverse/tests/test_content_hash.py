@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'omniConnect', 'source', 'pyOmniFreeCAD')))
+import content_hash
+
+STEP_DATA = (b'DATA;\n'
+             b"#1=CARTESIAN_POINT('',(0.,0.,0.));\n"
+             b"#2=CARTESIAN_POINT('',(1.,0.,0.));\n"
+             b'ENDSEC;\n'
+             b'END-ISO-10303-21;\n')
+
+
+def step_file(timestamp='2024-01-01T00:00:00', data=STEP_DATA):
+    header = (b'ISO-10303-21;\n'
+              b'HEADER;\n'
+              b"FILE_NAME('part.stp','" + timestamp.encode() + b"',(''),(''),'','','');\n"
+              b'ENDSEC;\n')
+    return header + data
+
+
+class TestStepHash(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.count = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def hash_content(self, content):
+        self.count += 1
+        path = os.path.join(self.tmp.name, f'{self.count}.stp')
+        with open(path, 'wb') as f:
+            f.write(content)
+        return content_hash.hash_step_file(path)
+
+    def test_header_is_ignored(self):
+        self.assertEqual(self.hash_content(step_file('2024-01-01T00:00:00')),
+                         self.hash_content(step_file('2025-06-30T12:34:56')))
+
+    def test_line_endings_are_ignored(self):
+        self.assertEqual(self.hash_content(step_file()),
+                         self.hash_content(step_file().replace(b'\n', b'\r\n')))
+
+    def test_data_change_is_detected(self):
+        changed = STEP_DATA.replace(b'(1.,0.,0.)', b'(2.,0.,0.)')
+        self.assertNotEqual(self.hash_content(step_file()), self.hash_content(step_file(data=changed)))
+
+    def test_moved_line_break_is_detected(self):
+        moved = STEP_DATA.replace(b";\n#2=", b"\n;#2=")
+        self.assertNotEqual(self.hash_content(step_file()), self.hash_content(step_file(data=moved)))
+
+    def test_file_without_data_section_hashes_every_byte(self):
+        content = b'not a step file\n'
+        self.assertEqual(self.hash_content(content), self.hash_content(content))
+        self.assertNotEqual(self.hash_content(content), self.hash_content(b'not a step file!\n'))
+
+
+class TestCheckpointHash(unittest.TestCase):
+    digest = 'ab' * 32
+
+    def test_round_trip(self):
+        comment = 'abc123 - Push from FreeCAD ' + content_hash.format_checkpoint_hash(self.digest)
+        self.assertEqual(content_hash.parse_checkpoint_hash(comment), self.digest)
+
+    def test_unversioned_tag_is_not_parsed(self):
+        # Written before line separators were hashed, so it can never match a current hash
+        self.assertIsNone(content_hash.parse_checkpoint_hash(f'Push from FreeCAD [sha256:{self.digest}]'))
+
+    def test_comment_without_tag(self):
+        self.assertIsNone(content_hash.parse_checkpoint_hash('Push from FreeCAD'))
+        self.assertIsNone(content_hash.parse_checkpoint_hash(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'omniConnect', 'source', 'pyOmniFreeCAD')))
+from download_cache import DownloadCache, remote_version_tag
+
+URL = 'omniverse://host/Projects/FreeCAD/p/assets/part/part.stp'
+
+
+class TestDownloadCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DownloadCache(os.path.join(self.tmp.name, 'cache'), max_bytes=250)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def source(self, name, size):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        return path
+
+    def put(self, url, version_tag, size, mtime):
+        path = self.cache.put(url, version_tag, self.source('download', size), '.stp')
+        # Explicit times, as file system timestamps may be too coarse to order entries written in one test
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_hit_returns_copy(self):
+        path = self.put(URL, 'hash:a', 10, 1000)
+        self.assertEqual(self.cache.get(URL, 'hash:a', '.stp'), path)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 10)
+
+    def test_new_version_tag_misses(self):
+        self.put(URL, 'hash:a', 10, 1000)
+        self.assertIsNone(self.cache.get(URL, 'hash:b', '.stp'))
+        self.assertIsNone(self.cache.get(URL + '.bak', 'hash:a', '.stp'))
+
+    def test_least_recently_used_is_evicted(self):
+        first = self.put(URL + '1', 'hash:a', 100, 1000)
+        second = self.put(URL + '2', 'hash:a', 100, 2000)
+        # A hit makes the first entry the most recently used
+        os.utime(first, (3000, 3000))
+        third = self.cache.put(URL + '3', 'hash:a', self.source('download', 100), '.stp')
+
+        self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(second))
+        self.assertTrue(os.path.exists(third))
+
+    def test_get_refreshes_entry(self):
+        path = self.put(URL, 'hash:a', 10, 1000)
+        self.cache.get(URL, 'hash:a', '.stp')
+        self.assertGreater(os.path.getmtime(path), 1000)
+
+    def test_retag_moves_entry(self):
+        # A pull checkpoints the file, which changes a tag made from version, size and time but not the content
+        path = self.put(URL, 'version:1:10:1000', 10, 1000)
+        new_path = self.cache.retag(URL, 'version:1:10:1000', 'version:2:10:1001', '.stp')
+        self.assertIsNone(self.cache.get(URL, 'version:1:10:1000', '.stp'))
+        self.assertEqual(self.cache.get(URL, 'version:2:10:1001', '.stp'), new_path)
+        self.assertFalse(os.path.exists(path))
+        with open(new_path, 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 10)
+
+    def test_retag_to_same_tag_keeps_entry(self):
+        path = self.put(URL, 'hash:a', 10, 1000)
+        self.assertEqual(self.cache.retag(URL, 'hash:a', 'hash:a', '.stp'), path)
+        self.assertTrue(os.path.exists(path))
+
+    def test_retag_without_entry(self):
+        self.assertIsNone(self.cache.retag(URL, 'hash:a', 'hash:b', '.stp'))
+        self.assertIsNone(self.cache.get(URL, 'hash:b', '.stp'))
+
+    def test_new_entry_is_kept_even_if_oldest(self):
+        self.put(URL + '1', 'hash:a', 100, 5000)
+        # The entry just written is kept, even though it is over the limit on its own
+        path = self.cache.put(URL + '2', 'hash:a', self.source('download', 300), '.stp')
+        self.assertTrue(os.path.exists(path))
+
+
+class TestRemoteVersionTag(unittest.TestCase):
+    def test_server_hash_is_preferred(self):
+        entry = types.SimpleNamespace(hash='abc', version=3, size=10, modified_time=1000)
+        self.assertEqual(remote_version_tag(entry), 'hash:abc')
+
+    def test_falls_back_to_version_size_and_time(self):
+        entry = types.SimpleNamespace(hash='', version=3, size=10, modified_time=1000)
+        tag = remote_version_tag(entry)
+        self.assertNotEqual(tag, remote_version_tag(types.SimpleNamespace(hash='', version=4, size=10, modified_time=1000)))
+        self.assertNotEqual(tag, remote_version_tag(types.SimpleNamespace(hash='', version=3, size=11, modified_time=1000)))
+        self.assertNotEqual(tag, remote_version_tag(types.SimpleNamespace(hash='', version=3, size=10, modified_time=1001)))
+
+
+if __name__ == '__main__':
+    unittest.main()
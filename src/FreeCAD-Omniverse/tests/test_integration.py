@@ -6,7 +6,8 @@ import FreeCAD
 import Part
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from file_utils import GetAuthCheck, DownloadSTPFromNucleus, ClearLocalDirectory, UploadUSDToNucleus, CreateNewAssetOnNucleus, CreateNewProjectOnNucleus, UploadSTPToNucleus, GetLocalDirectoryName
+from file_utils import GetAuthCheck, GetAuthCheckBatch, DownloadSTPFromNucleus, ClearLocalDirectory, UploadUSDToNucleus, CreateNewAssetOnNucleus, CreateNewProjectOnNucleus, UploadSTPToNucleus, GetLocalDirectoryName
+from file_utils import GetResultPayload, GetErrorRecords
 
 # === Global Omniverse server config ===
 # Input real hostname here:
@@ -26,6 +27,9 @@ USD_LINK = f"{ASSET_URL_BASE}/{TEST_ASSET_NAME}.usda"
 STP_LINK = f"{ASSET_URL_BASE}/{TEST_ASSET_NAME}.stp"
 TOKEN = "TEST_TOKEN_123"
 
+# Error codes connectSampleLib reports when access is denied for a known reason
+DENIAL_CODES = {'NO_AUTH', 'NO_PERMISSION', 'NOT_FOUND'}
+
 
 class TestFreeCADImport(unittest.TestCase):
     # Test if we can import the workbench into FreeCAD's python
@@ -52,21 +56,23 @@ class TestRealCreateNewProject(unittest.TestCase):
     # Test if we can create a new project
     def test_create_new_project_on_nucleus(self):
         project_name = PROJECT_NAME
-        ok, stdout_lines, stderr_lines = CreateNewProjectOnNucleus(
+        ok, records, stderr_lines = CreateNewProjectOnNucleus(
             host_name=HOSTNAME,
             project_name=project_name,
             make_public=False
         )
 
-        print("\n[STDOUT]")
-        print("\n".join(stdout_lines))
+        print("\n[RECORDS]")
+        print(records)
         print("\n[STDERR]")
         print("\n".join(stderr_lines))
 
         # Allow pass if project already exists - we just test if we can trigger it
-        if not ok:
-            combined = "\n".join(stdout_lines + stderr_lines)
-            self.assertIn("already_exists", combined.lower(), "Project creation failed unexpectedly.")
+        if ok:
+            self.assertTrue(GetResultPayload(records, 'create_new_project')['project_url'].endswith(PROJECT_PATH))
+        else:
+            codes = [record['code'] for record in GetErrorRecords(records)]
+            self.assertIn("ERROR_ALREADY_EXISTS", codes, "Project creation failed unexpectedly.")
 
 class TestRealCreateNewAsset(unittest.TestCase):
     # test if we can create a new asset
@@ -75,15 +81,15 @@ class TestRealCreateNewAsset(unittest.TestCase):
         asset_name = TEST_ASSET_NAME
         token = TOKEN
 
-        stdout, stderr, stplink, usdlink, error = CreateNewAssetOnNucleus(
+        records, stderr, stplink, usdlink, error = CreateNewAssetOnNucleus(
             asset_name=asset_name,
             use_url=True,
             projectURL=project_url,
             token=token
         )
 
-        print("\n[STDOUT]")
-        print("\n".join(stdout))
+        print("\n[RECORDS]")
+        print(records)
         print("\n[STDERR]")
         print("\n".join(stderr))
         print("\n[ASSET LINKS]")
@@ -96,7 +102,7 @@ class TestRealCreateNewAsset(unittest.TestCase):
             self.fail(f"Asset creation failed with error: {error}")
 
         # Check if stp & usd links are valid or do not return at all
-        self.assertTrue(usdlink is None or usdlink.endswith((".usd", ".usda")))
+        self.assertTrue(usdlink is None or usdlink.endswith((".usd", ".usda", ".usdc")))
         # also check that stplink is either valid or is not returned
         self.assertTrue(stplink is None or stplink.endswith((".stp")))
 
@@ -106,21 +112,14 @@ class TestGetAuthCheckRealBatch(unittest.TestCase):
         # Test if we can access the project we just made before
         ClearLocalDirectory()
         usdlink = PROJECT_URL
-        stdout, stderr, permission = GetAuthCheck(usdlink, filetype='project')
-
-        output_text = "\n".join(stdout + [stderr])
+        records, stderr, permission = GetAuthCheck(usdlink, filetype='project')
 
         if permission == 'OK_ACCESS':
-            self.assertTrue(any('Connected username' in line for line in stdout))
+            self.assertTrue(GetResultPayload(records)['username'])
         elif permission == 'NO_ACCESS':
             # Acceptable if access is explicitly denied with a known cause
             self.assertTrue(
-                any(keyword in output_text for keyword in [
-                    'NO_AUTH',
-                    'NO_PERMISSION',
-                    'do not have permissions',
-                    'Cannot authenticate',
-                ]),
+                any(record['code'] in DENIAL_CODES for record in GetErrorRecords(records)),
                 msg="NO_ACCESS was returned but no valid denial reason was found in output"
             )
         else:
@@ -129,22 +128,17 @@ class TestGetAuthCheckRealBatch(unittest.TestCase):
     def test_real_usda_access_or_expected_denial(self):
         # test if we can access the asset that we just made 
         usdlink = USD_LINK
-        stdout, stderr, permission = GetAuthCheck(usdlink, filetype='usd')
+        records, stderr, permission = GetAuthCheck(usdlink, filetype='usd')
 
-        output_text = "\n".join(stdout + [stderr])
-        print(output_text)
+        print(records)
+        print(stderr)
 
         if permission == 'OK_ACCESS':
-            self.assertTrue(any('Connected username' in line for line in stdout))
+            self.assertTrue(GetResultPayload(records)['username'])
         elif permission == 'NO_ACCESS':
             # Acceptable if access is explicitly denied with a known cause
             self.assertTrue(
-                any(keyword in output_text for keyword in [
-                    'NO_AUTH',
-                    'NO_PERMISSION',
-                    'do not have permissions',
-                    'Cannot authenticate',
-                ]),
+                any(record['code'] in DENIAL_CODES for record in GetErrorRecords(records)),
                 msg="NO_ACCESS was returned but no valid denial reason was found in output"
             )
         else:
@@ -153,21 +147,14 @@ class TestGetAuthCheckRealBatch(unittest.TestCase):
     def test_real_stp_access_or_expected_denial(self):
         # also check the stp file of said asset
         stplink = STP_LINK
-        stdout, stderr, permission = GetAuthCheck(stplink, filetype='stp')
-
-        output_text = "\n".join(stdout + [stderr])
+        records, stderr, permission = GetAuthCheck(stplink, filetype='stp')
 
         if permission == 'OK_ACCESS':
-            self.assertTrue(any('Connected username' in line for line in stdout))
+            self.assertTrue(GetResultPayload(records)['username'])
         elif permission == 'NO_ACCESS':
             # Acceptable if access is explicitly denied with a known cause
             self.assertTrue(
-                any(keyword in output_text for keyword in [
-                    'NO_AUTH',
-                    'NO_PERMISSION',
-                    'do not have permissions',
-                    'Cannot authenticate',
-                ]),
+                any(record['code'] in DENIAL_CODES for record in GetErrorRecords(records)),
                 msg="NO_ACCESS was returned but no valid denial reason was found in output"
             )
         else:
@@ -177,23 +164,28 @@ class TestGetAuthCheckRealBatch(unittest.TestCase):
         # now test if we switch to a fake project that we didnt make
         ClearLocalDirectory()
         usdlink = DUMMY_PROJECT_URL
-        stdout, stderr, permission = GetAuthCheck(usdlink, filetype='project')
+        records, stderr, permission = GetAuthCheck(usdlink, filetype='project')
 
         self.assertEqual(permission, 'NO_ACCESS')
 
-        output_text = "\n".join(stdout + [stderr])
         # Accept either "NOT_FOUND" (if authenticated) or a proper auth failure reason
         self.assertTrue(
-            any(keyword in output_text for keyword in [
-                'NOT_FOUND',
-                'NO_AUTH',
-                'NO_PERMISSION',
-                'do not have permissions',
-                'Cannot authenticate'
-            ]),
+            any(record['code'] in DENIAL_CODES for record in GetErrorRecords(records)),
             msg="NO_ACCESS was returned but no valid denial reason was found in output"
         )
 
+    def test_batch_matches_single_checks(self):
+        # the batched check should agree with the single checks, one entry per link
+        targets = [(STP_LINK, 'stp', False), (USD_LINK, 'usd', False), (DUMMY_PROJECT_URL, 'project', False)]
+        records, stderr, permissions = GetAuthCheckBatch(targets)
+
+        results = GetResultPayload(records, 'auth_batch')['results']
+        self.assertEqual([entry['url'] for entry in results], [link for link, _, _ in targets])
+        self.assertEqual(permissions[DUMMY_PROJECT_URL], 'NO_ACCESS')
+        for link, filetype, _ in targets[:2]:
+            _, _, permission = GetAuthCheck(link, filetype=filetype)
+            self.assertEqual(permissions[link], permission)
+
 class TestUploadAssetToNucleusReal(unittest.TestCase):
     def test_real_stp_upload_to_nucleus(self):
         # now test if we can push a STP file of a box to nucleus
@@ -207,16 +199,18 @@ class TestUploadAssetToNucleusReal(unittest.TestCase):
         box.Width = 10
         box.Height = 10
         doc.recompute()
-        stdout, stderr = UploadSTPToNucleus(stplink, box, token)
+        records, stderr = UploadSTPToNucleus(stplink, box, token)
         
-        print("\n[STDOUT]:")
-        print(stdout)
+        print("\n[RECORDS]:")
+        print(records)
         print("\n[STDERR]:")
         print(stderr)
 
-        # Assert it ran successfully
-        self.assertIn("OK", stdout)
-        self.assertTrue("ERROR" not in stderr.upper())
+        # Assert it ran successfully; from the second run on the same box is already on Nucleus and the upload is skipped
+        payload = GetResultPayload(records, 'push_non_usd')
+        self.assertIsNotNone(payload)
+        self.assertTrue(payload.get('skipped') or "Push" in payload['checkpoint'])
+        self.assertEqual(GetErrorRecords(records), [])
 
         FreeCAD.closeDocument("UploadTestDoc")
 
@@ -232,15 +226,18 @@ class TestUploadAssetToNucleusReal(unittest.TestCase):
         box.Height = 10
         doc.recompute()
 
-        stdout, stderr = UploadUSDToNucleus(usdlink, box, token)
+        records, stderr = UploadUSDToNucleus(usdlink, box, token)
 
-        print("\n[STDOUT]:")
-        print(stdout)
+        print("\n[RECORDS]:")
+        print(records)
         print("\n[STDERR]:")
         print(stderr)
 
-        self.assertIn("Push", stdout)
-        self.assertTrue("ERROR" not in stderr.upper())
+        # An unchanged mesh is not uploaded again and gets no checkpoint
+        payload = GetResultPayload(records, 'push')
+        self.assertIsNotNone(payload)
+        self.assertTrue(payload.get('skipped') or "Push" in payload['checkpoint'])
+        self.assertEqual(GetErrorRecords(records), [])
 
         FreeCAD.closeDocument("UploadTestDocUSD")
 
@@ -255,14 +252,14 @@ class TestDownloadAssetFromNucleus(unittest.TestCase):
         doc = FreeCAD.newDocument("TestDoc")
         ClearLocalDirectory()
 
-        success, imported_object, stdout, stderr, fc_err = DownloadSTPFromNucleus(stplink, token)
+        success, imported_object, records, stderr, fc_err = DownloadSTPFromNucleus(stplink, token)
 
         self.assertIn(success, [True, False])
         if success:
             self.assertIsNotNone(imported_object)
         else:
             self.assertIsNone(imported_object)
-            print("\n[stdout]\n", stdout)
+            print("\n[records]\n", records)
             print("[stderr]\n", stderr)
             print("[fc_err]\n", fc_err)
         FreeCAD.closeDocument("TestDoc")
@@ -0,0 +1,193 @@
+import os
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'omniConnect', 'source', 'pyOmniFreeCAD')))
+import mesh_utils
+
+
+class TestWeldVertices(unittest.TestCase):
+    tolerance = 1e-4
+
+    def test_soup_becomes_indexed_mesh(self):
+        # Two triangles of a quad, written as soup with the shared edge repeated
+        points = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0],
+                           [0, 0, 0], [1, 1, 0], [0, 1, 0]], dtype=np.float32)
+        triangles = np.arange(6).reshape(2, 3)
+        welded_points, welded_triangles = mesh_utils.weld_vertices(points, triangles, self.tolerance)
+        self.assertEqual(len(welded_points), 4)
+        np.testing.assert_array_equal(welded_triangles, [[0, 1, 2], [0, 2, 3]])
+
+    def test_points_across_cell_boundary_merge(self):
+        # Closer than the tolerance, but on either side of a grid line
+        t = self.tolerance
+        points = np.array([[0.999 * t, 0, 0], [1.001 * t, 0, 0], [5, 5, 5], [6, 5, 5]])
+        welded_points, welded_triangles = mesh_utils.weld_vertices(points, np.array([[0, 2, 3], [1, 3, 2]]), t)
+        self.assertEqual(len(welded_points), 3)
+        np.testing.assert_array_equal(welded_points[0], points[0])
+        np.testing.assert_array_equal(welded_triangles, [[0, 1, 2], [0, 2, 1]])
+
+    def test_points_in_diagonal_cells_merge(self):
+        t = self.tolerance
+        points = np.array([[-0.25 * t, -0.25 * t, -0.25 * t], [0.25 * t, 0.25 * t, 0.25 * t], [5, 5, 5], [6, 5, 5]])
+        welded_points, _ = mesh_utils.weld_vertices(points, np.array([[0, 2, 3], [1, 3, 2]]), t)
+        self.assertEqual(len(welded_points), 3)
+
+    def test_points_beyond_tolerance_are_kept(self):
+        t = self.tolerance
+        points = np.array([[0, 0, 0], [1.5 * t, 0, 0], [0, 1.5 * t, 0]])
+        welded_points, welded_triangles = mesh_utils.weld_vertices(points, np.array([[0, 1, 2]]), t)
+        self.assertEqual(len(welded_points), 3)
+        np.testing.assert_array_equal(welded_triangles, [[0, 1, 2]])
+
+    def test_collapsed_triangles_are_dropped(self):
+        t = self.tolerance
+        points = np.array([[0, 0, 0], [0.5 * t, 0, 0], [1, 0, 0], [0, 1, 0]])
+        _, welded_triangles = mesh_utils.weld_vertices(points, np.array([[0, 1, 2], [0, 2, 3]]), t)
+        np.testing.assert_array_equal(welded_triangles, [[0, 1, 2]])
+
+    def test_chains_merge_transitively(self):
+        t = self.tolerance
+        points = np.array([[0, 0, 0], [0.8 * t, 0, 0], [1.6 * t, 0, 0], [1, 1, 1], [2, 1, 1]])
+        welded_points, _ = mesh_utils.weld_vertices(points, np.array([[0, 3, 4], [2, 4, 3]]), t)
+        self.assertEqual(len(welded_points), 3)
+
+    def test_dense_cell_is_measured_in_chunks(self):
+        # Thousands of distinct points inside one grid cell, as a badly scaled or degenerate mesh gives.
+        # Taking every pair of the cell at once would need about 16 million pairs' worth of arrays.
+        t = self.tolerance
+        rng = np.random.default_rng(0)
+        dense = rng.uniform(0.1 * t, 0.4 * t, size=(4000, 3))
+        points = np.vstack([dense, [[1, 0, 0], [0, 1, 0]]])
+        triangles = np.array([[0, 4000, 4001], [3999, 4001, 4000]])
+        tracemalloc.start()
+        try:
+            welded_points, welded_triangles = mesh_utils.weld_vertices(points, triangles, t)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 64 * 1024 ** 2)
+        self.assertEqual(len(welded_points), 3)
+        np.testing.assert_array_equal(welded_points[0], points[0])
+        np.testing.assert_array_equal(welded_triangles, [[0, 1, 2], [0, 2, 1]])
+
+    def test_chunk_size_does_not_change_result(self):
+        t = self.tolerance
+        rng = np.random.default_rng(1)
+        points = rng.uniform(0, 4 * t, size=(300, 3))
+        triangles = rng.integers(0, len(points), size=(200, 3))
+        expected = mesh_utils.weld_vertices(points, triangles, t)
+        # A chunk size that splits single cell pairs across chunks
+        with mock.patch.object(mesh_utils, 'WELD_PAIR_CHUNK', 7):
+            chunked = mesh_utils.weld_vertices(points, triangles, t)
+        np.testing.assert_array_equal(chunked[0], expected[0])
+        np.testing.assert_array_equal(chunked[1], expected[1])
+
+    def test_zero_tolerance_keeps_mesh(self):
+        points = np.array([[0, 0, 0], [0, 0, 0], [1, 0, 0]])
+        triangles = np.array([[0, 1, 2]])
+        welded_points, welded_triangles = mesh_utils.weld_vertices(points, triangles, 0)
+        self.assertIs(welded_points, points)
+        self.assertIs(welded_triangles, triangles)
+
+
+class TestSTL(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_binary_round_trip(self):
+        points = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], dtype=np.float32)
+        triangles = np.array([[0, 1, 2], [0, 2, 3]])
+        mesh_utils.write_stl(self.path('quad.stl'), points, triangles)
+
+        soup_points, soup_triangles = mesh_utils.read_stl(self.path('quad.stl'))
+        np.testing.assert_array_equal(soup_points, points[triangles].reshape(-1, 3))
+        np.testing.assert_array_equal(soup_triangles, [[0, 1, 2], [3, 4, 5]])
+
+        welded_points, welded_triangles = mesh_utils.weld_vertices(soup_points, soup_triangles)
+        np.testing.assert_array_equal(welded_points, points)
+        np.testing.assert_array_equal(welded_triangles, triangles)
+
+    def test_binary_normals_follow_winding(self):
+        points = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=np.float32)
+        mesh_utils.write_stl(self.path('triangle.stl'), points, np.array([[0, 1, 2]]))
+        records = np.fromfile(self.path('triangle.stl'), dtype=mesh_utils.STL_RECORD_DTYPE, offset=mesh_utils.STL_HEADER_SIZE)
+        np.testing.assert_array_equal(records['normal'], [[0, 0, 1]])
+
+    def test_binary_header_starting_with_solid(self):
+        # Some exporters start binary headers with "solid", which must not be read as ASCII
+        points = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=np.float32)
+        mesh_utils.write_stl(self.path('solid.stl'), points, np.array([[0, 1, 2]]))
+        with open(self.path('solid.stl'), 'r+b') as f:
+            f.write(b'solid exported')
+        soup_points, _ = mesh_utils.read_stl(self.path('solid.stl'))
+        np.testing.assert_array_equal(soup_points, points)
+
+    def test_empty_binary(self):
+        mesh_utils.write_stl(self.path('empty.stl'), np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int32))
+        points, triangles = mesh_utils.read_stl(self.path('empty.stl'))
+        self.assertEqual(points.shape, (0, 3))
+        self.assertEqual(triangles.shape, (0, 3))
+
+    def test_ascii(self):
+        with open(self.path('ascii.stl'), 'w') as f:
+            f.write('solid test\n'
+                    '  facet normal 0 0 1\n'
+                    '    outer loop\n'
+                    '      vertex 0 0 0\n'
+                    '      vertex 1 0 0\n'
+                    '      vertex 1e0 1.5 0\n'
+                    '    endloop\n'
+                    '  endfacet\n'
+                    'endsolid test\n')
+        points, triangles = mesh_utils.read_stl(self.path('ascii.stl'))
+        np.testing.assert_array_equal(points, [[0, 0, 0], [1, 0, 0], [1, 1.5, 0]])
+        np.testing.assert_array_equal(triangles, [[0, 1, 2]])
+
+
+class TestTriangulatePolygons(unittest.TestCase):
+    # A triangle, a quad and a pentagon
+    counts = [3, 4, 5]
+    indices = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+
+    def test_fans(self):
+        triangles = mesh_utils.triangulate_polygons(self.counts, self.indices)
+        np.testing.assert_array_equal(triangles, [[0, 1, 2],
+                                                  [3, 4, 5], [3, 5, 6],
+                                                  [7, 8, 9], [7, 9, 10], [7, 10, 11]])
+        self.assertEqual(triangles.dtype, np.int32)
+
+    def test_holes_are_skipped(self):
+        triangles = mesh_utils.triangulate_polygons(self.counts, self.indices, hole_indices=[1])
+        np.testing.assert_array_equal(triangles, [[0, 1, 2], [7, 8, 9], [7, 9, 10], [7, 10, 11]])
+
+    def test_degenerate_faces_are_skipped(self):
+        triangles = mesh_utils.triangulate_polygons([2, 3], [0, 1, 2, 3, 4])
+        np.testing.assert_array_equal(triangles, [[2, 3, 4]])
+
+    def test_negative_hole_index_is_rejected(self):
+        with self.assertRaises(ValueError):
+            mesh_utils.triangulate_polygons(self.counts, self.indices, hole_indices=[-1])
+
+    def test_hole_index_past_last_face_is_rejected(self):
+        with self.assertRaises(ValueError):
+            mesh_utils.triangulate_polygons(self.counts, self.indices, hole_indices=[0, 3])
+
+    def test_count_mismatch_is_rejected(self):
+        with self.assertRaises(ValueError):
+            mesh_utils.triangulate_polygons(self.counts, self.indices[:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,223 @@
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'omniConnect', 'source', 'pyOmniFreeCAD')))
+import project_index
+from listing_records import record
+
+PROJECT = 'omniverse://host/Projects/FreeCAD/p'
+ASSETS = PROJECT + '/assets'
+ASSEMBLY = PROJECT + '/assembly'
+
+
+class FakeNucleus:
+    """
+    Folder listings served in place of project_scan, with folders that fail to list.
+    """
+    def __init__(self):
+        self.folders = {}
+        self.failing = set()
+        self.listed = []
+
+    def add_folder(self, parent, name, depth, modified_time=1000.0):
+        self.folders.setdefault(parent, []).append(record(parent, name, depth, True, modified_time))
+        self.folders.setdefault(parent + '/' + name, [])
+
+    def add_file(self, folder, name, depth, size=10):
+        self.folders[folder].append(record(folder, name, depth, size=size))
+
+    def set_folder_time(self, folder_url, modified_time):
+        parent = folder_url.rsplit('/', 1)[0]
+        for entry in self.folders[parent]:
+            if entry['url'] == folder_url:
+                entry['modified_time'] = modified_time
+
+    def list_folder(self, folder_url):
+        self.listed.append(folder_url)
+        if folder_url in self.failing:
+            return types.SimpleNamespace(name='ERROR_ACCESS_DENIED'), None
+        return types.SimpleNamespace(name='OK'), list(self.folders.get(folder_url, []))
+
+    def scan_folders(self, root_url, max_depth, descend=None, max_concurrency=None):
+        records, failed, level = [], [], [root_url]
+        for _ in range(max_depth):
+            next_level = []
+            for folder_url in level:
+                result, folder_records = self.list_folder(folder_url)
+                if folder_records is None:
+                    failed.append((folder_url, result.name))
+                    continue
+                records.extend(folder_records)
+                next_level.extend(r['url'] for r in folder_records if r['is_folder'])
+            level = next_level
+        return records, failed
+
+    def list_folders(self, folder_urls, depth=1, max_concurrency=None):
+        return [self.list_folder(url) for url in folder_urls]
+
+
+class FakeWatcher:
+    # Stands in for FolderWatcher with subscriptions on every folder
+    def __init__(self, dirty=()):
+        self.dirty = set(dirty)
+        self.watched = []
+
+    def take_dirty(self):
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def is_watching(self, folder_urls):
+        return True
+
+    def watch(self, folder_urls):
+        self.watched = list(folder_urls)
+
+
+class RefreshIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index_path = os.path.join(self.tmp.name, 'index.json')
+        self.nucleus = FakeNucleus()
+        self.nucleus.folders[PROJECT] = []
+        self.nucleus.add_folder(PROJECT, 'assets', 1)
+        self.nucleus.add_folder(PROJECT, 'assembly', 1)
+        self.nucleus.add_file(ASSEMBLY, 'car.usda', 2)
+        for name in ('a', 'b'):
+            self.nucleus.add_folder(ASSETS, name, 2)
+            self.nucleus.add_file(ASSETS + '/' + name, name + '.stp', 3)
+            self.nucleus.add_file(ASSETS + '/' + name, name + '.usda', 3)
+        patches = [mock.patch.object(project_index.project_scan, 'scan_folders', self.nucleus.scan_folders),
+                   mock.patch.object(project_index.project_scan, 'list_folders', self.nucleus.list_folders),
+                   mock.patch.dict(project_index._watchers, clear=True)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def refresh(self, watch=False):
+        self.nucleus.listed = []
+        return project_index.refresh_index(PROJECT, self.index_path, watch=watch)
+
+    def sizes(self, index):
+        return {entry['name']: entry['size'] for entry in index['entries']}
+
+
+class TestRefreshIndex(RefreshIndexTestCase):
+    def test_first_refresh_indexes_project(self):
+        index, stats, failed = self.refresh()
+        self.assertEqual(failed, [])
+        self.assertEqual([(entry['name'], entry['type']) for entry in index['entries']],
+                         [('car.usda', 'assembly'), ('a.stp', 'stp'), ('a.usda', 'usd'), ('b.stp', 'stp'), ('b.usda', 'usd')])
+        self.assertEqual(set(index['folders']), {ASSETS + '/a', ASSETS + '/b'})
+        with open(self.index_path) as f:
+            self.assertEqual(json.load(f)['entries'], index['entries'])
+
+    def test_overwritten_file_is_picked_up_without_subscriptions(self):
+        self.refresh()
+        # Overwriting a file leaves the modified time of its folder alone
+        self.nucleus.folders[ASSETS + '/a'][0]['size'] = 99
+        index, _, _ = self.refresh()
+        self.assertEqual(self.sizes(index)['a.stp'], 99)
+
+    def test_failed_folder_keeps_old_entries_and_time(self):
+        self.refresh()
+        self.nucleus.set_folder_time(ASSETS + '/a', 2000.0)
+        self.nucleus.folders[ASSETS + '/a'][0]['size'] = 99
+        self.nucleus.failing.add(ASSETS + '/a')
+        index, _, failed = self.refresh()
+        self.assertEqual(failed, [(ASSETS + '/a', 'ERROR_ACCESS_DENIED')])
+        self.assertEqual(self.sizes(index)['a.stp'], 10)
+        # The old time makes the next refresh with subscriptions list the folder again
+        self.assertEqual(index['folders'][ASSETS + '/a'], 1000.0)
+
+    def test_unlistable_project_keeps_index(self):
+        self.refresh()
+        with open(self.index_path) as f:
+            saved = f.read()
+        self.nucleus.failing.add(PROJECT)
+        index, stats, failed = self.refresh()
+        self.assertEqual(failed, [(PROJECT, 'ERROR_ACCESS_DENIED')])
+        self.assertEqual(stats['listed'], 1)
+        self.assertEqual(len(index['entries']), 5)
+        with open(self.index_path) as f:
+            self.assertEqual(f.read(), saved)
+
+    def test_removed_folder_is_dropped(self):
+        self.refresh()
+        self.nucleus.folders[ASSETS] = [r for r in self.nucleus.folders[ASSETS] if r['name'] != 'b']
+        index, _, _ = self.refresh()
+        self.assertEqual(set(index['folders']), {ASSETS + '/a'})
+        self.assertNotIn('b.stp', self.sizes(index))
+
+
+class TestLiveRefresh(RefreshIndexTestCase):
+    def test_only_dirty_folders_are_listed(self):
+        self.refresh()
+        project_index._watchers[PROJECT] = FakeWatcher(dirty={ASSETS + '/b'})
+        self.nucleus.folders[ASSETS + '/a'][0]['size'] = 50
+        self.nucleus.folders[ASSETS + '/b'][0]['size'] = 99
+        index, stats, _ = self.refresh(watch=True)
+        self.assertEqual(self.nucleus.listed, [ASSETS + '/b'])
+        # a reported no change, so its indexed entries are reused
+        self.assertEqual(self.sizes(index)['a.stp'], 10)
+        self.assertEqual(self.sizes(index)['b.stp'], 99)
+        self.assertEqual(stats['reused'], 1)
+        self.assertIn(ASSETS + '/b', project_index._watchers[PROJECT].watched)
+
+    def test_changed_structure_folder_rescans_project(self):
+        self.refresh()
+        project_index._watchers[PROJECT] = FakeWatcher(dirty={ASSETS})
+        self.nucleus.add_folder(ASSETS, 'c', 2, modified_time=3000.0)
+        self.nucleus.add_file(ASSETS + '/c', 'c.stp', 3)
+        index, _, _ = self.refresh(watch=True)
+        self.assertIn(PROJECT, self.nucleus.listed)
+        # With subscriptions, only the new folder is listed beyond the structure
+        self.assertEqual([url for url in self.nucleus.listed if url.startswith(ASSETS + '/')], [ASSETS + '/c'])
+        self.assertIn('c.stp', self.sizes(index))
+
+    def test_full_check_after_interval(self):
+        self.refresh()
+        project_index._watchers[PROJECT] = FakeWatcher()
+        with mock.patch('project_index.time.time', return_value=project_index.time.time() + project_index.INDEX_FULL_CHECK_SECONDS + 1):
+            self.refresh(watch=True)
+        self.assertIn(PROJECT, self.nucleus.listed)
+
+
+class TestLoadIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'index.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, content):
+        with open(self.path, 'w') as f:
+            f.write(content)
+
+    def test_index_of_another_project_is_rejected(self):
+        project_index.save_index(self.path, dict(project_index.empty_index(PROJECT + '2'), entries=[{'url': 'x'}]))
+        self.assertEqual(project_index.load_index(self.path, PROJECT), project_index.empty_index(PROJECT))
+
+    def test_other_version_and_garbage_are_rejected(self):
+        self.write(json.dumps(dict(project_index.empty_index(PROJECT), version=project_index.INDEX_VERSION + 1)))
+        self.assertEqual(project_index.load_index(self.path, PROJECT)['version'], project_index.INDEX_VERSION)
+        self.write('{not json')
+        self.assertEqual(project_index.load_index(self.path, PROJECT), project_index.empty_index(PROJECT))
+        self.assertEqual(project_index.load_index(self.path + '.missing', PROJECT), project_index.empty_index(PROJECT))
+
+    def test_saved_index_is_loaded(self):
+        index = dict(project_index.empty_index(PROJECT), entries=[{'url': 'x'}])
+        project_index.save_index(self.path, index)
+        self.assertEqual(project_index.load_index(self.path, PROJECT), index)
+
+
+if __name__ == '__main__':
+    unittest.main()
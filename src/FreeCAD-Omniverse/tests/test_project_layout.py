@@ -0,0 +1,116 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'omniConnect', 'source', 'pyOmniFreeCAD')))
+import project_layout
+from listing_records import record
+
+PROJECT = 'omniverse://host/Projects/FreeCAD/p'
+ASSETS = PROJECT + '/assets'
+
+
+class TestProjectLayout(unittest.TestCase):
+    def test_file_type(self):
+        self.assertEqual(project_layout.file_type('part.STEP'), 'stp')
+        self.assertEqual(project_layout.file_type('part.stp'), 'stp')
+        self.assertEqual(project_layout.file_type('part.usdc'), 'usd')
+        self.assertIsNone(project_layout.file_type('part.stp.bak'))
+        self.assertIsNone(project_layout.file_type('notes.txt'))
+
+    def test_assembly_folder_is_not_searched_for_assets(self):
+        self.assertFalse(project_layout.is_asset_container(record(PROJECT, 'assembly', 1, True)))
+        self.assertTrue(project_layout.is_asset_container(record(PROJECT, 'assets', 1, True)))
+        # Below the top level, a folder called assembly is an ordinary asset folder
+        self.assertTrue(project_layout.is_asset_container(record(PROJECT + '/assets', 'assembly', 2, True)))
+
+    def test_split_asset_files(self):
+        assets = ASSETS
+        records = [
+            record(PROJECT, 'assets', 1, True),
+            record(PROJECT, 'readme.stp', 1),
+            record(assets, 'part', 2, True),
+            record(assets, 'loose.usda', 2),
+            record(assets + '/part', 'part.stp', 3),
+            record(assets + '/part', 'part.usda', 3),
+            record(assets + '/part', 'part.txt', 3),
+            record(assets + '/part', 'sub.stp', 3, True),
+        ]
+        stp_records, usd_records = project_layout.split_asset_files(records)
+        self.assertEqual([r['url'] for r in stp_records], [assets + '/part/part.stp'])
+        self.assertEqual([r['url'] for r in usd_records], [assets + '/part/part.usda'])
+
+    def test_assembly_files(self):
+        records = [
+            record(PROJECT, 'assembly', 1, True),
+            record(PROJECT + '/assembly', 'car.usda', 2),
+            record(PROJECT + '/assembly', 'car.stp', 2),
+            record(PROJECT + '/assembly', 'old', 2, True),
+            record(PROJECT + '/assets', 'part.usda', 2),
+        ]
+        self.assertEqual([r['name'] for r in project_layout.assembly_files(records)], ['car.usda'])
+
+
+
+class TestReadProjectStructure(unittest.TestCase):
+    def test_folders_and_assemblies(self):
+        records = [
+            record(PROJECT, 'assets', 1, True),
+            record(PROJECT, 'assembly', 1, True),
+            record(ASSETS, 'a', 2, True, modified_time=1.0),
+            record(ASSETS, 'b', 2, True, modified_time=2.0),
+            record(PROJECT + '/assembly', 'car.usda', 2),
+            record(PROJECT + '/assembly', 'old', 2, True),
+        ]
+        top_folders, asset_folders, assemblies = project_layout.read_project_structure(records)
+        self.assertEqual(top_folders, [ASSETS, PROJECT + '/assembly'])
+        self.assertEqual(asset_folders, {ASSETS + '/a': 1.0, ASSETS + '/b': 2.0})
+        self.assertEqual([(entry['name'], entry['type']) for entry in assemblies], [('car.usda', 'assembly')])
+
+    def test_unlisted_top_folder_keeps_its_asset_folders(self):
+        records = [record(PROJECT, 'assets', 1, True), record(PROJECT, 'parts', 1, True),
+                   record(ASSETS, 'a', 2, True, modified_time=1.0)]
+        previous = {ASSETS + '/a': 0.5, PROJECT + '/parts/p': 3.0, PROJECT + '/gone/g': 4.0}
+        _, asset_folders, _ = project_layout.read_project_structure(records, previous, unlisted=[PROJECT + '/parts'])
+        self.assertEqual(asset_folders, {PROJECT + '/parts/p': 3.0, ASSETS + '/a': 1.0})
+
+
+class TestChangedAssetFolders(unittest.TestCase):
+    folders = {ASSETS + '/a': 1.0, ASSETS + '/b': 2.0, ASSETS + '/c': 3.0}
+
+    def test_without_subscriptions_every_folder_is_listed(self):
+        # An overwritten file leaves its folder's modified time alone, so unchanged times prove nothing
+        self.assertEqual(project_layout.changed_asset_folders(self.folders, dict(self.folders)), list(self.folders))
+
+    def test_with_subscriptions_only_changed_folders_are_listed(self):
+        previous = {ASSETS + '/a': 1.0, ASSETS + '/b': 1.5}
+        stale = project_layout.changed_asset_folders(self.folders, previous, dirty={ASSETS + '/a'}, watched=True)
+        self.assertEqual(stale, [ASSETS + '/a', ASSETS + '/b', ASSETS + '/c'])
+        self.assertEqual(project_layout.changed_asset_folders(self.folders, dict(self.folders), watched=True), [])
+
+
+class TestMergeAssetEntries(unittest.TestCase):
+    def entries(self, folder, *names):
+        return project_layout.asset_entries([record(folder, name, 3) for name in names])
+
+    def test_relisted_folders_replace_their_entries(self):
+        old = self.entries(ASSETS + '/a', 'a.stp', 'a.usda') + self.entries(ASSETS + '/b', 'b.stp')
+        relisted = {ASSETS + '/a': self.entries(ASSETS + '/a', 'a.stp', 'a.usdc')}
+        merged = project_layout.merge_asset_entries(old, [ASSETS + '/a', ASSETS + '/b'], relisted)
+        self.assertEqual([entry['name'] for entry in merged], ['a.stp', 'a.usdc', 'b.stp'])
+
+    def test_removed_folders_and_assemblies_are_dropped(self):
+        assembly = project_layout.index_entry(record(PROJECT + '/assembly', 'car.usda', 2), 'assembly')
+        old = self.entries(ASSETS + '/a', 'a.stp') + self.entries(ASSETS + '/gone', 'g.stp') + [assembly]
+        merged = project_layout.merge_asset_entries(old, [ASSETS + '/a'], {})
+        self.assertEqual([entry['name'] for entry in merged], ['a.stp'])
+
+    def test_asset_entries_skip_other_files(self):
+        records = [record(ASSETS + '/a', 'a.STEP', 3), record(ASSETS + '/a', 'a.usd', 3),
+                   record(ASSETS + '/a', 'notes.txt', 3), record(ASSETS + '/a', 'textures', 3, True)]
+        self.assertEqual([(entry['name'], entry['type']) for entry in project_layout.asset_entries(records)],
+                         [('a.STEP', 'stp'), ('a.usd', 'usd')])
+
+
+if __name__ == '__main__':
+    unittest.main()
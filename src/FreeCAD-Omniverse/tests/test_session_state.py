@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from session_state import SessionState, STATE_FILENAME, PERMISSION_TTL
+
+
+class SessionStateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+        self.path = os.path.join(self.directory, STATE_FILENAME)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_state_file(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+
+class TestPermissionTTL(SessionStateTestCase):
+    def test_unchecked_permission_is_stale(self):
+        state = SessionState(self.path)
+        self.assertTrue(state.is_permission_stale('omniverse://host/a.stp'))
+
+    def test_permission_goes_stale_after_ttl(self):
+        state = SessionState(self.path)
+        url = 'omniverse://host/a.stp'
+        with mock.patch('session_state.time.time', return_value=1000.0):
+            state.set_permission(url, 'OK_ACCESS')
+        with mock.patch('session_state.time.time', return_value=1000.0 + PERMISSION_TTL - 1):
+            self.assertFalse(state.is_permission_stale(url))
+        with mock.patch('session_state.time.time', return_value=1000.0 + PERMISSION_TTL + 1):
+            self.assertTrue(state.is_permission_stale(url))
+        # A stale permission is still returned until it is checked again
+        self.assertEqual(state.get_permission(url), 'OK_ACCESS')
+
+    def test_permissions_are_per_url(self):
+        state = SessionState(self.path)
+        state.set_permission('omniverse://host/a.stp', 'NO_ACCESS')
+        self.assertIsNone(state.get_permission('omniverse://host/b.stp'))
+
+    def test_unknown_permission_is_rejected(self):
+        state = SessionState(self.path)
+        with self.assertRaises(ValueError):
+            state.set_permission('omniverse://host/a.stp', 'MAYBE')
+
+
+class TestTransaction(SessionStateTestCase):
+    def test_transaction_writes_once(self):
+        state = SessionState(self.path)
+        with mock.patch.object(state, '_write', wraps=state._write) as write:
+            with state.transaction():
+                state.set_link('usd', 'omniverse://host/a.usda')
+                state.set_link('stp', 'omniverse://host/a.stp')
+            self.assertEqual(write.call_count, 1)
+        self.assertEqual(self.read_state_file()['links']['stp'], 'omniverse://host/a.stp')
+
+    def test_failed_transaction_rolls_back(self):
+        state = SessionState(self.path)
+        state.set_link('project', 'omniverse://host/Projects/FreeCAD/p')
+        with self.assertRaises(RuntimeError):
+            with state.transaction():
+                state.delete_links('project')
+                state.set_link('usd', 'omniverse://host/a.usda')
+                raise RuntimeError('interrupted')
+        self.assertEqual(state.get_link('project'), 'omniverse://host/Projects/FreeCAD/p')
+        self.assertIsNone(state.get_link('usd'))
+        # Nothing of the failed transaction reached the disk
+        self.assertNotIn('usd', self.read_state_file()['links'])
+
+    def test_state_survives_reload(self):
+        SessionState(self.path).set_link('usd', 'omniverse://host/a.usda')
+        self.assertEqual(SessionState(self.path).get_link('usd'), 'omniverse://host/a.usda')
+
+
+class TestLegacyMigration(SessionStateTestCase):
+    def write_legacy_file(self, filename, content):
+        with open(os.path.join(self.directory, filename), 'w') as f:
+            f.write(content)
+
+    def test_text_files_are_imported_and_removed(self):
+        self.write_legacy_file('usdlink.txt', 'omniverse://host/a.usda\n')
+        self.write_legacy_file('usd_permission.txt', 'OK_ACCESS\n')
+        self.write_legacy_file('stplist.txt', 'omniverse://host/a.stp\nomniverse://host/b.stp\n')
+
+        state = SessionState(self.path)
+        self.assertEqual(state.get_link('usd'), 'omniverse://host/a.usda')
+        self.assertEqual(state.get_permission('omniverse://host/a.usda'), 'OK_ACCESS')
+        # The old files had no timestamp, so the permission is checked again before use
+        self.assertTrue(state.is_permission_stale('omniverse://host/a.usda'))
+        self.assertEqual(state.get_asset_list('stp'), ['omniverse://host/a.stp', 'omniverse://host/b.stp'])
+
+        for filename in ('usdlink.txt', 'usd_permission.txt', 'stplist.txt'):
+            self.assertFalse(os.path.exists(os.path.join(self.directory, filename)))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_state_file_takes_precedence(self):
+        SessionState(self.path).set_link('usd', 'omniverse://host/new.usda')
+        self.write_legacy_file('usdlink.txt', 'omniverse://host/old.usda\n')
+        self.assertEqual(SessionState(self.path).get_link('usd'), 'omniverse://host/new.usda')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -36,20 +36,16 @@ def clean_omniverse_path(path):
     cleaned_path = re.sub(r'(?<!:)//+', '/', path)
     return cleaned_path
 
-def parse_list_into_set_srt_command_arg(input_list):
-    # helper func to parse S-R-T transform message from Omniverse into Freecad format transform
-    fixed_list = []
+def parse_list_into_srt_args(input_list):
+    # helper func to flatten S-R-T transforms into command arguments. Negative values are prefixed with 'min' so they are not read as flags
+    args = []
     for group in input_list:
         for item in group:
             str_item = str(item)
             if item < 0:
                 str_item = 'min'+ str_item[1:]
-            fixed_list.append(str_item)
-
-    input_list_str = str(fixed_list)
-    no_brackets = input_list_str.replace("]", " ").replace("[", " ")
-    no_parentheses = no_brackets.replace(")", " ").replace("(", " ")
-    return no_parentheses
+            args.append(str_item)
+    return args
 
 def find_corresponding_element(selected_item, first_list, second_list):
     for first_item, second_item in zip(first_list, second_list):